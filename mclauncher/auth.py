@@ -0,0 +1,234 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import abc
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from .utils import get_data_directory
+
+__all__ = ("AuthError", "TokenEndpoint", "HttpTokenEndpoint", "CredentialStore", "get_login_data",
+           "DEFAULT_AUTH_SERVER")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTH_SERVER = "https://mclauncher.bobdotcom.xyz"
+
+# Minecraft access tokens are valid for a day. This is used when the auth server doesn't tell us otherwise.
+DEFAULT_TOKEN_LIFETIME = 24 * 60 * 60
+
+# Treat tokens as expired slightly early, so they don't run out while the game is starting.
+EXPIRY_MARGIN = 5 * 60
+
+
+class AuthError(Exception):
+    """Raised when the token endpoint refuses to hand out login data."""
+
+
+class TokenEndpoint(abc.ABC):
+    """
+    The service that exchanges authorization codes and refresh tokens for login data. Subclass this to plug in a
+    different backend, for example a local stand-in when testing offline.
+    """
+
+    @abc.abstractmethod
+    def authorize(self, code: str) -> dict:
+        """
+        Exchange the code from the Microsoft login page for login data.
+
+        Parameters
+        -----------
+        code: :class:`str`
+            The authorization code.
+
+        Returns
+        --------
+        :class:`dict`
+            The login data, as passed to :func:`minecraft_launcher_lib.command.get_minecraft_command`.
+        """
+
+    @abc.abstractmethod
+    def refresh(self, refresh_token: str) -> dict:
+        """
+        Exchange a refresh token for new login data, without user interaction.
+
+        Parameters
+        -----------
+        refresh_token: :class:`str`
+            The refresh token saved from an earlier login.
+
+        Returns
+        --------
+        :class:`dict`
+            The new login data.
+        """
+
+
+class HttpTokenEndpoint(TokenEndpoint):
+    """The mclauncher auth backend, reached over HTTP."""
+
+    def __init__(self, base_url: str = DEFAULT_AUTH_SERVER) -> None:
+        self.base_url = base_url.rstrip("/")
+
+    def _post(self, route: str, data: dict) -> dict:
+        import requests
+
+        try:
+            req = requests.post(self.base_url + route, data=data)
+        except requests.exceptions.RequestException as e:
+            raise AuthError(f"Could not reach the auth server: {e}") from e
+        if req.status_code != 200:
+            raise AuthError(f"Auth server responded with status {req.status_code}")
+        try:
+            login_data = req.json()
+        except ValueError as e:
+            # e.g. the login page of a captive portal or a proxy's error page
+            raise AuthError(f"Auth server responded with something other than JSON: {e}") from e
+        if not isinstance(login_data, dict):
+            raise AuthError("Auth server responded with unexpected JSON")
+        if "error" in login_data:
+            raise AuthError(login_data["error"])
+        return login_data
+
+    def authorize(self, code: str) -> dict:
+        return self._post("/authorize", {"code": code})
+
+    def refresh(self, refresh_token: str) -> dict:
+        return self._post("/refresh", {"refresh_token": refresh_token})
+
+
+class CredentialStore:
+    """
+    On-disk store for login data and refresh tokens. The file is only readable by the current user.
+
+    Parameters
+    -----------
+    path: Optional[:class:`str`]
+        The file to store the credentials in. Defaults to ``credentials.json`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(get_data_directory(), "credentials.json")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning(f"Ignoring corrupt credential store at {self.path}")
+            return {}
+
+    def _write(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(tmp_path, 0o600)  # os.open's mode is filtered by the umask
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, account: str = "default") -> Optional[dict]:
+        """Return the stored entry for ``account``, or ``None``."""
+        return self._read().get(account)
+
+    def save(self, login_data: dict, account: str = "default") -> dict:
+        """
+        Store fresh login data for ``account``. The refresh token of the previous entry is kept if the new login data
+        doesn't contain one.
+        """
+        data = self._read()
+        previous = data.get(account) or {}
+        entry = {
+            "login_data": login_data,
+            "refresh_token": login_data.get("refresh_token") or previous.get("refresh_token"),
+            "expires_at": time.time() + int(login_data.get("expires_in", DEFAULT_TOKEN_LIFETIME)),
+        }
+        data[account] = entry
+        self._write(data)
+        return entry
+
+    def remove(self, account: str = "default") -> None:
+        """Forget the stored entry for ``account``."""
+        data = self._read()
+        if data.pop(account, None) is not None:
+            self._write(data)
+
+
+def is_valid(entry: dict) -> bool:
+    """Whether the login data of a stored entry can still be used."""
+    return entry.get("expires_at", 0) - EXPIRY_MARGIN > time.time()
+
+
+def get_login_data(endpoint: TokenEndpoint, store: CredentialStore, get_auth_code: Callable[[], str],
+                   account: str = "default", fresh: bool = False, offline: bool = False) -> dict:
+    """
+    Get login data, reusing or silently refreshing stored credentials when possible. Only when that fails is
+    ``get_auth_code`` called to run the interactive login.
+
+    Parameters
+    -----------
+    endpoint: :class:`TokenEndpoint`
+        The endpoint to exchange codes and refresh tokens with.
+    store: :class:`CredentialStore`
+        Where credentials are cached.
+    get_auth_code: Callable[[], :class:`str`]
+        Runs the interactive login and returns the authorization code.
+    account: :class:`str`
+        The name the credentials are stored under.
+    fresh: :class:`bool`
+        Ignore the stored credentials and always log in interactively.
+    offline: :class:`bool`
+        Don't contact the endpoint. The stored login data is used even if it expired, since the game can still be
+        played offline with it.
+
+    Returns
+    --------
+    :class:`dict`
+        The login data.
+    """
+    entry = None if fresh else store.load(account)
+    if entry is not None:
+        if is_valid(entry):
+            logger.info("Using cached login data")
+            return entry["login_data"]
+        if offline:
+            logger.warning("Cached login data expired, using it anyway since we are offline")
+            return entry["login_data"]
+        if entry.get("refresh_token"):
+            logger.info("Cached login data expired, refreshing")
+            try:
+                return store.save(endpoint.refresh(entry["refresh_token"]), account)["login_data"]
+            except AuthError as e:
+                logger.warning(f"Failed to refresh login data, logging in again: {e}")
+    if offline:
+        raise AuthError("No cached login data, log in once while online first")
+    login_data = endpoint.authorize(get_auth_code())
+    store.save(login_data, account)
+    return login_data
@@ -0,0 +1,196 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+__all__ = ("VersionInfo", "VersionCatalog", "parse_version_id")
+
+logger = logging.getLogger(__name__)
+
+_FABRIC = re.compile(r"^(?P<loader>fabric|quilt)-loader-(?P<loader_version>.+?)-"
+                     r"(?P<base>\d+\.\d+(?:\.\d+)?.*|\d+w\d+\w)$")
+_FORGE = re.compile(r"^(?P<base>[^-]+)-forge-?(?:(?P=base)-)?(?P<loader_version>.+)$", re.IGNORECASE)
+_MC_VERSION = re.compile(r"\d+w\d+[a-z]|\d+\.\d+(?:\.\d+)?(?:-(?:pre|rc)\d+)?")
+
+
+class VersionInfo(NamedTuple):
+    """An installed version, with its id split into its parts."""
+    id: str
+    type: str
+    base: Optional[str]
+    loader: Optional[str]
+    loader_version: Optional[str]
+    client: Optional[str]
+    inherits_from: Optional[str]
+
+
+def parse_version_id(version_id: str, type: str = "release", inherits_from: Optional[str] = None) -> VersionInfo:
+    """
+    Split a version id into the Minecraft version it is based on, its mod loader and loader version, and the name of
+    the custom client, if any. For example ``fabric-loader-0.12.12-1.18.1`` is fabric loader 0.12.12 for 1.18.1, and
+    ``1.18.1-OptiFine_HD_U_H4`` is the client ``OptiFine_HD_U_H4`` for 1.18.1.
+    """
+    match = _FABRIC.match(version_id)
+    if match:
+        return VersionInfo(version_id, type, match["base"], match["loader"], match["loader_version"], None,
+                           inherits_from)
+    match = _FORGE.match(version_id)
+    if match:
+        return VersionInfo(version_id, type, match["base"], "forge", match["loader_version"], None, inherits_from)
+
+    base = inherits_from
+    if base is None:
+        match = _MC_VERSION.search(version_id)
+        base = match.group() if match else None
+    if base is None or base == version_id:
+        return VersionInfo(version_id, type, base or version_id, None, None, None, inherits_from)
+    # Whatever is left after removing the base version is the client name, e.g. "OptiFine_HD_U_H4"
+    client = version_id.replace(base, "", 1).strip(" -_") or None
+    return VersionInfo(version_id, type, base, None, None, client, inherits_from)
+
+
+class VersionCatalog:
+    """
+    Index of the versions installed in a ``.minecraft`` directory. Version JSONs are only parsed when they changed,
+    using a cache invalidated by the mtime of the ``versions`` directory and of every version JSON, so lookups don't
+    have to scan and parse the whole directory.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory to index.
+    """
+
+    filename = "mclauncher_versions.json"
+
+    def __init__(self, minecraft_directory: str) -> None:
+        self.minecraft_directory = str(minecraft_directory)
+        self.versions_directory = os.path.join(self.minecraft_directory, "versions")
+        self.cache_path = os.path.join(self.minecraft_directory, self.filename)
+        self._directory_mtime = None
+        # version id -> [json mtime_ns, type, inheritsFrom]
+        self._entries: Dict[str, list] = {}
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+            self._directory_mtime = data["directory_mtime"]
+            self._entries = data["versions"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.versions: Dict[str, VersionInfo] = {}
+        self._by_base: Dict[str, List[VersionInfo]] = {}
+        self._clients: List[tuple] = []
+        self.refresh()
+
+    def _scan_entry(self, version_id: str, old_entry: Optional[list]) -> Optional[list]:
+        json_path = os.path.join(self.versions_directory, version_id, version_id + ".json")
+        try:
+            mtime = os.stat(json_path).st_mtime_ns
+        except OSError:
+            return None
+        if old_entry is not None and old_entry[0] == mtime:
+            return old_entry
+        logger.debug(f"Parsing {json_path}")
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            logger.warning(f"Ignoring invalid version JSON {json_path}")
+            return None
+        return [mtime, data.get("type", "release"), data.get("inheritsFrom")]
+
+    def refresh(self) -> None:
+        """Pick up versions that were installed, changed or removed since the catalog was built."""
+        try:
+            directory_mtime = os.stat(self.versions_directory).st_mtime_ns
+        except FileNotFoundError:
+            directory_mtime = None
+        if directory_mtime != self._directory_mtime:
+            names = os.listdir(self.versions_directory) if directory_mtime is not None else []
+        else:
+            names = list(self._entries)
+        entries = {}
+        for name in names:
+            entry = self._scan_entry(name, self._entries.get(name))
+            if entry is not None:
+                entries[name] = entry
+        changed = entries != self._entries or directory_mtime != self._directory_mtime
+        self._entries = entries
+        self._directory_mtime = directory_mtime
+        if changed or not self.versions:
+            self._build()
+        if changed:
+            try:
+                tmp_path = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump({"directory_mtime": directory_mtime, "versions": entries}, f)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                logger.debug(f"Couldn't save the version catalog: {e}")
+
+    def _build(self) -> None:
+        self.versions = {}
+        self._by_base = {}
+        self._clients = []
+        for version_id, (_, type, inherits_from) in self._entries.items():
+            info = parse_version_id(version_id, type, inherits_from)
+            self.versions[version_id] = info
+            self._by_base.setdefault(info.base, []).append(info)
+            if info.client is not None:
+                self._clients.append((info.client.lower(), version_id))
+        self._clients.sort()
+
+    def get(self, version_id: str) -> Optional[VersionInfo]:
+        """The installed version with exactly this id, or ``None``."""
+        return self.versions.get(version_id)
+
+    def find(self, base: Optional[str] = None, loader: Optional[str] = None,
+             loader_version: Optional[str] = None) -> List[VersionInfo]:
+        """Installed versions matching all the given fields."""
+        candidates = self._by_base.get(base, []) if base is not None else self.versions.values()
+        return [info for info in candidates
+                if (loader is None or info.loader == loader)
+                and (loader_version is None or info.loader_version == loader_version)]
+
+    def find_clients(self, name: str, base: Optional[str] = None) -> List[VersionInfo]:
+        """
+        Installed custom clients whose name starts with ``name`` (not case sensitive), optionally only those based on
+        the Minecraft version ``base``.
+        """
+        prefix = name.lower()
+        start = bisect.bisect_left(self._clients, (prefix,))
+        found = []
+        for client, version_id in self._clients[start:]:
+            if not client.startswith(prefix):
+                break
+            info = self.versions[version_id]
+            if base is None or info.base == base:
+                found.append(info)
+        return found
@@ -0,0 +1,121 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+from typing import List, Optional
+
+__all__ = ("CdsArchive", "MIN_JAVA_VERSION")
+
+logger = logging.getLogger(__name__)
+
+# Dynamic archives (-XX:ArchiveClassesAtExit) exist since Java 13
+MIN_JAVA_VERSION = 13
+
+
+class CdsArchive:
+    """
+    A dynamic AppCDS archive for one version, classpath and java runtime, so the classes the game loads at startup
+    are mapped from the archive instead of being found, read and verified from hundreds of jars.
+
+    The first launch without an archive is the training run: it gets ``-XX:ArchiveClassesAtExit`` and the JVM
+    dumps the classes it loaded when the game exits. :meth:`finish` moves the archive into place if the game exited
+    cleanly, and later launches get ``-XX:SharedArchiveFile``. Archives live in ``versions/<version>/cds`` and are
+    named after a hash of the classpath (with each jar's size and mtime) and the java executable, so changing
+    either makes a new one; the old ones are removed.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory.
+    version: :class:`str`
+        The version being launched.
+    classpath: :class:`str`
+        The classpath it is launched with.
+    java: :class:`str`
+        The java executable.
+    directory: Optional[:class:`str`]
+        Keep the archives here instead.
+    """
+
+    def __init__(self, minecraft_directory: str, version: str, classpath: str, java: str,
+                 directory: Optional[str] = None) -> None:
+        self.directory = directory or os.path.join(minecraft_directory, "versions", version, "cds")
+        self.classpath = classpath
+        self.java = java
+        self.key = self._key()
+        self.path = os.path.join(self.directory, self.key + ".jsa")
+        self.training_path = os.path.join(self.directory, f"{self.key}.{os.getpid()}.part")
+        self._training = False
+
+    def _key(self) -> str:
+        key = hashlib.sha1()
+        java = os.path.realpath(self.java)
+        key.update(java.encode())
+        for path in [java] + self.classpath.split(os.pathsep):
+            key.update(f"\0{path}".encode())
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key.update(f"\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+        return key.hexdigest()[:20]
+
+    @property
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def arguments(self) -> List[str]:
+        """The JVM arguments for this launch: use the archive if there is one, otherwise make it."""
+        if self.exists:
+            logger.info(f"Using class data archive {self.path}")
+            self._training = False
+            return [f"-XX:SharedArchiveFile={self.path}"]
+        logger.info("No class data archive for this classpath yet, it will be made when the game exits")
+        os.makedirs(self.directory, exist_ok=True)
+        self._training = True
+        return [f"-XX:ArchiveClassesAtExit={self.training_path}"]
+
+    def finish(self, returncode: int) -> Optional[str]:
+        """
+        Call after the game exits. Keeps the archive from a clean training run and removes older ones, returning
+        its path.
+        """
+        if not self._training:
+            return None
+        self._training = False
+        if returncode != 0 or not os.path.isfile(self.training_path):
+            logger.info("The game didn't exit cleanly, no class data archive was made")
+            if os.path.exists(self.training_path):
+                os.remove(self.training_path)
+            return None
+        os.replace(self.training_path, self.path)
+        for path in glob.glob(os.path.join(self.directory, "*.jsa")):
+            if path != self.path:
+                logger.debug(f"Removing outdated class data archive {path}")
+                os.remove(path)
+        logger.info(f"Saved class data archive {self.path}")
+        return self.path
@@ -0,0 +1,152 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .catalog import VersionCatalog
+from .utils import get_data_directory
+
+__all__ = ("CommandPlan", "CommandPlanner")
+
+logger = logging.getLogger(__name__)
+
+# Stand-ins for the login data in cached plans, replaced by the real values at launch
+AUTH_PLACEHOLDERS = {
+    "username": "${auth_player_name}",
+    "uuid": "${auth_uuid}",
+    "token": "${auth_access_token}",
+}
+
+
+class CommandPlan(NamedTuple):
+    """A launch command with the login data left out, so it can be built once and reused."""
+    java: str
+    classpath: str
+    natives_directory: str
+    arguments: List[str]
+
+    def command(self, login_data: Dict[str, Any]) -> List[str]:
+        """Fill in the login data and return the full command."""
+        replacements = [(placeholder, str(login_data.get(key, "{" + key + "}")))
+                        for key, placeholder in AUTH_PLACEHOLDERS.items()]
+        command = [self.java]
+        for argument in self.arguments:
+            if "${auth_" in argument:
+                for placeholder, value in replacements:
+                    argument = argument.replace(placeholder, value)
+            command.append(argument)
+        return command
+
+
+class CommandPlanner:
+    """
+    Builds :class:`CommandPlan` objects and caches them in memory and on disk. A plan is keyed on the hashes of the
+    version JSON and every JSON it inherits from, and on the launcher options, so launching the same version again
+    doesn't resolve any version JSON.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory.
+    catalog: Optional[:class:`~mclauncher.catalog.VersionCatalog`]
+        Used to follow ``inheritsFrom`` without parsing the version JSONs.
+    cache_directory: Optional[:class:`str`]
+        Where plans are stored. Defaults to ``cache/commands`` in the data directory.
+    """
+
+    def __init__(self, minecraft_directory: str, catalog: Optional[VersionCatalog] = None,
+                 cache_directory: Optional[str] = None) -> None:
+        self.minecraft_directory = str(minecraft_directory)
+        self.catalog = catalog or VersionCatalog(self.minecraft_directory)
+        self.cache_directory = cache_directory or os.path.join(get_data_directory(), "cache", "commands")
+        self._memory: Dict[str, CommandPlan] = {}
+
+    def _key(self, version: str, options: Dict[str, Any]) -> str:
+        key = hashlib.sha1()
+        key.update(os.path.abspath(self.minecraft_directory).encode())
+        key.update(json.dumps(options, sort_keys=True).encode())
+        seen = set()
+        while version is not None and version not in seen:
+            seen.add(version)
+            with open(os.path.join(self.minecraft_directory, "versions", version, version + ".json"), "rb") as f:
+                key.update(hashlib.sha1(f.read()).digest())
+            info = self.catalog.get(version)
+            version = info.inherits_from if info is not None else None
+        return key.hexdigest()
+
+    def _build(self, version: str, options: Dict[str, Any]) -> CommandPlan:
+        from minecraft_launcher_lib.command import get_minecraft_command
+
+        logger.debug(f"Building command plan for {version}")
+        natives_directory = options.get("nativesDirectory",
+                                        os.path.join(self.minecraft_directory, "versions", version, "natives"))
+        command = get_minecraft_command(version, self.minecraft_directory, {**options, **AUTH_PLACEHOLDERS})
+        classpath = command[command.index("-cp") + 1] if "-cp" in command else ""
+        return CommandPlan(command[0], classpath, natives_directory, command[1:])
+
+    def plan(self, version: str, options: Optional[Dict[str, Any]] = None) -> CommandPlan:
+        """
+        Get the command plan for launching ``version`` with ``options``.
+
+        Parameters
+        -----------
+        version: :class:`str`
+            The installed version to launch.
+        options: Optional[Dict[:class:`str`, Any]]
+            Options for :func:`minecraft_launcher_lib.command.get_minecraft_command`, except the login data.
+
+        Returns
+        --------
+        :class:`CommandPlan`
+            The plan.
+        """
+        options = options or {}
+        key = self._key(version, options)
+        plan = self._memory.get(key)
+        if plan is None:
+            cache_path = os.path.join(self.cache_directory, key + ".json")
+            try:
+                with open(cache_path, "r") as f:
+                    plan = CommandPlan(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                plan = None
+            # The java runtime may have been removed or installed since the plan was made
+            if plan is not None and os.path.isabs(plan.java) and not os.path.isfile(plan.java):
+                plan = None
+            if plan is None:
+                plan = self._build(version, options)
+                os.makedirs(self.cache_directory, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(plan._asdict(), f)
+                os.replace(tmp_path, cache_path)
+            else:
+                logger.debug(f"Using cached command plan for {version}")
+            self._memory[key] = plan
+        return plan
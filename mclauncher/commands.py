@@ -0,0 +1,561 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import logging
+import os
+from typing import Dict, List
+
+__all__ = ("COMMANDS", "run_command", "add_shared_store_argument", "open_shared_store")
+
+logger = logging.getLogger(__name__)
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--minecraft-directory", dest="minecraft_directory", default=None, metavar="path",
+                        help="The .minecraft directory to use. Defaults to the default one of your system.")
+    parser.add_argument('-v', dest="verbose", action='count', default=3,
+                        help="Set verbosity. Can be supplied multiple times to increase verbosity. Defaults to 3. "
+                             "(1: Critical, 2: Error, 3: Warning, 4: Info, 5: Debug)")
+
+
+def add_shared_store_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--shared-store", dest="shared_store", nargs="?", const=True,
+                        default=os.environ.get("MCLAUNCHER_SHARED_STORE") or None, metavar="path",
+                        help="Share libraries and assets with other minecraft directories through a content-addressed "
+                             "store, so they are only downloaded and stored once. Defaults to the "
+                             "MCLAUNCHER_SHARED_STORE environment variable, or the data directory if no path is "
+                             "given.")
+
+
+def open_shared_store(value, minecraft_directory: str):
+    """Open the store selected with ``--shared-store`` and register ``minecraft_directory`` with it."""
+    if not value:
+        return None
+    from .store import SharedStore
+
+    store = SharedStore(None if value is True else value)
+    store.register(minecraft_directory)
+    return store
+
+
+def _setup(args: argparse.Namespace) -> str:
+    """Configure logging the same way launch() does and return the minecraft directory."""
+    import minecraft_launcher_lib
+
+    from .utils import configure_logging
+
+    # noinspection PyProtectedMember
+    max_verbosity = int(max(logging._levelToName.keys()) / 10)
+    configure_logging((max_verbosity + 1 - min(args.verbose, max_verbosity)) * 10, ("mclauncher", "minecraft"))
+    return args.minecraft_directory or minecraft_launcher_lib.utils.get_minecraft_directory()
+
+
+def verify(argv: List[str]) -> int:
+    """Check installed versions against the file index and repair missing or changed files."""
+    parser = argparse.ArgumentParser(prog="mclauncher verify", description=verify.__doc__)
+    parser.add_argument("versions", nargs="*", metavar="version",
+                        help="Versions to verify. Defaults to every version in the file index.")
+    parser.add_argument("--full", dest="full", action="store_true", default=False,
+                        help="Hash every file, instead of only the ones whose size or mtime changed.")
+    parser.add_argument("--download-workers", dest="download_workers", type=int, default=8, metavar="n",
+                        help="How many files to download at once. Defaults to 8.")
+    add_shared_store_argument(parser)
+    _add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    minecraft_directory = _setup(args)
+
+    from .download import Downloader
+    from .fileindex import FileIndex
+    from .install import Installer
+    from .metadata import MetadataCache
+
+    index = FileIndex(minecraft_directory, full=args.full)
+    downloader = Downloader(args.download_workers, store=open_shared_store(args.shared_store, minecraft_directory))
+    installer = Installer(minecraft_directory, MetadataCache(), downloader, index=index)
+    versions = args.versions or sorted(index.versions)
+    if not versions:
+        parser.error("No versions to verify, the file index is empty")
+    for version in versions:
+        print(f"Verifying {version}")
+        installer.install(version)
+    return 0
+
+
+def store(argv: List[str]) -> int:
+    """Inspect or garbage-collect the shared store."""
+    parser = argparse.ArgumentParser(prog="mclauncher store", description=store.__doc__)
+    parser.add_argument("action", choices=("info", "gc"),
+                        help="\"info\" lists the registered directories and object count, \"gc\" removes objects "
+                             "no directory uses anymore.")
+    parser.add_argument("--store", dest="store", default=os.environ.get("MCLAUNCHER_SHARED_STORE") or None,
+                        metavar="path", help="The store to use. Defaults to the one in the data directory.")
+    parser.add_argument("--dry-run", dest="dry_run", action="store_true", default=False,
+                        help="Only report what gc would remove.")
+    _add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    _setup(args)
+
+    from .store import SharedStore
+
+    shared_store = SharedStore(args.store)
+    if args.action == "info":
+        print(f"Store: {shared_store.root}")
+        for root in shared_store.roots():
+            print(f"  used by {root}")
+        stats = shared_store.gc(dry_run=True)
+        print(f"{stats['objects']} objects in use, {stats['removed']} unused ({stats['bytes']} bytes)")
+    else:
+        stats = shared_store.gc(dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"{verb} {stats['removed']} objects ({stats['bytes']} bytes), {stats['objects']} still in use")
+    return 0
+
+
+def logs(argv: List[str]) -> int:
+    """Show, filter and search the game output kept by --log-store."""
+    parser = argparse.ArgumentParser(prog="mclauncher logs", description=logs.__doc__)
+    parser.add_argument("instance", nargs="?", default="default",
+                        help="The instance to read. Defaults to \"default\".")
+    parser.add_argument("--list", dest="list", action="store_true", default=False,
+                        help="List the instances and their launches instead.")
+    parser.add_argument("--launch", dest="launch", default=None, metavar="name",
+                        help="The launch to read. Defaults to the latest one, or every one with --grep.")
+    parser.add_argument("--all", dest="all", action="store_true", default=False,
+                        help="Read every launch of the instance.")
+    parser.add_argument("-n", "--lines", dest="lines", type=int, default=None, metavar="n",
+                        help="Only show the last n lines.")
+    parser.add_argument("-f", "--follow", dest="follow", action="store_true", default=False,
+                        help="Keep showing lines as they are written.")
+    parser.add_argument("--level", dest="level", default="NOTSET", type=str.upper, metavar="level",
+                        help="Only show lines at or above this level, e.g. WARN or ERROR.")
+    parser.add_argument("--since", dest="since", default=None, metavar="time",
+                        help="Only show lines from this time on: an ISO 8601 date/time or an age like 2h or 7d.")
+    parser.add_argument("--until", dest="until", default=None, metavar="time",
+                        help="Only show lines up to this time, in the same format as --since.")
+    parser.add_argument("--grep", "-e", dest="grep", default=None, metavar="regex",
+                        help="Only show lines matching this regular expression.")
+    parser.add_argument("--store", dest="store", default=None, metavar="path",
+                        help="The log store to use. Defaults to the one in the data directory.")
+    args = parser.parse_args(argv)
+
+    import re
+
+    from .logstore import LogStore, parse_time
+
+    log_store = LogStore(args.store)
+    if args.list:
+        for instance in log_store.instances():
+            print(instance)
+            for launch in log_store.launches(instance):
+                print(f"  {os.path.basename(launch)}")
+        return 0
+
+    level = logging.getLevelName({"WARN": "WARNING", "FATAL": "CRITICAL"}.get(args.level, args.level))
+    if not isinstance(level, int):
+        parser.error(f"Unknown level: {args.level}")
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        pattern = re.compile(args.grep) if args.grep else None
+    except (ValueError, re.error) as e:
+        parser.error(str(e))
+
+    launches = log_store.launches(args.instance)
+    if args.launch:
+        launches = [launch for launch in launches if os.path.basename(launch) == args.launch]
+    elif not (args.all or args.grep or args.since or args.until):
+        launches = launches[-1:]
+    if not launches:
+        parser.error(f"No logs for {args.instance}")
+
+    filters = dict(level=level, since=since, until=until, pattern=pattern)
+    try:
+        if args.lines is not None:
+            entries = []
+            for launch in reversed(launches):
+                entries[:0] = log_store.tail(launch, args.lines - len(entries), **filters)
+                if len(entries) >= args.lines:
+                    break
+            for entry in entries:
+                print(entry.format())
+        elif not args.follow:
+            for launch in launches:
+                for entry in log_store.read(launch, **filters):
+                    print(entry.format())
+        if args.follow:
+            for entry in log_store.follow(launches[-1], level=level, pattern=pattern):
+                print(entry.format(), flush=True)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    return 0
+
+
+def multi(argv: List[str]) -> int:
+    """Launch many game instances at once, described by a JSON file."""
+    parser = argparse.ArgumentParser(
+        prog="mclauncher multi", description=multi.__doc__,
+        epilog="The file holds a list of instances (or {\"instances\": [...]}), each an object with a \"name\" "
+               "and \"version\" and optionally \"game_directory\", \"account\" (a stored account), "
+               "\"username\" (play offline under this name), \"jvm_arguments\", \"jvm_profile\" and \"java\".")
+    parser.add_argument("spec", metavar="file", help="The JSON file describing the instances, or - for stdin.")
+    parser.add_argument("--max-running", dest="max_running", type=int, default=None, metavar="n",
+                        help="How many instances can run at once. Defaults to all of them.")
+    parser.add_argument("--log-store", dest="log_store", action="store_true", default=False,
+                        help="Keep each instance's output in the log store, under its name.")
+    parser.add_argument("--jvm-profile", dest="jvm_profile", action="append", default=[], metavar="[version=]name",
+                        help="The JVM profile for instances that don't name one, optionally only for one version. "
+                             "Heaps are sized for the number of instances running at once.")
+    parser.add_argument("--no-install", dest="no_install", default=False, action="store_true",
+                        help="Only launch versions that are already installed.")
+    parser.add_argument("--offline", dest="offline", default=False, action="store_true",
+                        help="Don't use the network. Nothing is installed and cached credentials are used.")
+    parser.add_argument("--download-workers", dest="download_workers", type=int, default=8, metavar="n",
+                        help="How many files to download at once when installing. Defaults to 8.")
+    parser.add_argument("--auth-server", dest="auth_server", default=None, metavar="url",
+                        help="The server used to refresh account tokens.")
+    add_shared_store_argument(parser)
+    _add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    minecraft_directory = _setup(args)
+
+    import json
+    import shlex
+    import sys
+
+    from .auth import DEFAULT_AUTH_SERVER, AuthError, CredentialStore, HttpTokenEndpoint, get_login_data
+    from .catalog import VersionCatalog
+    from .command import CommandPlanner
+    from .jvm import java_version, jvm_arguments, load_profiles, parse_profile_selection, select_profile
+    from .logstore import LogStore
+    from .metadata import MetadataCache
+    from .multi import Instance, InstanceSpec, launch_many, offline_login_data
+    from .utils import game_starting
+
+    try:
+        if args.spec == "-":
+            data = json.load(sys.stdin)
+        else:
+            with open(args.spec, "r") as f:
+                data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("instances", [])
+        specs = [InstanceSpec.from_dict(item) for item in data]
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(f"Invalid instance file: {e}")
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        parser.error("Instance names must be unique")
+    if not specs:
+        parser.error("No instances to launch")
+
+    metadata = MetadataCache(offline=args.offline)
+    catalog = VersionCatalog(minecraft_directory)
+    if not (args.no_install or args.offline):
+        from .download import Downloader
+        from .fileindex import FileIndex
+        from .install import Installer
+
+        installer = Installer(minecraft_directory, metadata,
+                              Downloader(args.download_workers,
+                                         store=open_shared_store(args.shared_store, minecraft_directory)),
+                              index=FileIndex(minecraft_directory))
+        for version in sorted({spec.version for spec in specs}):
+            if catalog.get(version) is None:
+                print(f"Installing {version}")
+                installer.install(version)
+        catalog.refresh()
+    for version in {spec.version for spec in specs}:
+        if catalog.get(version) is None:
+            parser.error(f"Version {version} is not installed")
+
+    def no_interactive_login():
+        raise AuthError("Not logged in. Log in once with \"mclauncher --account <name>\" first")
+
+    endpoint = HttpTokenEndpoint(args.auth_server or DEFAULT_AUTH_SERVER)
+    credentials = CredentialStore()
+    logins: Dict[str, dict] = {}
+    planner = CommandPlanner(minecraft_directory, catalog)
+    selection = parse_profile_selection(args.jvm_profile)
+    profiles = None
+    running_at_once = min(len(specs), args.max_running or len(specs))
+    instances = []
+    for spec in specs:
+        if spec.username:
+            login_data = offline_login_data(spec.username)
+        else:
+            account = spec.account or "default"
+            if account not in logins:
+                try:
+                    logins[account] = get_login_data(endpoint, credentials, no_interactive_login, account=account,
+                                                     offline=args.offline)
+                except AuthError as e:
+                    parser.error(f"{spec.name}: {e}")
+            login_data = logins[account]
+        profile_name = spec.jvm_profile or select_profile(selection, spec.version, catalog.get(spec.version).base)
+        profile_arguments: List[str] = []
+        if profile_name:
+            try:
+                profiles = profiles or load_profiles()
+                profile = profiles[profile_name]
+            except ValueError as e:
+                parser.error(str(e))
+            except KeyError:
+                parser.error(f"{spec.name}: unknown JVM profile {profile_name}")
+            java = java_version(planner.plan(spec.version).java)
+            profile_arguments = jvm_arguments(profile, java, running_at_once)
+        options = spec.options(minecraft_directory, profile_arguments)
+        command = planner.plan(spec.version, options).command(login_data)
+        if spec.java:
+            command[:1] = shlex.split(spec.java)
+        instances.append(Instance(spec.name, command, cwd=options["gameDirectory"]))
+
+    game_starting()
+    results = launch_many(instances, args.max_running, LogStore() if args.log_store else None)
+    width = max(len(name) for name in names)
+    for instance in results:
+        status = f"failed to start: {instance.error}" if instance.error else f"exit code {instance.returncode}"
+        duration = f" after {instance.duration:.1f}s" if instance.duration is not None else ""
+        print(f"{instance.name:<{width}}  {status}{duration}")
+    return 0 if all(instance.returncode == 0 for instance in results) else 1
+
+
+def java(argv: List[str]) -> int:
+    """List the java runtimes that were found, or install one of Mojang's."""
+    parser = argparse.ArgumentParser(prog="mclauncher java", description=java.__doc__)
+    parser.add_argument("--install", dest="install", default=None, metavar="component",
+                        help="Install a Mojang runtime component, e.g. java-runtime-gamma.")
+    parser.add_argument("--for", dest="version", default=None, metavar="version",
+                        help="Show the runtime an installed version would use.")
+    _add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    minecraft_directory = _setup(args)
+
+    from .install import InstallError
+    from .runtime import RuntimeManager, java_requirement
+
+    manager = RuntimeManager(minecraft_directory)
+    if args.install:
+        try:
+            runtime = manager.install(args.install)
+        except InstallError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Installed java {runtime.version} at {runtime.path}")
+        return 0
+    if args.version:
+        requirement = java_requirement(minecraft_directory, args.version)
+        runtime = manager.select(requirement)
+        if runtime is None:
+            parser.exit(1, f"No java found for {args.version} (needs {requirement or 'java 8'})\n")
+        print(runtime.path)
+        return 0
+    for runtime in manager.discover():
+        where = runtime.component or runtime.source
+        print(f"{runtime.version:<12} {runtime.arch or '?':<8} {where:<20} {runtime.path}")
+    return 0
+
+
+def daemon(argv: List[str]) -> int:
+    """Stay running and serve launches sent with "mclauncher client", keeping caches and connections warm."""
+    parser = argparse.ArgumentParser(prog="mclauncher daemon", description=daemon.__doc__)
+    parser.add_argument("--socket", dest="socket", default=None, metavar="path",
+                        help="The Unix socket to listen on. Defaults to daemon.sock in the data directory.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", dest="status", action="store_true", default=False,
+                       help="Check whether a daemon is running instead.")
+    group.add_argument("--stop", dest="stop", action="store_true", default=False,
+                       help="Stop the running daemon, once its requests are done.")
+    _add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import socket
+
+    from .daemon import Daemon, DaemonError, request
+
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("The daemon needs Unix domain sockets, which this system doesn't have")
+    if args.status or args.stop:
+        try:
+            request([], args.socket, ping=args.status, stop=args.stop)
+        except DaemonError as e:
+            parser.exit(1, f"{e}\n")
+        print("The daemon is running" if args.status else "Stopped the daemon")
+        return 0
+    _setup(args)
+    try:
+        server = Daemon(args.socket)
+    except DaemonError as e:
+        parser.exit(1, f"{e}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def client(argv: List[str]) -> int:
+    """Run a launch (or another command) in the daemon started with "mclauncher daemon"."""
+    parser = argparse.ArgumentParser(prog="mclauncher client", description=client.__doc__)
+    parser.add_argument("--socket", dest="socket", default=None, metavar="path",
+                        help="The daemon's Unix socket. Defaults to daemon.sock in the data directory.")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER,
+                        help="The mclauncher arguments to run with, e.g. a version and --fabric. Relative paths are "
+                             "relative to the daemon's working directory.")
+    args = parser.parse_args(argv)
+
+    from .daemon import DaemonError, request
+
+    try:
+        return request(args.arguments, args.socket)
+    except DaemonError as e:
+        parser.exit(1, f"{e}\n")
+
+
+def server(argv: List[str]) -> int:
+    """Install and run a dedicated server, with the same caches and JVM tuning as the game."""
+    parser = argparse.ArgumentParser(prog="mclauncher server", description=server.__doc__)
+    parser.add_argument("version", nargs="?", default=None,
+                        help="Minecraft version. Defaults to the newest release.")
+    parser.add_argument("--fabric", dest="fabric", nargs="?", default=None, const=True, metavar="version",
+                        help="Use the fabric mod loader. Loader version is optional, defaults to newest release.")
+    parser.add_argument("--directory", dest="directory", default=None, metavar="path",
+                        help="The server directory, with the worlds and server.properties. Defaults to "
+                             "servers/<version> in the data directory.")
+    parser.add_argument("--accept-eula", dest="accept_eula", action="store_true", default=False,
+                        help="Agree to the Minecraft EULA (https://aka.ms/MinecraftEULA), which the server needs to "
+                             "start.")
+    parser.add_argument("--jvm-profile", dest="jvm_profile", action="append", default=[], metavar="[version=]name",
+                        help="Tune the JVM with a profile, like for the game. Can be given more than once.")
+    parser.add_argument("--instances", dest="instances", type=int, default=1, metavar="n",
+                        help="How many servers will run on this machine at once, to size the heap. Defaults to 1.")
+    parser.add_argument("--metrics-file", dest="metrics_file", default=None, metavar="path",
+                        help="Append the startup time, tick lag, samples, exits and restarts to this file as JSON "
+                             "lines.")
+    parser.add_argument("--monitor-interval", dest="monitor_interval", type=float, default=None, metavar="seconds",
+                        help="Sample the server's memory, CPU, threads and open files this often. Defaults to 5 "
+                             "seconds with --metrics-file, otherwise off.")
+    parser.add_argument("--restart-on-crash", dest="restart_on_crash", type=int, nargs="?", const=3, default=0,
+                        metavar="n", help="Start the server again if it crashes, up to n times (3 if not given).")
+    parser.add_argument("--offline", dest="offline", default=False, action="store_true",
+                        help="Don't use the network, only what is installed and cached.")
+    parser.add_argument("--download-workers", dest="download_workers", type=int, default=8, metavar="n",
+                        help="How many files to download at once. Defaults to 8.")
+    add_shared_store_argument(parser)
+    _add_common_arguments(parser)
+    # The server's console output is logged at INFO
+    parser.set_defaults(verbose=4)
+    args = parser.parse_args(argv)
+    minecraft_directory = _setup(args)
+
+    import subprocess
+
+    from . import jvm
+    from .download import Downloader
+    from .install import Installer, InstallError
+    from .metadata import MetadataCache, OfflineError
+    from .pipe import LogPipe
+    from .runtime import RuntimeManager
+    from .server import ServerConsole, ServerInstaller, ServerMetrics, accept_eula
+    from .supervisor import Supervisor
+    from .utils import game_starting, get_data_directory
+
+    metadata = MetadataCache(offline=args.offline)
+    try:
+        version = args.version or metadata.get_latest_version()["release"]
+        loader = args.fabric
+        if loader is True:
+            loader = metadata.get_latest_fabric_loader_version()
+        downloader = Downloader(args.download_workers,
+                                store=open_shared_store(args.shared_store, minecraft_directory))
+        launch = ServerInstaller(Installer(minecraft_directory, metadata, downloader)).install(version, loader)
+    except (InstallError, OfflineError) as e:
+        parser.exit(1, f"Can't install the server: {e}\n")
+
+    runtime = RuntimeManager(minecraft_directory, metadata).select(launch.java)
+    java = runtime.path if runtime is not None else "java"
+    jvm_arguments: List[str] = []
+    profile_name = jvm.select_profile(jvm.parse_profile_selection(args.jvm_profile), launch.id, version)
+    if profile_name is not None:
+        try:
+            profiles = jvm.load_profiles()
+        except ValueError as e:
+            parser.error(str(e))
+        if profile_name not in profiles:
+            parser.error(f"Unknown JVM profile \"{profile_name}\". Profiles: {', '.join(profiles)}")
+        java_major = runtime.major if runtime is not None else jvm.java_version(java)
+        jvm_arguments = jvm.jvm_arguments(profiles[profile_name], java_major, args.instances)
+
+    directory = args.directory or os.path.join(get_data_directory(), "servers", launch.id)
+    os.makedirs(directory, exist_ok=True)
+    if args.accept_eula:
+        accept_eula(directory)
+    else:
+        try:
+            with open(os.path.join(directory, "eula.txt"), "r") as f:
+                accepted = "eula=true" in f.read()
+        except OSError:
+            accepted = False
+        if not accepted:
+            logger.warning("The server won't start until you agree to the Minecraft EULA "
+                           "(https://aka.ms/MinecraftEULA), run with --accept-eula to do so")
+    command = launch.command(java, jvm_arguments)
+    logger.debug(f"Running command: {' '.join(command)}")
+    console = ServerConsole()
+    server_logger = logging.getLogger("minecraft")
+
+    def start():
+        logpipe = LogPipe(server_logger, consumers=[ServerMetrics(args.metrics_file, launch.id)])
+        try:
+            # noinspection PyTypeChecker
+            process = subprocess.Popen(command, cwd=directory, stdin=subprocess.PIPE, stdout=logpipe,
+                                       stderr=logpipe)
+        finally:
+            logpipe.close()
+        console.attach(process)
+        return process
+
+    monitor_interval = args.monitor_interval
+    if monitor_interval is None and args.metrics_file:
+        monitor_interval = 5
+    game_starting()
+    print(f"Starting the {launch.id} server in {directory}. Type commands to send them to it.")
+    return Supervisor(start, game_directory=directory, interval=monitor_interval, metrics_file=args.metrics_file,
+                      restarts=args.restart_on_crash, name=launch.id).run()
+
+
+COMMANDS = {
+    "verify": verify,
+    "store": store,
+    "logs": logs,
+    "multi": multi,
+    "java": java,
+    "daemon": daemon,
+    "client": client,
+    "server": server,
+}
+
+
+def run_command(argv: List[str]) -> int:
+    """Run the subcommand named by ``argv[0]``."""
+    return COMMANDS[argv[0]](argv[1:])
@@ -0,0 +1,368 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextvars
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO
+
+from .utils import get_data_directory, keep_resident, on_game_start, on_log_level
+
+__all__ = ("Daemon", "DaemonError", "default_socket_path", "request")
+
+logger = logging.getLogger(__name__)
+
+# The client whose request the current thread works on. Threads started by mclauncher inherit it, see
+# mclauncher.utils.inherit_context().
+_client: "contextvars.ContextVar[Optional[_Client]]" = contextvars.ContextVar("mclauncher_daemon_client",
+                                                                              default=None)
+
+
+class DaemonError(Exception):
+    """Raised when the daemon can't be started or reached."""
+
+
+def default_socket_path() -> str:
+    """The socket the daemon listens on unless told otherwise: ``daemon.sock`` in the data directory."""
+    return os.path.join(get_data_directory(), "daemon.sock")
+
+
+def _send(file, message: Dict[str, Any]) -> None:
+    file.write(json.dumps(message).encode() + b"\n")
+    file.flush()
+
+
+class _Client:
+    """One connection to the daemon. Messages are JSON objects, one per line."""
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.file = connection.makefile("rwb")
+        self.tty = False
+        self.connected = True
+        # What the request was asked to log with -v, see Daemon.set_log_level()
+        self.level = logging.WARNING
+        self._lock = threading.Lock()
+
+    def receive(self) -> Optional[Dict[str, Any]]:
+        line = self.file.readline()
+        if not line:
+            self.connected = False
+            return None
+        return json.loads(line)
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self.connected:
+                return
+            try:
+                _send(self.file, message)
+            except OSError:
+                # The client went away, the launch carries on without it
+                self.connected = False
+
+    def ask(self) -> str:
+        """Read a line from the client's stdin."""
+        self.send({"input": True})
+        message = self.receive() if self.connected else None
+        return message.get("input", "") if message else ""
+
+
+class _RoutedStream(io.TextIOBase):
+    """Stands in for ``sys.stdout``, ``sys.stderr`` and ``sys.stdin``, sending I/O to the current thread's client."""
+
+    def __init__(self, name: str, fallback: TextIO) -> None:
+        super().__init__()
+        self.name = name
+        self.fallback = fallback
+
+    @property
+    def encoding(self):
+        return getattr(self.fallback, "encoding", "utf-8")
+
+    def writable(self) -> bool:
+        return self.name != "stdin"
+
+    def readable(self) -> bool:
+        return self.name == "stdin"
+
+    def write(self, text: str) -> int:
+        client = _client.get()
+        if client is None:
+            return self.fallback.write(text)
+        client.send({"stream": self.name, "text": text})
+        return len(text)
+
+    def readline(self, size: int = -1) -> str:
+        client = _client.get()
+        return self.fallback.readline(size) if client is None else client.ask()
+
+    def flush(self) -> None:
+        if _client.get() is None:
+            self.fallback.flush()
+
+    def isatty(self) -> bool:
+        client = _client.get()
+        return self.fallback.isatty() if client is None else client.tty
+
+    def fileno(self) -> int:
+        return self.fallback.fileno()
+
+
+class _RoutedHandler(logging.Handler):
+    """Sends log records to the client of the thread that logged them, formatted like the command line does."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.setFormatter(logging.Formatter("$asctime [$levelname] ($name): $message", style="$"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        client = _client.get()
+        if client is not None and record.levelno >= client.level:
+            try:
+                client.send({"stream": "stderr", "text": self.format(record) + "\n"})
+            except Exception:
+                self.handleError(record)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "Daemon"
+
+    def handle(self) -> None:
+        client = _Client(self.request)
+        try:
+            message = client.receive()
+        except ValueError:
+            return
+        if message is None:
+            return
+        if message.get("ping"):
+            client.send({"exit": 0, "pid": os.getpid()})
+            return
+        if message.get("stop"):
+            client.send({"exit": 0})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        client.tty = bool(message.get("tty"))
+        token = _client.set(client)
+        try:
+            code = self.server.run(message.get("args", []))
+        finally:
+            _client.reset(token)
+        client.send({"exit": code})
+
+
+def _minecraft_directory(args: List[str]) -> str:
+    if "--minecraft-directory" in args[:-1]:
+        return os.path.realpath(args[args.index("--minecraft-directory") + 1])
+    import minecraft_launcher_lib
+
+    return os.path.realpath(minecraft_launcher_lib.utils.get_minecraft_directory())
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    A launcher that stays running and serves launches (and the other commands) sent by :func:`request`, so they don't
+    pay for starting Python, importing the libraries, opening connections and loading the catalogs every time. The
+    caches, HTTP sessions and command plans it keeps are shared by all launches; requests for the same minecraft
+    directory install and plan one at a time, but their games run side by side. Each client gets the output of its own
+    request, the game's included.
+
+    Parameters
+    -----------
+    path: Optional[:class:`str`]
+        The Unix socket to listen on. Defaults to :func:`default_socket_path`.
+
+    Raises
+    -------
+    :class:`DaemonError`
+        Another daemon is listening on the socket already.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_socket_path()
+        if os.path.exists(self.path):
+            try:
+                request([], self.path, ping=True)
+            except DaemonError:
+                # Left behind by a daemon that didn't shut down cleanly
+                os.remove(self.path)
+            else:
+                raise DaemonError(f"A daemon is already running at {self.path}")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        super().__init__(self.path, _Handler)
+        os.chmod(self.path, 0o600)
+
+    def lock(self, minecraft_directory: str) -> threading.Lock:
+        """The lock requests for ``minecraft_directory`` hold until their game starts."""
+        with self._locks_lock:
+            return self._locks.setdefault(minecraft_directory, threading.Lock())
+
+    @staticmethod
+    def set_log_level(level: int) -> None:
+        """
+        Send the current client records of ``level`` and above. Loggers are only ever made more verbose for this, so
+        each client's level filters the records of the request running for it without changing the others'.
+        """
+        client = _client.get()
+        if client is None:
+            return
+        client.level = level
+        for name in list(logging.root.manager.loggerDict):
+            log = logging.getLogger(name)
+            if log.getEffectiveLevel() > level:
+                log.setLevel(level)
+
+    def run(self, args: List[str]) -> int:
+        """Run ``mclauncher <args>`` in this process and return its exit code."""
+        from .main import launch
+
+        if args[:1] in (["daemon"], ["client"]):
+            print(f"mclauncher {args[0]} can't run in the daemon", file=sys.stderr)
+            return 2
+        try:
+            directory = _minecraft_directory(args)
+        except Exception:
+            directory = ""
+        # Held while the request installs and plans its launch, and let go of once the game starts: the game itself
+        # doesn't change the directory's versions, so the next request doesn't have to wait for it to exit
+        lock = self.lock(directory)
+        lock.acquire()
+        held = [True]
+        held_lock = threading.Lock()
+
+        def release() -> None:
+            with held_lock:
+                if held[0]:
+                    held[0] = False
+                    lock.release()
+
+        logger.info(f"Running {' '.join(args) or 'a launch'} in {directory}")
+        try:
+            with on_game_start(release), on_log_level(self.set_log_level):
+                code = launch(args=args)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            logger.exception(f"mclauncher {' '.join(args)} failed")
+            code = 1
+        finally:
+            release()
+        return code or 0
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        """Warm up, route the output of requests to their clients and serve until :meth:`shutdown` is called."""
+        import minecraft_launcher_lib  # noqa: F401
+        import requests  # noqa: F401
+
+        from . import main  # noqa: F401
+
+        keep_resident()
+        streams = sys.stdin, sys.stdout, sys.stderr
+        sys.stdin, sys.stdout, sys.stderr = (_RoutedStream(name, stream) for name, stream in
+                                             zip(("stdin", "stdout", "stderr"), streams))
+        # Requests may make the loggers more verbose, the daemon's own output stays at the level it started with
+        root = logging.getLogger()
+        console = [handler for handler in root.handlers if handler.level == logging.NOTSET]
+        for console_handler in console:
+            console_handler.setLevel(logging.getLogger("mclauncher").getEffectiveLevel())
+        handler = _RoutedHandler()
+        root.addHandler(handler)
+        logger.info(f"Listening on {self.path}")
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            root.removeHandler(handler)
+            for console_handler in console:
+                console_handler.setLevel(logging.NOTSET)
+            sys.stdin, sys.stdout, sys.stderr = streams
+            keep_resident(False)
+            self.server_close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def request(args: List[str], path: Optional[str] = None, stdin: Optional[TextIO] = None,
+            stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None, ping: bool = False,
+            stop: bool = False) -> int:
+    """
+    Have the daemon run ``mclauncher <args>``, passing on its output and input, and return the exit code.
+
+    Parameters
+    -----------
+    args: List[:class:`str`]
+        The command line, without ``mclauncher``. Relative paths in it are relative to the daemon's working directory.
+    path: Optional[:class:`str`]
+        The daemon's socket. Defaults to :func:`default_socket_path`.
+    stdin, stdout, stderr: Optional[TextIO]
+        Where input comes from and output goes. Default to :data:`sys.stdin`, :data:`sys.stdout` and
+        :data:`sys.stderr`.
+    ping: :class:`bool`
+        Only check that the daemon is running.
+    stop: :class:`bool`
+        Stop the daemon instead. Requests in progress are finished first.
+
+    Raises
+    -------
+    :class:`DaemonError`
+        No daemon is listening on the socket, or it went away mid request.
+    """
+    path = path or default_socket_path()
+    stdin, stdout, stderr = stdin or sys.stdin, stdout or sys.stdout, stderr or sys.stderr
+    if ping:
+        message = {"ping": True}
+    elif stop:
+        message = {"stop": True}
+    else:
+        message = {"args": args, "tty": stdout.isatty()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(path)
+        except OSError as e:
+            raise DaemonError(f"No daemon is running at {path} ({e}), start one with \"mclauncher daemon\"")
+        file = connection.makefile("rwb")
+        _send(file, message)
+        for line in file:
+            message = json.loads(line)
+            if "stream" in message:
+                stream = stdout if message["stream"] == "stdout" else stderr
+                stream.write(message["text"])
+                stream.flush()
+            elif "input" in message:
+                _send(file, {"input": stdin.readline()})
+            elif "exit" in message:
+                return message["exit"]
+    raise DaemonError("The daemon closed the connection before the request finished")
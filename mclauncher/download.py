@@ -0,0 +1,254 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from .timings import span
+from .utils import inherit_context
+
+__all__ = ("DownloadTask", "Downloader", "DownloadError")
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadTask(NamedTuple):
+    """A file to download. ``sha1`` and ``size`` describe the file after decompression."""
+    url: str
+    path: str
+    sha1: Optional[str] = None
+    size: Optional[int] = None
+    lzma: bool = False
+    executable: bool = False
+
+
+class DownloadError(Exception):
+    """Raised when a file couldn't be downloaded, even after retrying."""
+
+
+class _Retry(Exception):
+    """A failure that is worth retrying."""
+
+
+def _empty(*args) -> None:
+    pass
+
+
+def get_sha1_hash(path: str) -> str:
+    """Calculate the sha1 checksum of a file."""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class Downloader:
+    """
+    Downloads files on a bounded pool of worker threads. Connections are pooled per host, checksums are computed
+    while the data streams in, partially written files are resumed with ``Range`` requests and transient failures
+    are retried with exponential backoff.
+
+    Parameters
+    -----------
+    workers: :class:`int`
+        How many files to download at once.
+    retries: :class:`int`
+        How often to retry a file after a transient failure.
+    timeout: :class:`float`
+        Socket timeout in seconds.
+    callback: Optional[Dict[:class:`str`, Callable]]
+        Progress callbacks, the same dict as :func:`minecraft_launcher_lib.install.install_minecraft_version` takes.
+    is_valid: Optional[Callable[[:class:`DownloadTask`], :class:`bool`]]
+        Decides whether an existing file can be kept. Defaults to comparing its sha1 checksum, if the task has one.
+    on_downloaded: Optional[Callable[[:class:`DownloadTask`], None]]
+        Called from the worker thread after a file was downloaded and verified.
+    store: Optional[:class:`~mclauncher.store.SharedStore`]
+        Shared store to take files with a known sha1 from, and to put downloaded ones into.
+    session: Optional[:class:`requests.Session`]
+        The session to download with, e.g. one kept between installs. Defaults to a new one.
+    """
+
+    chunk_size = 256 * 1024
+    backoff = 0.5
+
+    def __init__(self, workers: int = 8, retries: int = 3, timeout: float = 30,
+                 callback: Optional[Dict[str, Callable]] = None,
+                 is_valid: Optional[Callable[[DownloadTask], bool]] = None,
+                 on_downloaded: Optional[Callable[[DownloadTask], None]] = None, store=None, session=None) -> None:
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.timeout = timeout
+        self.callback = callback or {}
+        self.is_valid = is_valid or self._is_valid
+        self.on_downloaded = on_downloaded or _empty
+        self.store = store
+        self._session = session
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The :class:`requests.Session` shared by all workers. It keeps up to ``workers`` connections per host."""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                from minecraft_launcher_lib.helper import get_user_agent
+
+                self._session = requests.Session()
+                self._session.headers["User-Agent"] = get_user_agent()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.workers)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    @staticmethod
+    def _is_valid(task: DownloadTask) -> bool:
+        if not os.path.isfile(task.path):
+            return False
+        if task.size is not None and os.path.getsize(task.path) != task.size:
+            return False
+        return task.sha1 is None or get_sha1_hash(task.path) == task.sha1
+
+    def _stream(self, task: DownloadTask, part_path: str) -> None:
+        import lzma
+        import requests
+
+        offset = 0
+        sha1 = hashlib.sha1()
+        if os.path.isfile(part_path) and not task.lzma:
+            # Resume a previous attempt, the data already written still needs to be hashed
+            offset = os.path.getsize(part_path)
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha1.update(chunk)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        try:
+            with self.session.get(task.url, headers=headers, stream=True, timeout=self.timeout) as r:
+                if r.status_code == 416:
+                    # The partial file is already complete (or bogus), start over
+                    os.remove(part_path)
+                    raise _Retry("range not satisfiable")
+                if r.status_code >= 500 or r.status_code == 429:
+                    raise _Retry(f"status {r.status_code}")
+                if r.status_code not in (200, 206):
+                    raise DownloadError(f"Downloading {task.url} failed with status {r.status_code}")
+                if r.status_code == 200 and offset:
+                    logger.debug(f"{task.url} doesn't support resuming, starting over")
+                    offset = 0
+                    sha1 = hashlib.sha1()
+                decompressor = lzma.LZMADecompressor() if task.lzma else None
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(self.chunk_size):
+                        if decompressor is not None:
+                            chunk = decompressor.decompress(chunk)
+                        f.write(chunk)
+                        sha1.update(chunk)
+        except requests.exceptions.RequestException as e:
+            raise _Retry(str(e)) from e
+
+        if task.sha1 is not None and sha1.hexdigest() != task.sha1:
+            os.remove(part_path)
+            raise _Retry(f"checksum mismatch for {task.url}")
+        if task.size is not None and os.path.getsize(part_path) != task.size:
+            os.remove(part_path)
+            raise _Retry(f"size mismatch for {task.url}")
+
+    def fetch(self, task: DownloadTask) -> bool:
+        """
+        Download a single file, unless a valid copy already exists.
+
+        Returns
+        --------
+        :class:`bool`
+            Whether the file was downloaded.
+        """
+        if self.is_valid(task):
+            return False
+        use_store = self.store is not None and task.sha1 is not None
+        if use_store and self.store.link(task.sha1, task.path) is not None:
+            logger.debug(f"Linked {task.path} from the shared store")
+            if task.executable:
+                os.chmod(task.path, os.stat(task.path).st_mode | 0o111)
+            self.on_downloaded(task)
+            return False
+        os.makedirs(os.path.dirname(task.path), exist_ok=True)
+        part_path = task.path + ".part"
+        with span("fetch", url=task.url):
+            for attempt in range(self.retries + 1):
+                try:
+                    self._stream(task, part_path)
+                    break
+                except _Retry as e:
+                    if attempt == self.retries:
+                        raise DownloadError(f"Downloading {task.url} failed: {e}") from e
+                    delay = self.backoff * 2 ** attempt
+                    logger.debug(f"Retrying {task.url} in {delay}s: {e}")
+                    time.sleep(delay)
+        os.replace(part_path, task.path)
+        if task.executable:
+            os.chmod(task.path, os.stat(task.path).st_mode | 0o111)
+        if use_store:
+            self.store.add(task.path, task.sha1)
+        self.on_downloaded(task)
+        return True
+
+    def download(self, tasks: Iterable[DownloadTask]) -> int:
+        """
+        Download all ``tasks`` on the worker pool.
+
+        Returns
+        --------
+        :class:`int`
+            The number of files that were downloaded.
+
+        Raises
+        -------
+        :class:`DownloadError`
+            One or more files couldn't be downloaded. All other files are still downloaded first.
+        """
+        # Files that appear twice (e.g. shared assets) must only be written by one worker
+        tasks = list({task.path: task for task in tasks}.values())
+        self.callback.get("setMax", _empty)(len(tasks))
+        downloaded = 0
+        errors = []
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="mclauncher-download",
+                                initializer=inherit_context()) as pool:
+            futures = [pool.submit(self.fetch, task) for task in tasks]
+            for count, future in enumerate(as_completed(futures), 1):
+                try:
+                    downloaded += future.result()
+                except DownloadError as e:
+                    errors.append(e)
+                self.callback.get("setProgress", _empty)(count)
+        if errors:
+            raise DownloadError(f"{len(errors)} file(s) failed to download, first error: {errors[0]}")
+        return downloaded
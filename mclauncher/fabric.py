@@ -0,0 +1,153 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .download import Downloader, DownloadTask
+from .install import Installer, InstallError
+from .utils import get_data_directory, link_file
+
+__all__ = ("FabricInstaller", "fabric_version_id")
+
+logger = logging.getLogger(__name__)
+
+
+def fabric_version_id(game_version: str, loader_version: str) -> str:
+    """The id fabric installs ``loader_version`` for ``game_version`` under."""
+    return f"fabric-loader-{loader_version}-{game_version}"
+
+
+class FabricInstaller:
+    """
+    Installs fabric loader versions without running fabric's installer. The version JSON comes from fabric's metadata
+    (through the :class:`~mclauncher.metadata.MetadataCache`, which keeps it for good) and is written directly, and
+    the loader's libraries are downloaded into a library cache shared by every ``.minecraft`` directory and linked
+    from there. Once a loader's libraries are cached, installing it for any version in any directory needs no
+    network, so it also works offline.
+
+    Parameters
+    -----------
+    installer: :class:`~mclauncher.install.Installer`
+        The directory to install into, with the metadata cache and downloader to use.
+    library_cache: Optional[:class:`str`]
+        Where libraries are cached, laid out like a maven repository. Defaults to ``cache/libraries`` in the data
+        directory.
+    """
+
+    def __init__(self, installer: Installer, library_cache: Optional[str] = None) -> None:
+        self.installer = installer
+        self.library_cache = library_cache or os.path.join(get_data_directory(), "cache", "libraries")
+
+    def install(self, game_version: str, loader_version: str) -> str:
+        """
+        Install fabric loader ``loader_version`` for ``game_version``. The vanilla version must be installed already.
+
+        Parameters
+        -----------
+        game_version: :class:`str`
+            The Minecraft version.
+        loader_version: :class:`str`
+            The fabric loader version.
+
+        Returns
+        --------
+        :class:`str`
+            The id of the installed version.
+
+        Raises
+        -------
+        :class:`~mclauncher.metadata.OfflineError`
+            The profile isn't cached and the metadata cache is offline.
+        :class:`~mclauncher.install.InstallError`
+            A library isn't cached and the metadata cache is offline.
+        """
+        profile = self.installer.metadata.get_fabric_profile(game_version, loader_version)
+        version_id = profile.get("id") or fabric_version_id(game_version, loader_version)
+        body = json.dumps(profile, indent=2)
+        json_path = self.installer.version_json_path(version_id)
+        try:
+            with open(json_path, "r") as f:
+                unchanged = f.read() == body
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            os.makedirs(os.path.dirname(json_path), exist_ok=True)
+            tmp_path = f"{json_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(body)
+            os.replace(tmp_path, json_path)
+
+        tasks, missing = self._cache_libraries(profile)
+        for cache_task, path in tasks:
+            if not os.path.isfile(path):
+                link_file(cache_task.path, path)
+        logger.info(f"Installed {version_id} ({missing} of {len(tasks)} libraries downloaded)")
+        return version_id
+
+    def install_server(self, game_version: str, loader_version: str) -> Tuple[str, List[str]]:
+        """
+        Download the libraries of fabric loader ``loader_version``'s server for ``game_version`` into the library
+        cache, where the server uses them from.
+
+        Returns
+        --------
+        Tuple[:class:`str`, List[:class:`str`]]
+            The main class and the classpath, without the server jar.
+
+        Raises
+        -------
+        :class:`~mclauncher.metadata.OfflineError`
+            The profile isn't cached and the metadata cache is offline.
+        :class:`~mclauncher.install.InstallError`
+            A library isn't cached and the metadata cache is offline.
+        """
+        profile = self.installer.metadata.get_fabric_profile(game_version, loader_version, server=True)
+        tasks, missing = self._cache_libraries(profile)
+        logger.info(f"Installed the fabric {loader_version} server for {game_version} ({missing} of {len(tasks)} "
+                    f"libraries downloaded)")
+        return profile["mainClass"], [cache_task.path for cache_task, _ in tasks]
+
+    def _cache_libraries(self, profile: Dict[str, Any]) -> Tuple[List[Tuple[DownloadTask, str]], int]:
+        # Pairs of the task downloading a library into the cache and where the library goes in .minecraft
+        libraries = os.path.join(self.installer.path, "libraries")
+        tasks = []
+        for task in self.installer.library_tasks(profile):
+            cache_path = os.path.join(self.library_cache, os.path.relpath(task.path, libraries))
+            tasks.append((task._replace(path=cache_path), task.path))
+        missing = [cache_task for cache_task, _ in tasks if not os.path.isfile(cache_task.path)]
+        if missing:
+            if self.installer.metadata.offline:
+                raise InstallError(f"{len(missing)} fabric libraries aren't cached, they can't be downloaded in "
+                                   f"offline mode")
+            # The installer's connections and shared store, without its hooks, which would put the cache in the file
+            # index of .minecraft
+            downloader = self.installer.downloader
+            Downloader(downloader.workers, retries=downloader.retries, timeout=downloader.timeout,
+                       callback=downloader.callback, store=downloader.store,
+                       session=downloader.session).download(missing)
+        return tasks, len(missing)
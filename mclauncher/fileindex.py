@@ -0,0 +1,132 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .download import DownloadTask, get_sha1_hash
+
+__all__ = ("FileIndex",)
+
+logger = logging.getLogger(__name__)
+
+
+class FileIndex:
+    """
+    Persistent record of the size, mtime and sha1 of every file installed into a ``.minecraft`` directory, and of
+    which files belong to which version. Files whose size and mtime still match their record are trusted without
+    hashing them again.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory the index belongs to.
+    full: :class:`bool`
+        Ignore the recorded metadata and hash every file, for a deep check.
+    """
+
+    filename = "mclauncher_index.json"
+
+    def __init__(self, minecraft_directory: str, full: bool = False) -> None:
+        self.minecraft_directory = str(minecraft_directory)
+        self.path = os.path.join(self.minecraft_directory, self.filename)
+        self.full = full
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except ValueError:
+            logger.warning(f"Ignoring corrupt file index at {self.path}")
+            data = {}
+        # relative path -> [size, mtime_ns, sha1]
+        self.files: Dict[str, list] = data.get("files", {})
+        # version id -> relative paths
+        self.versions: Dict[str, List[str]] = data.get("versions", {})
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(path, self.minecraft_directory).replace(os.sep, "/")
+
+    def record(self, path: str, sha1: Optional[str] = None) -> None:
+        """Record the current metadata of ``path``, which is known to have the checksum ``sha1``."""
+        st = os.stat(path)
+        with self._lock:
+            self.files[self._relpath(path)] = [st.st_size, st.st_mtime_ns, sha1]
+            self._dirty = True
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            if self.files.pop(self._relpath(path), None) is not None:
+                self._dirty = True
+
+    def is_valid(self, task: DownloadTask) -> bool:
+        """
+        Whether the file of ``task`` exists and is intact. Only files without a matching record are hashed. Can be
+        passed to :class:`~mclauncher.download.Downloader` as ``is_valid``.
+        """
+        try:
+            st = os.stat(task.path)
+        except FileNotFoundError:
+            return False
+        rel_path = self._relpath(task.path)
+        entry = self.files.get(rel_path)
+        if (not self.full and entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns
+                and (task.sha1 is None or entry[2] == task.sha1)):
+            return True
+        if task.size is not None and st.st_size != task.size:
+            return False
+        if task.sha1 is None:
+            self.record(task.path, entry[2] if entry is not None and not self.full else None)
+            return True
+        logger.debug(f"Hashing {rel_path}")
+        if get_sha1_hash(task.path) != task.sha1:
+            return False
+        self.record(task.path, task.sha1)
+        return True
+
+    def on_downloaded(self, task: DownloadTask) -> None:
+        """Record a file the downloader just wrote. Can be passed to the downloader as ``on_downloaded``."""
+        self.record(task.path, task.sha1)
+
+    def set_version(self, version: str, paths: Iterable[str]) -> None:
+        """Remember which files belong to ``version``."""
+        with self._lock:
+            self.versions[version] = sorted({self._relpath(path) for path in paths})
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the index to disk, if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"files": self.files, "versions": self.versions}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
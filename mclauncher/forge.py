@@ -0,0 +1,393 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .download import DownloadTask, get_sha1_hash
+from .install import Installer, InstallError, maven_path
+from .timings import span
+from .utils import get_data_directory, inherit_context, link_file
+
+__all__ = ("ForgeInstaller", "forge_version_id", "FORGE_MAVEN_URL")
+
+logger = logging.getLogger(__name__)
+
+FORGE_MAVEN_URL = "https://maven.minecraftforge.net/net/minecraftforge/forge"
+
+
+def _empty(*args) -> None:
+    pass
+
+
+def forge_version_id(forge_version: str) -> str:
+    """The id forge installs ``forge_version`` (e.g. ``1.20.1-47.1.0``) under, e.g. ``1.20.1-forge-47.1.0``."""
+    vanilla_version, _, build = forge_version.partition("-")
+    return f"{vanilla_version}-forge-{build}"
+
+
+class _Processor:
+    """A processor of an install profile with its arguments resolved."""
+
+    def __init__(self, index: int, jar: str, command: List[str], inputs: List[str], outputs: Dict[str, Optional[str]],
+                 template: List[str]) -> None:
+        self.index = index
+        self.jar = jar
+        self.command = command
+        self.inputs = inputs
+        # Output path -> expected sha1, if the install profile gives one
+        self.outputs = outputs
+        self.template = template
+        self.depends_on: Set[int] = set()
+
+
+class ForgeInstaller:
+    """
+    Installs forge versions (1.13 and newer) like the forge installer does, with a cache shared by every ``.minecraft``
+    directory. The installer jar is downloaded once per forge version, and the outputs of each processor are stored
+    under a key made of the forge version, the processor and the hashes of its inputs, so processing the same forge
+    version again, in any directory, only copies the outputs into place. Processors that don't depend on each other's
+    outputs run at the same time.
+
+    Parameters
+    -----------
+    installer: :class:`~mclauncher.install.Installer`
+        Installs the vanilla version and the libraries, into its directory.
+    java: Optional[:class:`str`]
+        The java to run the processors with. Defaults to ``java``.
+    cache_directory: Optional[:class:`str`]
+        Where installers and processor outputs are kept. Defaults to ``cache/forge`` in the data directory.
+    maven_url: :class:`str`
+        The maven repository forge installers are downloaded from.
+    workers: Optional[:class:`int`]
+        How many processors to run at once. Defaults to the number of CPUs, at most 4.
+    callback: Optional[Dict[:class:`str`, Callable]]
+        Progress callbacks, like :func:`minecraft_launcher_lib.forge.install_forge_version` takes.
+    """
+
+    def __init__(self, installer: Installer, java: Optional[str] = None, cache_directory: Optional[str] = None,
+                 maven_url: str = FORGE_MAVEN_URL, workers: Optional[int] = None,
+                 callback: Optional[Dict[str, Callable]] = None) -> None:
+        self.installer = installer
+        self.path = installer.path
+        self.java = java or "java"
+        self.cache_directory = cache_directory or os.path.join(get_data_directory(), "cache", "forge")
+        self.maven_url = maven_url.rstrip("/")
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.callback = callback or {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def installer_jar(self, forge_version: str) -> str:
+        """The path of the installer of ``forge_version`` in the cache, downloading it if it isn't there yet."""
+        path = os.path.join(self.cache_directory, "installers", f"forge-{forge_version}-installer.jar")
+        if os.path.isfile(path):
+            if zipfile.is_zipfile(path):
+                return path
+            logger.warning(f"Cached forge installer {path} is damaged, downloading it again")
+            os.remove(path)
+        self.callback.get("setStatus", _empty)(f"Downloading forge {forge_version} installer")
+        url = f"{self.maven_url}/{forge_version}/forge-{forge_version}-installer.jar"
+        self.installer.downloader.fetch(DownloadTask(url, path))
+        if not zipfile.is_zipfile(path):
+            os.remove(path)
+            raise InstallError(f"The forge {forge_version} installer from {url} is not a jar")
+        return path
+
+    def _sha1(self, path: str) -> str:
+        st = os.stat(path)
+        key = f"{path}:{st.st_size}:{st.st_mtime_ns}"
+        with self._lock:
+            sha1 = self._hashes.get(key)
+        if sha1 is None:
+            sha1 = get_sha1_hash(path)
+            with self._lock:
+                self._hashes[key] = sha1
+        return sha1
+
+    def _library(self, name: str) -> str:
+        return os.path.join(self.path, "libraries", *maven_path(name).split("/"))
+
+    def _outputs_path(self, version_id: str) -> str:
+        return os.path.join(self.cache_directory, "outputs", version_id + ".json")
+
+    def _load_outputs(self, version_id: str) -> Dict[str, List[str]]:
+        try:
+            with open(self._outputs_path(version_id), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_outputs(self, version_id: str, processors: List[_Processor]) -> None:
+        outputs = {}
+        for processor in processors:
+            paths = [os.path.relpath(path, self.path) for path in processor.outputs]
+            if paths and not any(path.startswith(os.pardir) for path in paths):
+                outputs[str(processor.index)] = paths
+        path = self._outputs_path(version_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(outputs, f)
+        os.replace(tmp_path, path)
+
+    def processors(self, profile: Dict[str, Any], installer_jar: str, root: str) -> List[_Processor]:
+        """
+        Resolve the client side processors of an install profile and work out which depend on which. Files the
+        install profile refers to inside the installer are extracted to ``root``.
+        """
+        from minecraft_launcher_lib.helper import get_jar_mainclass
+
+        # Most processors don't declare their outputs; they are worked out on the first install and remembered
+        known_outputs = self._load_outputs(profile["version"])
+
+        minecraft = profile["minecraft"]
+        variables = {
+            "{SIDE}": "client",
+            "{ROOT}": root,
+            "{INSTALLER}": installer_jar,
+            "{LIBRARY_DIR}": os.path.join(self.path, "libraries"),
+            "{MINECRAFT_VERSION}": minecraft,
+            "{MINECRAFT_JAR}": os.path.join(self.path, "versions", minecraft, minecraft + ".jar"),
+        }
+        with zipfile.ZipFile(installer_jar) as zf:
+            for key, value in profile.get("data", {}).items():
+                value = value.get("client", "")
+                if value.startswith("[") and value.endswith("]"):
+                    value = self._library(value[1:-1])
+                elif value.startswith("'") and value.endswith("'"):
+                    value = value[1:-1]
+                elif value.startswith("/"):
+                    # A file inside the installer, like the binary patches
+                    target = os.path.join(root, *value.lstrip("/").split("/"))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with zf.open(value.lstrip("/")) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    value = target
+                variables["{" + key + "}"] = value
+
+        def resolve(argument: str) -> str:
+            if argument.startswith("[") and argument.endswith("]"):
+                return self._library(argument[1:-1])
+            for key, value in variables.items():
+                argument = argument.replace(key, value)
+            if argument.startswith("'") and argument.endswith("'"):
+                argument = argument[1:-1]
+            return argument
+
+        separator = ";" if platform.system() == "Windows" else ":"
+        produced: Dict[str, int] = {}
+        processors = []
+        for index, data in enumerate(profile.get("processors", [])):
+            if "client" not in data.get("sides", ["client"]):
+                continue
+            jar = self._library(data["jar"])
+            classpath = [self._library(name) for name in data.get("classpath", [])] + [jar]
+            arguments = [resolve(argument) for argument in data.get("args", [])]
+            outputs = {resolve(key): resolve(value) for key, value in data.get("outputs", {}).items()}
+            if not outputs and str(index) in known_outputs:
+                outputs = {os.path.join(self.path, path): None for path in known_outputs[str(index)]}
+            if not outputs:
+                # Library files that don't exist yet and no earlier processor makes are what this one makes
+                outputs = {argument: None for argument in arguments
+                           if argument.startswith(variables["{LIBRARY_DIR}"]) and argument not in produced
+                           and not os.path.exists(argument)}
+            inputs = [path for path in classpath + arguments
+                      if path not in outputs and (path in produced or os.path.isfile(path))]
+            command = [self.java, "-cp", separator.join(classpath), get_jar_mainclass(jar)] + arguments
+            # The same for every directory, so the cache is shared by all of them
+            template = [part.replace(root, "{ROOT}").replace(self.path, "{MINECRAFT_DIRECTORY}")
+                        for part in command[1:]]
+            processor = _Processor(index, data["jar"], command, inputs, outputs, template)
+            processor.depends_on = {produced[path] for path in inputs if path in produced}
+            if not outputs:
+                # Nothing to tell what it changes, so it runs on its own, in order
+                processor.depends_on.update(p.index for p in processors)
+            for path in outputs:
+                produced[path] = index
+            processors.append(processor)
+        # Processors without outputs must also finish before anything after them starts
+        barriers = set()
+        for processor in processors:
+            processor.depends_on.update(barriers)
+            if not processor.outputs:
+                barriers.add(processor.index)
+        return processors
+
+    def _cache_key(self, forge_version: str, processor: _Processor) -> str:
+        key = hashlib.sha1()
+        key.update(json.dumps([forge_version] + processor.template).encode())
+        for path in processor.inputs:
+            key.update(self._sha1(path).encode())
+        return key.hexdigest()
+
+    def _is_done(self, processor: _Processor) -> bool:
+        # The forge installer's own check: every output is there with the expected hash
+        return bool(processor.outputs) and all(
+            sha1 is not None and os.path.isfile(path) and self._sha1(path) == sha1
+            for path, sha1 in processor.outputs.items())
+
+    def _restore(self, entry: str, processor: _Processor) -> bool:
+        try:
+            with open(os.path.join(entry, "outputs.json"), "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if sorted(stored) != sorted(os.path.relpath(path, self.path) for path in processor.outputs):
+            return False
+        for relative_path, name in stored.items():
+            link_file(os.path.join(entry, name), os.path.join(self.path, relative_path))
+        return True
+
+    def _store(self, entry: str, processor: _Processor) -> None:
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_entry, exist_ok=True)
+        stored = {}
+        for i, path in enumerate(sorted(processor.outputs)):
+            name = str(i)
+            shutil.copyfile(path, os.path.join(tmp_entry, name))
+            stored[os.path.relpath(path, self.path)] = name
+        with open(os.path.join(tmp_entry, "outputs.json"), "w") as f:
+            json.dump(stored, f)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # Another launch stored the same outputs first
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    def run_processor(self, forge_version: str, processor: _Processor) -> str:
+        """Run one processor, or take its outputs from the cache. Returns what was done."""
+        if self._is_done(processor):
+            return "skipped"
+        # Outputs outside the directory (e.g. in the temporary root) aren't worth keeping
+        cacheable = bool(processor.outputs) and all(
+            not os.path.relpath(path, self.path).startswith(os.pardir) for path in processor.outputs)
+        entry = None
+        if cacheable:
+            entry = os.path.join(self.cache_directory, "processors", self._cache_key(forge_version, processor))
+            if self._restore(entry, processor):
+                logger.debug(f"Restored the outputs of {processor.jar} from {entry}")
+                return "cached"
+        logger.info(f"Running forge processor {processor.jar}")
+        with span("forge_processor", jar=processor.jar):
+            result = subprocess.run(processor.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            output = result.stdout.decode("utf-8", "replace").strip().splitlines()[-10:]
+            raise InstallError(f"Forge processor {processor.jar} failed with exit code {result.returncode}:\n"
+                               + "\n".join(output))
+        for path, sha1 in processor.outputs.items():
+            if not os.path.isfile(path):
+                raise InstallError(f"Forge processor {processor.jar} didn't create {path}")
+            if sha1 is not None and self._sha1(path) != sha1:
+                raise InstallError(f"Forge processor {processor.jar} created {path} with the wrong checksum")
+        if entry is not None:
+            self._store(entry, processor)
+        return "ran"
+
+    def run_processors(self, forge_version: str, processors: List[_Processor]) -> Dict[str, int]:
+        """Run ``processors``, each one as soon as the ones it depends on are done. Returns how many were run,
+        taken from the cache and skipped."""
+        counts = {"ran": 0, "cached": 0, "skipped": 0}
+        self.callback.get("setStatus", _empty)(f"Running forge {forge_version} processors")
+        self.callback.get("setMax", _empty)(len(processors))
+        done: Set[int] = set()
+        pending = list(processors)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="mclauncher-forge",
+                                initializer=inherit_context()) as pool:
+            running = {}
+            while pending or running:
+                for processor in [p for p in pending if p.depends_on <= done]:
+                    pending.remove(processor)
+                    running[pool.submit(self.run_processor, forge_version, processor)] = processor
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    processor = running.pop(future)
+                    try:
+                        counts[future.result()] += 1
+                    except BaseException:
+                        # Let the running processors finish, but don't start more
+                        pending = []
+                        wait(running)
+                        raise
+                    done.add(processor.index)
+                    self.callback.get("setProgress", _empty)(len(done))
+        return counts
+
+    def install(self, forge_version: str) -> str:
+        """
+        Install ``forge_version`` (e.g. ``1.20.1-47.1.0``) and the vanilla version it's for.
+
+        Parameters
+        -----------
+        forge_version: :class:`str`
+            The forge version, as forge's maven lists it.
+
+        Returns
+        --------
+        :class:`str`
+            The id of the installed version.
+        """
+        installer_jar = self.installer_jar(forge_version)
+        with zipfile.ZipFile(installer_jar) as zf:
+            profile = json.loads(zf.read("install_profile.json"))
+            if "processors" not in profile:
+                raise InstallError(f"Forge {forge_version} has an old installer, it can't be installed automatically")
+            version_id = profile["version"]
+            # Forge's own jars come with the installer
+            libraries = os.path.join(self.path, "libraries")
+            for name in zf.namelist():
+                if name.startswith("maven/") and not name.endswith("/"):
+                    target = os.path.join(libraries, *name[len("maven/"):].split("/"))
+                    if not os.path.isfile(target) or os.path.getsize(target) != zf.getinfo(name).file_size:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        with zf.open(name) as src, open(target, "wb") as dst:
+                            shutil.copyfileobj(src, dst)
+            version_json = self.installer.version_json_path(version_id)
+            os.makedirs(os.path.dirname(version_json), exist_ok=True)
+            with open(version_json, "wb") as f:
+                f.write(zf.read("version.json"))
+        self.callback.get("setStatus", _empty)(f"Installing forge {forge_version}")
+        # The version and its parent, then what the processors need
+        self.installer.install(version_id)
+        self.installer.downloader.download(self.installer.library_tasks(profile))
+        root = tempfile.mkdtemp(prefix="mclauncher-forge-")
+        try:
+            processors = self.processors(profile, installer_jar, root)
+            counts = self.run_processors(forge_version, processors)
+            self._save_outputs(version_id, processors)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        logger.info(f"Installed forge {forge_version}: ran {counts['ran']} processors, took {counts['cached']} from "
+                    f"the cache and skipped {counts['skipped']}")
+        return version_id
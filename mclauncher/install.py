@@ -0,0 +1,258 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import zipfile
+from typing import Any, Dict, List, Optional
+
+from .download import Downloader, DownloadTask
+from .fileindex import FileIndex
+from .metadata import MetadataCache
+from .timings import span
+
+__all__ = ("Installer", "InstallError", "RESOURCES_URL", "LIBRARIES_URL")
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_URL = "https://resources.download.minecraft.net"
+LIBRARIES_URL = "https://libraries.minecraft.net"
+
+
+class InstallError(Exception):
+    """Raised when a version can't be installed."""
+
+
+def maven_path(name: str, classifier: Optional[str] = None) -> str:
+    """Turn a maven coordinate (``group:artifact:version[:classifier][@ext]``) into a relative, ``/`` separated path."""
+    parts = name.split(":")
+    group, artifact, version = parts[0:3]
+    try:
+        version, extension = version.split("@")
+    except ValueError:
+        extension = "jar"
+    suffix = "".join("-" + p for p in parts[3:] + ([classifier] if classifier else []))
+    return "/".join(group.split(".") + [artifact, version, f"{artifact}-{version}{suffix}.{extension}"])
+
+
+def extract_natives(jar_path: str, extract_path: str, extract_data: Dict[str, Any]) -> None:
+    """Unpack a natives jar, leaving out the excluded paths."""
+    exclude = tuple(extract_data.get("exclude", ()))
+    with zipfile.ZipFile(jar_path) as zf:
+        for name in zf.namelist():
+            if exclude and name.startswith(exclude):
+                continue
+            zf.extract(name, extract_path)
+
+
+class Installer:
+    """
+    Installs Minecraft versions from their version JSON and asset index. Everything a version needs (libraries,
+    natives, assets, logging config and the client jar) is collected up front and downloaded in parallel.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory to install into.
+    metadata: :class:`~mclauncher.metadata.MetadataCache`
+        Used to find the version JSON of versions that aren't installed yet.
+    downloader: Optional[:class:`~mclauncher.download.Downloader`]
+        Does the downloading. Defaults to one with 8 workers.
+    resources_url: :class:`str`
+        Where asset objects are downloaded from.
+    libraries_url: :class:`str`
+        The maven repository for libraries that don't specify one.
+    index: Optional[:class:`~mclauncher.fileindex.FileIndex`]
+        Used to check installed files without hashing them. The downloader is hooked up to it.
+    """
+
+    def __init__(self, minecraft_directory: str, metadata: MetadataCache, downloader: Optional[Downloader] = None,
+                 resources_url: str = RESOURCES_URL, libraries_url: str = LIBRARIES_URL,
+                 index: Optional[FileIndex] = None) -> None:
+        self.path = str(minecraft_directory)
+        self.metadata = metadata
+        self.downloader = downloader or Downloader()
+        self.index = index
+        if index is not None:
+            self.downloader.is_valid = index.is_valid
+            self.downloader.on_downloaded = index.on_downloaded
+        self.resources_url = resources_url.rstrip("/")
+        self.libraries_url = libraries_url.rstrip("/")
+
+    def version_json_path(self, version: str) -> str:
+        return os.path.join(self.path, "versions", version, version + ".json")
+
+    def load_version(self, version: str) -> Dict[str, Any]:
+        """Read the version JSON of ``version``, downloading it first if needed, and resolve its inheritance."""
+        from minecraft_launcher_lib.helper import inherit_json
+
+        json_path = self.version_json_path(version)
+        if not os.path.isfile(json_path):
+            url = self.metadata.get_version_url(version)
+            if url is None:
+                raise InstallError(f"Version {version} was not found")
+            self.downloader.fetch(DownloadTask(url, json_path))
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        if "inheritsFrom" in data:
+            self.load_version(data["inheritsFrom"])
+            data = inherit_json(data, self.path)
+        return data
+
+    def library_tasks(self, data: Dict[str, Any]) -> List[DownloadTask]:
+        from minecraft_launcher_lib.helper import parse_rule_list
+        from minecraft_launcher_lib.natives import get_natives
+
+        tasks = []
+        libraries = os.path.join(self.path, "libraries")
+        for i in data["libraries"]:
+            # Check, if the rules allow this lib for the current system
+            if not parse_rule_list(i, "rules", {}):
+                continue
+            native = get_natives(i)
+            downloads = i.get("downloads")
+            if downloads is None:
+                # Plain maven coordinates, used by e.g. fabric and old forge versions
+                base_url = i.get("url", self.libraries_url).rstrip("/")
+                rel_path = maven_path(i["name"], native or None)
+                tasks.append(DownloadTask(base_url + "/" + rel_path, os.path.join(libraries, *rel_path.split("/")),
+                                          sha1=i.get("sha1"), size=i.get("size")))
+                continue
+            if "artifact" in downloads:
+                artifact = downloads["artifact"]
+                if artifact.get("url"):
+                    tasks.append(DownloadTask(artifact["url"], os.path.join(libraries, *artifact["path"].split("/")),
+                                              sha1=artifact.get("sha1"), size=artifact.get("size")))
+            if native:
+                classifier = downloads["classifiers"][native]
+                tasks.append(DownloadTask(classifier["url"], os.path.join(libraries, *classifier["path"].split("/")),
+                                          sha1=classifier.get("sha1"), size=classifier.get("size")))
+        return tasks
+
+    def asset_tasks(self, data: Dict[str, Any]) -> List[DownloadTask]:
+        # Old versions don't have an asset index
+        if "assetIndex" not in data:
+            return []
+        index = data["assetIndex"]
+        index_path = os.path.join(self.path, "assets", "indexes", data["assets"] + ".json")
+        self.downloader.fetch(DownloadTask(index["url"], index_path, sha1=index.get("sha1"), size=index.get("size")))
+        with open(index_path, "r") as f:
+            objects = json.load(f)["objects"]
+        # The assets are stored by hash, e.g. c4dbabc820f04ba685694c63359429b22e3a62b5 is downloaded from
+        # <resources>/c4/c4dbabc820f04ba685694c63359429b22e3a62b5 and saved at assets/objects/c4/c4dbab...
+        return [DownloadTask(f"{self.resources_url}/{value['hash'][:2]}/{value['hash']}",
+                             os.path.join(self.path, "assets", "objects", value["hash"][:2], value["hash"]),
+                             sha1=value["hash"], size=value.get("size"))
+                for value in objects.values()]
+
+    def version_tasks(self, data: Dict[str, Any]) -> List[DownloadTask]:
+        """Every file the resolved version ``data`` needs, except the version JSONs and asset index."""
+        tasks = self.library_tasks(data) + self.asset_tasks(data)
+        logging_config = data.get("logging", {}).get("client")
+        if logging_config:
+            file = logging_config["file"]
+            tasks.append(DownloadTask(file["url"], os.path.join(self.path, "assets", "log_configs", file["id"]),
+                                      sha1=file.get("sha1"), size=file.get("size")))
+        if "downloads" in data and "client" in data["downloads"]:
+            client = data["downloads"]["client"]
+            tasks.append(DownloadTask(client["url"],
+                                      os.path.join(self.path, "versions", data["id"], data["id"] + ".jar"),
+                                      sha1=client.get("sha1"), size=client.get("size")))
+        return tasks
+
+    def install_natives(self, data: Dict[str, Any]) -> None:
+        from minecraft_launcher_lib.helper import parse_rule_list
+        from minecraft_launcher_lib.natives import get_natives
+
+        natives_path = os.path.join(self.path, "versions", data["id"], "natives")
+        for i in data["libraries"]:
+            if "extract" not in i or not parse_rule_list(i, "rules", {}):
+                continue
+            native = get_natives(i)
+            if not native:
+                continue
+            if "downloads" in i:
+                rel_path = i["downloads"]["classifiers"][native]["path"]
+            else:
+                rel_path = maven_path(i["name"], native)
+            extract_natives(os.path.join(self.path, "libraries", *rel_path.split("/")), natives_path, i["extract"])
+
+    def install_runtime(self, data: Dict[str, Any]) -> None:
+        from .runtime import RuntimeManager
+
+        if "javaVersion" not in data:
+            return
+        component = data["javaVersion"]["component"]
+        manager = RuntimeManager(self.path, self.metadata, self.downloader)
+        if manager.component_java(component) is None:
+            manager.install(component)
+
+    def install(self, version: str) -> Dict[str, Any]:
+        """
+        Install ``version`` and everything it inherits from.
+
+        Parameters
+        -----------
+        version: :class:`str`
+            The version id.
+
+        Returns
+        --------
+        :class:`dict`
+            The resolved version JSON.
+        """
+        with span("load_version", version=version):
+            data = self.load_version(version)
+        with span("plan_files"):
+            tasks = self.version_tasks(data)
+            # Versions inheriting from another one need the files of that version too
+            parent = data.get("inheritsFrom")
+            while parent is not None:
+                with open(self.version_json_path(parent), "r") as f:
+                    parent_data = json.load(f)
+                if "downloads" in parent_data and "client" in parent_data["downloads"]:
+                    client = parent_data["downloads"]["client"]
+                    tasks.append(DownloadTask(client["url"],
+                                              os.path.join(self.path, "versions", parent, parent + ".jar"),
+                                              sha1=client.get("sha1"), size=client.get("size")))
+                parent = parent_data.get("inheritsFrom")
+        logger.info(f"Checking {len(tasks)} files for {version}")
+        try:
+            with span("download", files=len(tasks)):
+                downloaded = self.downloader.download(tasks)
+        finally:
+            if self.index is not None:
+                with span("save_index"):
+                    self.index.set_version(version, [task.path for task in tasks])
+                    self.index.save()
+        logger.info(f"Downloaded {downloaded} files for {version}")
+        # Natives only need to be extracted again when a natives jar changed
+        if downloaded or self.index is None or not os.path.isdir(
+                os.path.join(self.path, "versions", data["id"], "natives")):
+            with span("natives"):
+                self.install_natives(data)
+        with span("runtime"):
+            self.install_runtime(data)
+        return data
@@ -0,0 +1,329 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .utils import get_data_directory
+
+__all__ = ("JvmProfile", "PROFILES", "load_profiles", "available_memory", "heap_size", "java_version",
+           "validate_flags", "jvm_arguments", "parse_profile_selection", "select_profile")
+
+logger = logging.getLogger(__name__)
+
+_MIB = 1024 * 1024
+
+
+class JvmProfile(NamedTuple):
+    """
+    A named set of JVM flags plus how to size the heap.
+
+    Attributes
+    -----------
+    name: :class:`str`
+        The profile name.
+    description: :class:`str`
+        What it is for.
+    flags: Tuple[:class:`str`, ...]
+        The flags, without heap sizes.
+    min_heap: :class:`int`
+        The smallest heap to give an instance, in MiB.
+    max_heap: :class:`int`
+        The largest heap to give an instance, in MiB.
+    memory_share: :class:`float`
+        How much of the available memory all instances together may use, heap and everything else.
+    fixed_heap: :class:`bool`
+        Start with the full heap (``-Xms`` equal to ``-Xmx``) instead of growing it.
+    modern_flags: Tuple[:class:`str`, ...]
+        Used instead of :attr:`flags` on Java 21 and newer, if given.
+    """
+    name: str
+    description: str
+    flags: Tuple[str, ...]
+    min_heap: int = 1024
+    max_heap: int = 8192
+    memory_share: float = 0.75
+    fixed_heap: bool = False
+    modern_flags: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "JvmProfile":
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown fields in JVM profile {name}: {', '.join(sorted(unknown))}")
+        return cls(**{"description": "", **data, "name": name, "flags": tuple(data.get("flags", ())),
+                      "modern_flags": tuple(data.get("modern_flags", ()))})
+
+
+PROFILES: Dict[str, JvmProfile] = {profile.name: profile for profile in (
+    JvmProfile(
+        "low-latency", "Short GC pauses for smooth frame times: tuned G1, or generational ZGC on Java 21+.",
+        ("-XX:+UseG1GC", "-XX:MaxGCPauseMillis=50", "-XX:+ParallelRefProcEnabled", "-XX:+UnlockExperimentalVMOptions",
+         "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+         "-XX:G1ReservePercent=20", "-XX:InitiatingHeapOccupancyPercent=15", "-XX:+DisableExplicitGC",
+         "-XX:+AlwaysPreTouch"),
+        min_heap=2048, max_heap=8192, fixed_heap=True,
+        modern_flags=("-XX:+UseZGC", "-XX:+ZGenerational", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch")),
+    JvmProfile(
+        "throughput", "Most work per CPU second, for servers and heavy modpacks where pauses matter less.",
+        ("-XX:+UseParallelGC", "-XX:+DisableExplicitGC"),
+        min_heap=2048, max_heap=16384),
+    JvmProfile(
+        "many-instances", "Small, lean JVMs for running many clients or bots on one machine.",
+        ("-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1", "-XX:ReservedCodeCacheSize=64m", "-Xss512k",
+         "-XX:+DisableExplicitGC"),
+        min_heap=512, max_heap=2048, memory_share=0.85),
+    JvmProfile(
+        "custom", "Only size the heap. Define your own profiles in jvm_profiles.json in the data directory.",
+        ()),
+)}
+
+# Flags that only exist in some Java versions: name -> (first, last) major version, None meaning no limit
+_FLAG_VERSIONS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "UseZGC": (15, None),
+    "ZGenerational": (21, 22),
+    "UseShenandoahGC": (12, None),
+    "UseEpsilonGC": (11, None),
+    "UseContainerSupport": (10, None),
+    "UseCGroupMemoryLimitForHeap": (None, 10),
+    "UseConcMarkSweepGC": (None, 13),
+    "CMSInitiatingOccupancyFraction": (None, 13),
+    "AggressiveOpts": (None, 11),
+    "PermSize": (None, 7),
+    "MaxPermSize": (None, 7),
+    "UseStringDeduplication": (8, None),
+}
+_EXPERIMENTAL_FLAGS = {"G1NewSizePercent", "G1MaxNewSizePercent", "G1MixedGCLiveThresholdPercent", "UseEpsilonGC"}
+_GARBAGE_COLLECTORS = {"UseG1GC", "UseParallelGC", "UseSerialGC", "UseZGC", "UseShenandoahGC", "UseConcMarkSweepGC",
+                       "UseEpsilonGC"}
+_SIZE = re.compile(r"(\d+)([kKmMgG]?)")
+
+
+def _flag_name(flag: str) -> Optional[str]:
+    if not flag.startswith("-XX:"):
+        return None
+    name = flag[4:]
+    if name[:1] in "+-":
+        name = name[1:]
+    return name.split("=", 1)[0]
+
+
+def _parse_size(value: str) -> Optional[int]:
+    """A JVM size like ``512m`` in MiB."""
+    match = _SIZE.fullmatch(value)
+    if not match:
+        return None
+    number, unit = int(match.group(1)), match.group(2).lower()
+    return {"": number // _MIB, "k": number // 1024, "m": number, "g": number * 1024}[unit]
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, JvmProfile]:
+    """
+    The built-in profiles plus the ones defined in ``path``, ``jvm_profiles.json`` in the data directory by default:
+    an object mapping names to the fields of :class:`JvmProfile`. User profiles override built-in ones.
+    """
+    profiles = dict(PROFILES)
+    path = path or os.path.join(get_data_directory(), "jvm_profiles.json")
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return profiles
+    except ValueError as e:
+        raise ValueError(f"Invalid JVM profiles in {path}: {e}") from None
+    for name, profile in data.items():
+        profiles[name] = JvmProfile.from_dict(name, profile)
+    return profiles
+
+
+def available_memory() -> Optional[int]:
+    """Memory available for new processes in bytes: MemAvailable on Linux, half the physical memory elsewhere."""
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def heap_size(profile: JvmProfile, instances: int = 1, available: Optional[int] = None) -> int:
+    """
+    The heap for one of ``instances`` instances, in MiB. Each gets an equal part of the profile's share of
+    ``available`` memory (detected if not given), less about a quarter for the JVM's memory outside the heap, rounded
+    down to 256 MiB and kept within the profile's limits.
+    """
+    if available is None:
+        available = available_memory()
+    if available is None:
+        return profile.min_heap
+    per_instance = available / _MIB * profile.memory_share / max(instances, 1)
+    heap = int(per_instance / 1.3) // 256 * 256
+    if heap < profile.min_heap:
+        logger.warning(f"Only {per_instance:.0f} MiB of memory per instance, less than the {profile.min_heap} MiB "
+                       f"heap the {profile.name} profile needs")
+    return min(max(heap, profile.min_heap), profile.max_heap)
+
+
+def java_version(java: str, cache_path: Optional[str] = None) -> Optional[int]:
+    """
+    The major version of a java executable (8 for 1.8.0, 17 for 17.0.8), or ``None`` if it can't be run. Results
+    are cached, see :func:`mclauncher.runtime.probe_java`.
+    """
+    from .runtime import probe_java
+
+    runtime = probe_java(java, cache_path)
+    return runtime.major if runtime else None
+
+
+def validate_flags(flags: Iterable[str], java: Optional[int], memory: Optional[int] = None
+                   ) -> Tuple[List[str], List[str]]:
+    """
+    Check JVM flags against a java major version. Flags that version doesn't have, a second garbage collector and
+    heap sizes that can't work are left out; experimental flags get ``-XX:+UnlockExperimentalVMOptions`` in front if
+    they don't have it.
+
+    Parameters
+    -----------
+    flags: Iterable[:class:`str`]
+        The flags.
+    java: Optional[:class:`int`]
+        The java major version. If unknown, only flags every version has are kept.
+    memory: Optional[:class:`int`]
+        Total memory in bytes, to check the heap size against.
+
+    Returns
+    --------
+    Tuple[List[:class:`str`], List[:class:`str`]]
+        The usable flags, and what was wrong with the others.
+    """
+    kept: List[str] = []
+    problems: List[str] = []
+    unlocked = False
+    collector = None
+    heap = {}
+    for flag in flags:
+        name = _flag_name(flag)
+        if name == "UnlockExperimentalVMOptions":
+            if unlocked:
+                continue
+            unlocked = True
+        elif name is not None:
+            first, last = _FLAG_VERSIONS.get(name, (None, None))
+            if (first is not None or last is not None) and java is None:
+                problems.append(f"{flag} depends on the java version, which is unknown")
+                continue
+            if first is not None and java < first or last is not None and java > last:
+                span = f"{first or 'any'} to {last}" if last is not None else f"{first} and newer"
+                problems.append(f"{flag} needs java {span}, not {java}")
+                continue
+            if name in _GARBAGE_COLLECTORS and flag.startswith("-XX:+"):
+                if collector is not None and collector != name:
+                    problems.append(f"{flag} conflicts with -XX:+{collector}")
+                    continue
+                collector = name
+            if name in _EXPERIMENTAL_FLAGS and not unlocked:
+                kept.append("-XX:+UnlockExperimentalVMOptions")
+                unlocked = True
+        elif flag[:4] in ("-Xmx", "-Xms"):
+            size = _parse_size(flag[4:])
+            if size is None or size == 0:
+                problems.append(f"{flag} is not a valid heap size")
+                continue
+            if memory is not None and size * _MIB > memory:
+                problems.append(f"{flag} is more than the {memory // _MIB} MiB of memory there is")
+                continue
+            heap[flag[:4]] = size
+        kept.append(flag)
+    if heap.get("-Xms", 0) > heap.get("-Xmx", float("inf")):
+        problems.append("-Xms is larger than -Xmx, using -Xmx for both")
+        kept = [f"-Xms{heap['-Xmx']}m" if flag.startswith("-Xms") else flag for flag in kept]
+    return kept, problems
+
+
+def jvm_arguments(profile: JvmProfile, java: Optional[int], instances: int = 1,
+                  available: Optional[int] = None) -> List[str]:
+    """
+    The JVM arguments for launching with ``profile``: its flags for the java version plus the heap size, validated
+    with :func:`validate_flags`. Problems with user-defined profiles are logged as warnings.
+    """
+    flags = list(profile.modern_flags if profile.modern_flags and java is not None and java >= 21 else profile.flags)
+    if not any(flag.startswith("-Xmx") for flag in flags):
+        heap = heap_size(profile, instances, available)
+        flags.append(f"-Xmx{heap}m")
+        flags.append(f"-Xms{heap}m" if profile.fixed_heap else f"-Xms{min(heap, 1024)}m")
+    total = None
+    try:
+        total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        pass
+    flags, problems = validate_flags(flags, java, total)
+    # The built-in profiles list flags for several java versions and rely on the ones that don't apply being dropped
+    log = logger.debug if PROFILES.get(profile.name) is profile else logger.warning
+    for problem in problems:
+        log(f"JVM profile {profile.name}: {problem}")
+    return flags
+
+
+def parse_profile_selection(values: Iterable[str]) -> Dict[Optional[str], str]:
+    """
+    Parse ``--jvm-profile`` values, ``NAME`` or ``TARGET=NAME``, into a mapping of targets (``None`` for the
+    default) to profile names.
+    """
+    selection: Dict[Optional[str], str] = {}
+    for value in values:
+        target, _, name = value.rpartition("=")
+        selection[target or None] = name
+    return selection
+
+
+def select_profile(selection: Dict[Optional[str], str], *targets: Optional[str]) -> Optional[str]:
+    """The profile selected for the first of ``targets`` that has one, or the default."""
+    for target in targets:
+        if target is not None and target in selection:
+            return selection[target]
+    return selection.get(None)
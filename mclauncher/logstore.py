@@ -0,0 +1,443 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import datetime
+import gzip
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import time
+from typing import Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+from .utils import get_data_directory
+
+__all__ = ("LogEntry", "LogStore", "LogWriter", "parse_time")
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+_INDEX_MAGIC = b"MCLIDX1\n"
+# first timestamp, last timestamp, level mask, lines, offset and length in the uncompressed segment,
+# offset and length in the compressed segment
+_BLOCK = struct.Struct("<ddIIQIQI")
+
+
+def _level_bit(level: int) -> int:
+    return 1 << min(max(level, 0) // 10, 31)
+
+
+def _level_mask(level: int) -> int:
+    """The mask of every level bit at or above ``level``."""
+    return ~(_level_bit(level) - 1) & 0xFFFFFFFF
+
+
+class _Block(NamedTuple):
+    first: float
+    last: float
+    mask: int
+    lines: int
+    offset: int
+    length: int
+    compressed_offset: int
+    compressed_length: int
+
+
+class LogEntry(NamedTuple):
+    """One line of game output."""
+    created: float
+    level: int
+    message: str
+
+    def format(self) -> str:
+        timestamp = datetime.datetime.fromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        return f"{timestamp} [{logging.getLevelName(self.level)}] {self.message}"
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    Parse a time for ``--since`` and ``--until``: either an ISO 8601 date/time or an age like ``30m``, ``2h`` or
+    ``7d``.
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", value.strip())
+    if match:
+        seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return (time.time() if now is None else now) - seconds
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time: {value!r}") from None
+
+
+class _Codec:
+    def __init__(self, extension: str) -> None:
+        self.extension = extension
+        if extension == ".zst":
+            if zstandard is None:
+                raise RuntimeError("Reading .zst logs requires the zstandard package")
+            self._compressor = zstandard.ZstdCompressor()
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.extension == ".zst":
+            return self._compressor.compress(data)
+        return gzip.compress(data, 6)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.extension == ".zst":
+            return self._decompressor.decompress(data)
+        return gzip.decompress(data)
+
+
+class LogWriter:
+    """
+    Writes the output of one launch into a directory of segments. The active segment is plain text, indexed each
+    time a batch of records is written; once it reaches :attr:`segment_size`, or the writer is closed, it is
+    compressed in blocks of about :attr:`block_size` bytes that can be decompressed on their own.
+
+    Each segment ``NNNNN.log`` (``NNNNN.log.gz`` or ``NNNNN.log.zst`` once compressed) has an index ``NNNNN.idx``
+    listing, for every block, its time range, the levels in it and where it is.
+
+    Parameters
+    -----------
+    directory: :class:`str`
+        The directory for this launch.
+    compression: Optional[:class:`str`]
+        ``"zstd"``, ``"gzip"`` or ``"none"``. Defaults to zstd if the zstandard package is installed, else gzip.
+    """
+
+    segment_size = 16 * 1024 * 1024
+    block_size = 64 * 1024
+    # Keep every line, whatever the logger's level
+    level = logging.NOTSET
+
+    def __init__(self, directory: str, compression: Optional[str] = None) -> None:
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in ("zstd", "gzip", "none"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.directory = directory
+        self.codec = None if compression == "none" else _Codec(".zst" if compression == "zstd" else ".gz")
+        self.segment = -1
+        self._log = self._index = None
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._rotate()
+
+    def _path(self, extension: str, segment: Optional[int] = None) -> str:
+        return os.path.join(self.directory, f"{self.segment if segment is None else segment:05d}{extension}")
+
+    def _rotate(self) -> None:
+        self._finish()
+        self.segment += 1
+        self._size = 0
+        self._log = open(self._path(".log"), "ab")
+        self._index = open(self._path(".idx"), "ab")
+        self._index.write(_INDEX_MAGIC)
+
+    def _finish(self) -> None:
+        if self._log is None:
+            return
+        self._log.close()
+        self._index.close()
+        self._log = self._index = None
+        if self.codec is not None:
+            self._compress(self.segment)
+
+    def _compress(self, segment: int) -> None:
+        log_path, index_path = self._path(".log", segment), self._path(".idx", segment)
+        compressed_path = self._path(".log" + self.codec.extension, segment)
+        blocks = _read_index(index_path)
+        merged: List[_Block] = []
+        with open(log_path, "rb") as log, open(compressed_path + ".part", "wb") as out:
+            pending: List[_Block] = []
+
+            def flush():
+                start, end = pending[0].offset, pending[-1].offset + pending[-1].length
+                log.seek(start)
+                data = self.codec.compress(log.read(end - start))
+                mask = 0
+                for block in pending:
+                    mask |= block.mask
+                merged.append(_Block(min(b.first for b in pending), max(b.last for b in pending), mask,
+                                     sum(b.lines for b in pending), start, end - start, out.tell(), len(data)))
+                out.write(data)
+                pending.clear()
+
+            for block in blocks:
+                pending.append(block)
+                if pending[-1].offset + pending[-1].length - pending[0].offset >= self.block_size:
+                    flush()
+            if pending:
+                flush()
+        with open(index_path + ".part", "wb") as index:
+            index.write(_INDEX_MAGIC)
+            for block in merged:
+                index.write(_BLOCK.pack(*block))
+        # The merged index still describes the plain segment, so readers see a consistent pair throughout
+        os.replace(compressed_path + ".part", compressed_path)
+        os.replace(index_path + ".part", index_path)
+        os.remove(log_path)
+
+    def write(self, records: List[logging.LogRecord]) -> None:
+        """Append a batch of records as one indexed block."""
+        if not records:
+            return
+        mask = 0
+        lines = []
+        for record in records:
+            mask |= _level_bit(record.levelno)
+            lines.append(f"{record.created:.3f}\t{record.levelno}\t{record.getMessage()}\n")
+        data = "".join(lines).encode("utf-8", "replace")
+        self._log.write(data)
+        self._log.flush()
+        self._index.write(_BLOCK.pack(records[0].created, records[-1].created, mask, len(records),
+                                      self._size, len(data), 0, 0))
+        self._index.flush()
+        self._size += len(data)
+        if self._size >= self.segment_size:
+            self._rotate()
+
+    def close(self) -> None:
+        """Close and compress the last segment."""
+        self._finish()
+
+
+def _read_index(path: str) -> List[_Block]:
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return []
+    if not data.startswith(_INDEX_MAGIC):
+        return []
+    # A block being written may be cut short
+    end = len(_INDEX_MAGIC) + (len(data) - len(_INDEX_MAGIC)) // _BLOCK.size * _BLOCK.size
+    return [_Block(*fields) for fields in _BLOCK.iter_unpack(data[len(_INDEX_MAGIC):end])]
+
+
+def _parse_lines(data: bytes) -> Iterator[LogEntry]:
+    # Only "\n" ends a record: messages may contain "\r" and the other characters str.splitlines() splits on. A
+    # message with a "\n" in it continues on the following lines.
+    entry = None
+    for line in data.decode("utf-8", "replace").split("\n")[:-1]:
+        fields = line.split("\t", 2)
+        try:
+            created, level, message = float(fields[0]), int(fields[1]), fields[2]
+        except (IndexError, ValueError):
+            if entry is not None:
+                entry = entry._replace(message=entry.message + "\n" + line)
+            continue
+        if entry is not None:
+            yield entry
+        entry = LogEntry(created, level, message)
+    if entry is not None:
+        yield entry
+
+
+class _Segment:
+    """Reads one segment, plain or compressed."""
+
+    def __init__(self, directory: str, name: str) -> None:
+        self.index_path = os.path.join(directory, name + ".idx")
+        self.blocks = _read_index(self.index_path)
+        self.path = os.path.join(directory, name + ".log")
+        self.codec = None
+        if not os.path.exists(self.path):
+            for extension in (".zst", ".gz"):
+                if os.path.exists(self.path + extension):
+                    self.path += extension
+                    self.codec = _Codec(extension)
+                    break
+        self._file = self._map = None
+
+    def __enter__(self) -> "_Segment":
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            # Compressed in the meantime
+            self.__init__(os.path.dirname(self.index_path), os.path.basename(self.index_path)[:-4])
+            self._file = open(self.path, "rb")
+        if self.codec is None and os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def read(self, block: _Block) -> bytes:
+        if self.codec is None:
+            if self._map is None or block.offset + block.length > len(self._map):
+                self._file.seek(block.offset)
+                return self._file.read(block.length)
+            return self._map[block.offset:block.offset + block.length]
+        self._file.seek(block.compressed_offset)
+        return self.codec.decompress(self._file.read(block.compressed_length))
+
+
+class LogStore:
+    """
+    Keeps the game output of every launch, per instance: ``logs/<instance>/<launch>/`` in the data directory, where
+    each launch is written by a :class:`LogWriter`. Launches older than :attr:`max_age` seconds are removed when a
+    new one starts.
+
+    Parameters
+    -----------
+    root: Optional[:class:`str`]
+        Where the logs live. Defaults to ``logs`` in the data directory.
+    """
+
+    max_age = 30 * 24 * 60 * 60
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or os.path.join(get_data_directory(), "logs")
+
+    def instances(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+        except FileNotFoundError:
+            return []
+
+    def launches(self, instance: str) -> List[str]:
+        """The launch directories of ``instance``, oldest first."""
+        directory = os.path.join(self.root, instance)
+        try:
+            return [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+        except FileNotFoundError:
+            return []
+
+    def open(self, instance: str, compression: Optional[str] = None) -> LogWriter:
+        """Start a new launch of ``instance``."""
+        self.prune(instance)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        return LogWriter(os.path.join(self.root, instance, name), compression)
+
+    def prune(self, instance: str, max_age: Optional[float] = None) -> int:
+        """Remove launches that were last written to more than ``max_age`` seconds ago."""
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        removed = 0
+        for launch in self.launches(instance):
+            try:
+                mtime = max(entry.stat().st_mtime for entry in os.scandir(launch))
+            except ValueError:
+                mtime = os.stat(launch).st_mtime
+            if mtime < cutoff:
+                logger.debug(f"Removing old logs {launch}")
+                shutil.rmtree(launch, ignore_errors=True)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _segments(launch: str) -> List[str]:
+        return sorted(name[:-4] for name in os.listdir(launch) if name.endswith(".idx"))
+
+    @staticmethod
+    def _wanted(block: _Block, mask: int, since: Optional[float], until: Optional[float]) -> bool:
+        return bool(block.mask & mask) and (since is None or block.last >= since) and \
+            (until is None or block.first <= until)
+
+    def read(self, launch: str, level: int = 0, since: Optional[float] = None, until: Optional[float] = None,
+             pattern: Optional[Pattern] = None, reverse: bool = False) -> Iterator[LogEntry]:
+        """
+        The entries of a launch that match every filter. Blocks whose level mask or time range rule them out are not
+        read at all.
+
+        Parameters
+        -----------
+        launch: :class:`str`
+            The launch directory.
+        level: :class:`int`
+            The lowest level to include.
+        since: Optional[:class:`float`]
+            Only include entries from this timestamp on.
+        until: Optional[:class:`float`]
+            Only include entries up to this timestamp.
+        pattern: Optional[:class:`re.Pattern`]
+            Only include entries whose message matches this.
+        reverse: :class:`bool`
+            Newest first.
+        """
+        mask = _level_mask(level)
+        segments = self._segments(launch)
+        for name in reversed(segments) if reverse else segments:
+            with _Segment(launch, name) as segment:
+                blocks = [block for block in segment.blocks if self._wanted(block, mask, since, until)]
+                for block in reversed(blocks) if reverse else blocks:
+                    entries = [entry for entry in _parse_lines(segment.read(block))
+                               if entry.level >= level and (since is None or entry.created >= since)
+                               and (until is None or entry.created <= until)
+                               and (pattern is None or pattern.search(entry.message))]
+                    yield from reversed(entries) if reverse else entries
+
+    def tail(self, launch: str, lines: int, **filters) -> List[LogEntry]:
+        """The last ``lines`` matching entries of a launch, oldest first."""
+        entries = []
+        for entry in self.read(launch, reverse=True, **filters):
+            if len(entries) >= lines:
+                break
+            entries.append(entry)
+        return entries[::-1]
+
+    def follow(self, launch: str, interval: float = 0.5, level: int = 0, pattern: Optional[Pattern] = None,
+               start: Optional[Tuple[str, int]] = None) -> Iterator[LogEntry]:
+        """
+        Yield entries as they are written to a launch, like ``tail -f``. Starts after the current end, or at
+        ``start`` (a segment name and an offset into it).
+        """
+        if start is None:
+            segments = self._segments(launch)
+            if segments:
+                blocks = _read_index(os.path.join(launch, segments[-1] + ".idx"))
+                start = (segments[-1], blocks[-1].offset + blocks[-1].length if blocks else 0)
+            else:
+                start = ("", 0)
+        current, position = start
+        mask = _level_mask(level)
+        while True:
+            for name in self._segments(launch):
+                if name < current:
+                    continue
+                if name > current:
+                    current, position = name, 0
+                with _Segment(launch, name) as segment:
+                    for block in segment.blocks:
+                        end = block.offset + block.length
+                        if end <= position:
+                            continue
+                        # Compressing the segment merges blocks, so one may start before where we got to: the
+                        # offsets are still those of the plain segment, so skip the part already read
+                        skip, position = max(0, position - block.offset), end
+                        if block.mask & mask:
+                            for entry in _parse_lines(segment.read(block)[skip:]):
+                                if entry.level >= level and (pattern is None or pattern.search(entry.message)):
+                                    yield entry
+            time.sleep(interval)
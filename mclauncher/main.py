@@ -23,29 +23,78 @@ SOFTWARE.
 """
 
 import argparse
-import json
 import logging
 import os
-import socket
-import subprocess
 import sys
-import webbrowser
-from contextlib import closing
-
-import minecraft_launcher_lib
-import requests
-
-from .pipe import LogPipe
-from .webserver import run_server
+import threading
+import time
+from typing import Optional
+
+from .auth import CredentialStore, HttpTokenEndpoint, get_login_data, DEFAULT_AUTH_SERVER
+from .catalog import VersionCatalog
+from .command import CommandPlanner
+from .commands import COMMANDS, run_command, add_shared_store_argument, open_shared_store
+from .metadata import MetadataCache, OfflineError
+from .progress import Progress
+from .timings import Timings, collect, span
 from .ui import Gui, Cli
+from .utils import configure_logging, game_starting, resident, run_in_thread
 
 __version__ = "0.1.8"
 
 
 def launch(gui: bool = False, args=None):
+    argv = sys.argv[1:] if args is None else args
+    if not gui and argv and argv[0] in COMMANDS:
+        return run_command(argv)
+    # The flags that wrap the whole run are needed before the rest is parsed
+    early_parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    early_parser.add_argument("--timings", dest="timings", default=None)
+    early_parser.add_argument("--timings-output", dest="timings_output", default=None)
+    early_parser.add_argument("--profile", dest="profile", default=None)
+    early_args, _ = early_parser.parse_known_args(argv)
+
+    profiler = None
+    if early_args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    # Each launch collects its own, so that launches running at once in the daemon don't mix theirs up
+    timings = Timings()
+    if early_args.timings:
+        timings.enable()
+    # Set when the launch is over: if it failed before the login was needed, this stops the login from waiting for
+    # the browser, which in the daemon would keep its thread and port forever
+    finished = threading.Event()
+    try:
+        with collect(timings), span("launch"):
+            return _launch(gui, args, finished)
+    finally:
+        finished.set()
+        if profiler is not None:
+            import pstats
+
+            profiler.disable()
+            profiler.dump_stats(early_args.profile)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        timings.disable()
+        if early_args.timings in ("text", "json", "chrome"):
+            report = timings.report(early_args.timings)
+            if early_args.timings_output:
+                with open(early_args.timings_output, "w") as f:
+                    f.write(report + "\n")
+            else:
+                print(report)
+
+
+def _launch(gui: bool = False, args=None, finished: Optional[threading.Event] = None):
+    launch_started = time.time()
+
     # noinspection PyProtectedMember
     max_verbosity = int(max(logging._levelToName.keys()) / 10)
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(epilog=f"Other commands: {', '.join(COMMANDS)}. Run \"%(prog)s <command> -h\" "
+                                            f"for help on them.")
     parser.add_argument("version", nargs="?", default=False, help="Minecraft version. Release versions and "
                                                                   "snapshots all work. Defaults to newest release.")
     group = parser.add_mutually_exclusive_group()
@@ -57,19 +106,70 @@ def launch(gui: bool = False, args=None):
                        help="Use the fabric mod loader. Loader version is optional, defaults to newest release.")
     group.add_argument("--forge", dest="forge", nargs="?", default=False, const=True, metavar="version",
                        help="Use the forge mod loader. Loader version is optional, defaults to newest release.")
+    parser.add_argument("--launcher-profile", dest="launcher_profile", default=None, metavar="name",
+                        help="Launch a profile from the official launcher's launcher_profiles.json, with its version, "
+                             "game directory, java, java arguments and resolution. Without it, only the game "
+                             "directory of a profile for the version is used.")
     parser.add_argument("-y", dest="y", default=False, action="store_true",
                         help="Bypass all prompts, automatically selecting yes for them.")
     parser.add_argument("--no-install", dest="no_install", default=False, action="store_true",
                         help="Don't run the install script at all, try to run locally installed version if "
                              "possible.")
+    parser.add_argument("--download-workers", dest="download_workers", type=int, default=8, metavar="n",
+                        help="How many files to download at once when installing. Defaults to 8.")
+    add_shared_store_argument(parser)
+    parser.add_argument("--log-store", dest="log_store", nargs="?", const="default", default=None,
+                        metavar="instance", help="Keep the game output in the compressed log store, under the given "
+                                                 "instance name (\"default\" if none is given). Read it back with "
+                                                 "\"%(prog)s logs\".")
+    parser.add_argument("--jvm-profile", dest="jvm_profile", action="append", default=[], metavar="[version=]name",
+                        help="Tune the JVM's memory and garbage collector with a profile: low-latency, throughput, "
+                             "many-instances, custom, or one defined in jvm_profiles.json in the data directory. "
+                             "Prefix it with a version to only use it for that version. Can be given more than once.")
+    parser.add_argument("--instances", dest="instances", type=int, default=1, metavar="n",
+                        help="How many instances will run on this machine at once, to size the heap for the JVM "
+                             "profile. Defaults to 1.")
+    parser.add_argument("--cds", dest="cds", action="store_true", default=False,
+                        help="Speed up startup with a class data sharing archive for this version and classpath. The "
+                             "first launch makes it when the game exits; needs java 13 or newer.")
+    parser.add_argument("--timing-report", dest="timing_report", nargs="?", const="", default=None, metavar="path",
+                        help="Time how long the game takes to open a window, load resources, reach the main menu and "
+                             "join a world, and print the report when it exits. Also append it to the given file as "
+                             "JSON lines.")
+    parser.add_argument("--timings", dest="timings", choices=("text", "json", "chrome"), default=None,
+                        metavar="format", help="Time each phase of the launch and print a breakdown (text), or the "
+                                               "spans as json or a Chrome trace (chrome).")
+    parser.add_argument("--timings-output", dest="timings_output", default=None, metavar="path",
+                        help="Write the --timings report to this file instead of printing it.")
+    parser.add_argument("--profile", dest="profile", default=None, metavar="path",
+                        help="Run the launcher under cProfile, save the stats to this file and print the top "
+                             "functions.")
+    parser.add_argument("--monitor-interval", dest="monitor_interval", type=float, default=None, metavar="seconds",
+                        help="Sample the game's memory, CPU, threads and open files this often and log them. "
+                             "Defaults to 5 seconds with --metrics-file, otherwise off.")
+    parser.add_argument("--metrics-file", dest="metrics_file", default=None, metavar="path",
+                        help="Append the samples, exits and restarts to this file as JSON lines.")
+    parser.add_argument("--restart-on-crash", dest="restart_on_crash", type=int, nargs="?", const=3, default=0,
+                        metavar="n", help="Start the game again if it crashes, up to n times (3 if not given), "
+                                          "waiting longer before each restart.")
+    parser.add_argument("--offline", dest="offline", default=False, action="store_true",
+                        help="Don't use the network. Versions and loaders are resolved from the cache, nothing is "
+                             "installed and cached credentials are used.")
     parser.add_argument('-v', dest="verbose", action='count', default=3,
                         help="Set verbosity. Can be supplied multiple times to increase verbosity, max "
                              f"{max_verbosity}. Defaults to 3. (1: Critical, 2: Error, 3: Warning, 4: Info, 5: Debug)")
     parser.add_argument('--version', "-V", action='version', version='%(prog)s ' + __version__)
     parser.add_argument('--manual-auth', "-m", dest="manual_auth", action="store_true", default=False,
-                        help="Manually visit and paste url for authentication. When false, the script will create "
-                             "a flask server on localhost, and automatically get the token after authenticating. "
+                        help="Manually visit and paste url for authentication. When false, the script will start "
+                             "a small server on localhost, and automatically get the token after authenticating. "
                              "Defaults to false.")
+    parser.add_argument("--fresh-login", dest="fresh_login", action="store_true", default=False,
+                        help="Ignore cached credentials and log in through the browser again.")
+    parser.add_argument("--account", dest="account", default="default", metavar="name",
+                        help="Name to cache the login credentials under. Defaults to \"default\".")
+    parser.add_argument("--auth-server", dest="auth_server", default=DEFAULT_AUTH_SERVER, metavar="url",
+                        help=f"Auth server to exchange login codes and refresh tokens with. Defaults to "
+                             f"{DEFAULT_AUTH_SERVER}.")
     parser.add_argument("--gui", "-g", dest="gui", action="store_true",
                         default=False, help="Use a gui for the launching. Defaults to false.")
     if gui:
@@ -99,23 +199,26 @@ def launch(gui: bool = False, args=None):
                 return True
             return True
 
+    # Heavy imports are deferred until here, so that e.g. --version and --help don't pay for them
+    import socket
+    import subprocess
+    from contextlib import closing
+
+    import minecraft_launcher_lib
+
+    from .pipe import LogPipe
+
     if args.verbose > max_verbosity:
         ui.error(f"Verbosity level ({args.verbose}) exceeded max verbosity ({max_verbosity})")
 
     log_level = (max_verbosity + 1 - args.verbose) * 10
 
-    # noinspection PyTypeChecker
-    logging.basicConfig(level=log_level,
-                        format="$asctime [$levelname] ($name): $message", style="$")
-
     logger = logging.getLogger(__name__)
     java_logger = logging.getLogger("minecraft")
     gui_logger = logging.getLogger("mclauncher_gui")
 
     # Set logging level for everything
-    loggers = [logging.getLogger(name) for name in logging.root.manager.loggerDict]
-    for logger in loggers:
-        logger.setLevel(log_level)
+    configure_logging(log_level)
 
     if False:  # if args.gui:
         # Gui disabled for now
@@ -134,69 +237,82 @@ def launch(gui: bool = False, args=None):
     print("If no further input is required, you will be prompted to login momentarily.")
 
     def forge(vanilla_version, java_path, mc_directory):
+        from .forge import ForgeInstaller, forge_version_id
+
         if args.forge is not True:
-            forge_version = vanilla_version + "-forge-" + args.forge
+            # Either the forge build alone or the whole version, as forge lists it
+            forge_version = args.forge if args.forge.startswith(vanilla_version + "-") else \
+                vanilla_version + "-" + args.forge
         else:
             # Get latest version
-            forge_version = minecraft_launcher_lib.forge.find_forge_version(vanilla_version)
+            try:
+                forge_version = metadata.find_forge_version(vanilla_version)
+            except OfflineError as e:
+                ui.error(f"Can't look up forge for {vanilla_version}: {e}")
         # Checks if a forge version exists for that version
         if forge_version is None:
-            print("This Minecraft version is not supported by forge")
-            return
-        if len([x for x in minecraft_launcher_lib.utils.get_installed_versions(mc_directory) if
-                x['id'] == forge_version.replace("-forge-", "\\").replace("-", "-forge-").replace("\\", "-forge-")][
-               :1]) > 0:
+            progress.write("This Minecraft version is not supported by forge")
+            return vanilla_version
+        version_id = forge_version_id(forge_version)
+        if catalog.get(version_id):
             if ask_yes_no(f"Forge version {forge_version} is installed. Would you like to use it?"):
-                return
-                # Checks if the version can be installed automatic
+                return version_id
+        if args.offline:
+            ui.error(f"Forge {forge_version} is not installed, it can't be installed in offline mode.")
+        forge_task = progress.task("forge")
+        forge_installer = ForgeInstaller(make_installer(forge_task), java_path, callback=forge_task.callback)
+        # Checks if the version can be installed automatic
         if minecraft_launcher_lib.forge.supports_automatic_install(forge_version):
             if ask_yes_no(f"Do you want to install forge {forge_version}?"):
                 if ask_yes_no(f"Use auto install?"):
-                    mc_directory = minecraft_launcher_lib.utils.get_minecraft_directory()
-                    callback = {
-                        "setStatus": lambda text: print(text)
-                    }
-                    minecraft_launcher_lib.forge.install_forge_version(forge_version, mc_directory,
-                                                                       callback=callback, java=java_path)
+                    version_id = forge_installer.install(forge_version)
+                    forge_task.finish(f"Installed forge {forge_version}")
                 else:
-                    minecraft_launcher_lib.forge.run_forge_installer(forge_version, java_path)
+                    subprocess.call([java_path, "-jar", forge_installer.installer_jar(forge_version)])
         else:
-            print(f"Forge {forge_version} can't be installed automatic.")
+            progress.write(f"Forge {forge_version} can't be installed automatic.")
             if ask_yes_no("Do you want to run the installer?"):
-                minecraft_launcher_lib.forge.run_forge_installer(forge_version, java_path)
+                subprocess.call([java_path, "-jar", forge_installer.installer_jar(forge_version)])
+        return version_id
 
-    def fabric(vanilla_version, java_path, mc_directory):
-        if not minecraft_launcher_lib.fabric.is_minecraft_version_supported(vanilla_version):
-            print("This version is not supported by fabric")
-            return vanilla_version
+    def fabric(vanilla_version, mc_directory):
+        from .fabric import FabricInstaller, fabric_version_id
+        from .install import InstallError
 
-        if args.fabric is not True:
-            loader_version = args.fabric
-        else:
-            loader_version = minecraft_launcher_lib.fabric.get_latest_loader_version()
+        try:
+            if not metadata.is_fabric_version_supported(vanilla_version):
+                progress.write("This version is not supported by fabric")
+                return vanilla_version
+
+            if args.fabric is not True:
+                loader_version = args.fabric
+            else:
+                loader_version = metadata.get_latest_fabric_loader_version()
+        except OfflineError as e:
+            ui.error(f"Can't look up fabric for {vanilla_version}: {e}")
 
-        fabric_version = "fabric-loader-" + loader_version + "-" + vanilla_version
-        print(fabric_version)
+        fabric_version = fabric_version_id(vanilla_version, loader_version)
+        progress.write(fabric_version)
 
-        if len([x for x in minecraft_launcher_lib.utils.get_installed_versions(mc_directory) if
-                x['id'] == fabric_version][:1]) > 0:
+        if catalog.get(fabric_version):
             if ask_yes_no(f"Fabric version {loader_version} is installed. Would you like to use it?"):
                 return fabric_version
 
         if ask_yes_no(f"Do you want to install fabric {loader_version}?"):
-            callback = {
-                "setStatus": lambda text: print(text)
-            }
-            minecraft_launcher_lib.fabric.install_fabric(vanilla_version, mc_directory, callback=callback,
-                                                         java=java_path)
+            # Written from the cached loader metadata and library cache, so this works offline too once cached
+            fabric_task = progress.task("fabric", f"Installing fabric {loader_version}")
+            try:
+                fabric_version = FabricInstaller(make_installer(fabric_task)).install(vanilla_version,
+                                                                                      loader_version)
+            except (OfflineError, InstallError) as e:
+                fabric_task.fail(f"Failed to install fabric {loader_version}")
+                ui.error(f"Fabric {loader_version} can't be installed: {e}")
+            fabric_task.finish(f"Installed fabric {loader_version}")
             return fabric_version
         return vanilla_version
 
     def client(vanilla_version, client_name, mc_directory):
-        versions = os.listdir(mc_directory + "/versions")
-        release_versions = [version for version in versions if vanilla_version in version]
-        client_versions = [version for version in versions if client_name.lower() in version.lower()]
-        possible_versions = [version for version in release_versions if version in client_versions]
+        possible_versions = [info.id for info in catalog.find_clients(client_name, base=vanilla_version)]
         if len(possible_versions) == 0:
             if ask_yes_no(
                     f"Couldn't find a suitable version for \"{client_name}\" with MC \"{vanilla_version}\". "
@@ -210,111 +326,224 @@ def launch(gui: bool = False, args=None):
         else:
             return possible_versions[0]
 
-    if args.version:
-        latest_version = args.version
-        logger.debug(f"Using provided version {latest_version}")
-    else:
-        # Get latest version
-        latest_version = minecraft_launcher_lib.utils.get_latest_version()["release"]
-        logger.debug(f"Using fetched version {latest_version}")
+    # In the daemon these are kept between launches, see resident()
+    metadata = resident(("metadata", args.offline), lambda: MetadataCache(offline=args.offline))
+    progress = Progress()
+
+    with span("resolve_version"):
+        # Get Minecraft directory
+        minecraft_directory = minecraft_launcher_lib.utils.get_minecraft_directory()
+        logger.debug(f"Found minecraft directory at {minecraft_directory}")
+
+        from .profiles import ProfileIndex
+
+        profiles = resident(("profiles", minecraft_directory), lambda: ProfileIndex(minecraft_directory))
+        profiles.refresh()
+        launcher_profile = None
+        if args.launcher_profile:
+            launcher_profile = profiles.get(args.launcher_profile)
+            if launcher_profile is None:
+                ui.error(f"Unknown launcher profile \"{args.launcher_profile}\". Profiles: "
+                         + ", ".join(profile.name for profile in profiles.profiles.values()))
+            if args.version:
+                ui.error("Give either a version or a launcher profile, not both")
+
+        try:
+            if args.version:
+                latest_version = args.version
+                logger.debug(f"Using provided version {latest_version}")
+            elif launcher_profile is not None:
+                latest_version = launcher_profile.version(metadata.get_latest_version())
+                logger.debug(f"Using version {latest_version} of launcher profile {launcher_profile.name}")
+            else:
+                # Get latest version
+                latest_version = metadata.get_latest_version()["release"]
+                logger.debug(f"Using fetched version {latest_version}")
+
+            # Make sure version is valid
+            valid = metadata.is_version_valid(latest_version, minecraft_directory)
+        except OfflineError as e:
+            ui.error(f"Can't resolve the version: {e}")
+        if not valid:
+            ui.error("Invalid version!")
+
+    def find_free_port():
+        # Finds a random open port to assign the webserver to.
+        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+            s.bind(('', 0))
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            return s.getsockname()[1]
 
-    # Get Minecraft directory
-    minecraft_directory = minecraft_launcher_lib.utils.get_minecraft_directory()
-    logger.debug(f"Found minecraft directory at {minecraft_directory}")
+    # Login
+    def get_auth_code():
+        redirect_url = 'https://mclauncher.bobdotcom.xyz/authorize'
+        client_id = "d83138ec-c608-4b87-959d-0b228f218bb3"
+        port = find_free_port()
+        login_url = minecraft_launcher_lib.microsoft_account.get_login_url(client_id, redirect_url).replace(
+            "<optional;", str(port))
+
+        if not args.manual_auth:
+            import webbrowser
+            from .webserver import run_server
+
+            # Setup webserver
+            def wrapper():
+                webbrowser.open_new(login_url)
+            login_task.set_status("Waiting for the login in the browser")
+            return run_server(when_ready=wrapper, port=port, log_level=logger.getEffectiveLevel(), cancel=finished)
+
+        login_task.set_status("Waiting for the redirect url")
+        with progress.paused():
+            print(f"Please open {login_url} in your browser and copy the url you are redirected into the prompt "
+                  f"below.")
+            code_url = input()
 
-    # Make sure version is valid
-    if not minecraft_launcher_lib.utils.is_version_valid(latest_version, minecraft_directory):
-        ui.error("Invalid version!")
+        # Check if the url contains a code
+        if not minecraft_launcher_lib.microsoft_account.url_contains_auth_code(code_url):
+            print("That url is not valid")
+            sys.exit(1)
 
-    if not args.no_install:
+        # Get the code from the url
+        return minecraft_launcher_lib.microsoft_account.get_auth_code_from_url(code_url)
+
+    # Get the login data, only going through the browser when the cached credentials can't be used
+    def login():
+        login_task.set_status("Logging in")
+        with span("auth"):
+            try:
+                login_data = get_login_data(HttpTokenEndpoint(args.auth_server), CredentialStore(), get_auth_code,
+                                            account=args.account, fresh=args.fresh_login, offline=args.offline)
+            except BaseException:
+                login_task.fail("Login failed")
+                raise
+        login_task.finish(f"Logged in as {login_data.get('username', args.account)}")
+        return login_data
+
+    # The login doesn't depend on the install, so it runs alongside it, the browser login included, until the launch
+    # command needs it
+    login_task = progress.task("login")
+    login_future = run_in_thread("mclauncher-login", login)
+
+    def make_installer(task):
+        from .download import Downloader
+        from .fileindex import FileIndex
+        from .install import Installer
+
+        session = resident(("session", args.download_workers), lambda: Downloader(args.download_workers).session)
+        downloader = Downloader(args.download_workers, callback=task.callback,
+                                store=open_shared_store(args.shared_store, minecraft_directory), session=session)
+        return Installer(minecraft_directory, metadata, downloader, index=FileIndex(minecraft_directory))
+
+    if not args.no_install and not args.offline:
         logger.info(f"Installing {latest_version}")
         # Make sure, the latest version of Minecraft is installed
-        minecraft_launcher_lib.install.install_minecraft_version(latest_version, minecraft_directory)
+        install_task = progress.task("install", f"Installing {latest_version}")
+        installer = make_installer(install_task)
+        with span("install", version=latest_version):
+            try:
+                installer.install(latest_version)
+            except BaseException:
+                install_task.fail(f"Failed to install {latest_version}")
+                raise
+        install_task.finish(f"Installed {latest_version}")
     else:
         logger.info(f"Skipping install of {latest_version}")
 
+    # Index of the installed versions, used to resolve loaders and clients
+    catalog = resident(("catalog", minecraft_directory), lambda: VersionCatalog(minecraft_directory))
+    catalog.refresh()
+    planner = resident(("planner", minecraft_directory), lambda: CommandPlanner(minecraft_directory, catalog))
+
     if args.fabric is not False:
         logger.info("Using fabric client")
-        java = minecraft_launcher_lib.command.get_minecraft_command(latest_version, minecraft_directory, {})[0]
-        logger.debug(f"Found java_path at {java}")
-        latest_version = fabric(latest_version, java, minecraft_directory)
+        with span("fabric"):
+            latest_version = fabric(latest_version, minecraft_directory)
         logger.debug(f"Finished fabric injection and changed version to {latest_version}")
 
-    if args.forge is not False:
-        java = minecraft_launcher_lib.command.get_minecraft_command(latest_version, minecraft_directory, {})[0]
+    from .runtime import RuntimeManager, java_requirement
 
-        forge(latest_version, java, minecraft_directory)
-        latest_version = minecraft_launcher_lib.forge.find_forge_version(latest_version)
-        latest_version = latest_version.replace("-forge-", "\\").replace("-", "-forge-").replace("\\", "-forge-")
+    runtimes = resident(("runtimes", minecraft_directory), lambda: RuntimeManager(minecraft_directory, metadata))
 
-    if args.client is not False:
-        latest_version = client(latest_version, args.client, minecraft_directory)
+    def find_java(version):
+        # Runtimes are installed with the version, so this only picks between installed ones
+        with span("find_java", version=version):
+            requirement = java_requirement(minecraft_directory, version)
+            runtime = runtimes.select(requirement)
+        if runtime is None:
+            logger.warning(f"Found no java for {version} (needs {requirement or 'java 8'}), using the default")
+        else:
+            logger.debug(f"Using java {runtime.version} ({runtime.source}) at {runtime.path} for {version}")
+        return runtime
 
-    def find_free_port():
-        # Finds a random open port to assign the webserver to.
-        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-            s.bind(('', 0))
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            return s.getsockname()[1]
+    if args.forge is not False:
+        java = find_java(latest_version)
 
-    # Login
-    redirect_url = 'https://mclauncher.bobdotcom.xyz/authorize'
-    client_id = "d83138ec-c608-4b87-959d-0b228f218bb3"
-    port = find_free_port()
-    login_url = minecraft_launcher_lib.microsoft_account.get_login_url(client_id, redirect_url).replace("<optional;",
-                                                                                                        str(port))
-
-    if not args.manual_auth:
-        # Setup webserver
-        def wrapper():
-            webbrowser.open_new(login_url)
-        auth_code = run_server(when_ready=wrapper, port=port, log_level=logger.getEffectiveLevel())
+        with span("forge"):
+            latest_version = forge(latest_version, java.path if java else "java", minecraft_directory)
 
-    else:
-        print(f"Please open {login_url} in your browser and copy the url you are redirected into the prompt below.")
-        code_url = input()
+    if args.client is not False:
+        with span("client"):
+            latest_version = client(latest_version, args.client, minecraft_directory)
 
-        # Check if the url contains a code
-        if not minecraft_launcher_lib.microsoft_account.url_contains_auth_code(code_url):
-            print("That url is not valid")
-            sys.exit(1)
+    if launcher_profile is None:
+        launcher_profile = profiles.for_version(latest_version)
+        if launcher_profile is not None:
+            logger.info(f"Found profile {launcher_profile.name} in launcher profiles for {latest_version}")
 
-        # Get the code from the url
-        auth_code = minecraft_launcher_lib.microsoft_account.get_auth_code_from_url(code_url)
-
-    # Get the login data
-    req = requests.post("https://mclauncher.bobdotcom.xyz/authorize", data={"code": auth_code})
-    login_data = req.json()
-
-    game_dir = None
-
-    launcher_profiles = os.path.join(minecraft_directory, "launcher_profiles.json")
-    if os.path.exists(launcher_profiles):
-        with open(launcher_profiles, "r") as f:
-            data = json.load(f)
-        if data.get("profiles"):
-            profiles = data["profiles"]
-            for v in profiles.values():
-                if v.get("lastVersionId") == latest_version:
-                    logger.info(f"Found profile in launcher profiles for {latest_version}")
-                    game_dir = v.get("gameDir")
-                    break
+    with span("wait_for_login"):
+        login_data = login_future.result()
 
     # Get Minecraft command
-    minecraft_command = minecraft_launcher_lib.command.get_minecraft_command(latest_version, minecraft_directory,
-                                                                             login_data)
-
-    if game_dir is not None:
-        minecraft_command[minecraft_command.index("--gameDir") + 1] = game_dir
-
-    if minecraft_command[0] == "java":
-        path = os.path.join(minecraft_directory, "runtime", "jre-legacy",
-                            "mac-os", "jre-legacy", "jre.bundle", "Contents", "Home", "bin")
-        if os.path.exists(os.path.join(path, "java")):
-            minecraft_command[0] = os.path.join(path, "java")
-        elif os.path.exists(os.path.join(path, "java_path")):
-            minecraft_command[0] = os.path.join(path, "java_path")
+    command_span = span("command").begin()
+    catalog.refresh()
+    launch_options = {}
+    java = find_java(latest_version)
+    if java is not None:
+        launch_options["executablePath"] = java.path
+    if launcher_profile is not None:
+        # The profile's settings go into the plan, its javaDir taking over from the runtime found above. A profile
+        # that was only found by its version just lends its game directory
+        profile_options = launcher_profile.launch_options()
+        if not args.launcher_profile:
+            profile_options = {key: value for key, value in profile_options.items() if key == "gameDirectory"}
+        launch_options.update(profile_options)
+    profile_name = None
+    if args.jvm_profile:
+        from . import jvm
+
+        info = catalog.get(latest_version)
+        profile_name = jvm.select_profile(jvm.parse_profile_selection(args.jvm_profile), latest_version,
+                                          info.base if info is not None else None)
+        if profile_name is not None:
+            try:
+                jvm_profiles = jvm.load_profiles()
+            except ValueError as e:
+                ui.error(str(e))
+            if profile_name not in jvm_profiles:
+                ui.error(f"Unknown JVM profile \"{profile_name}\". Profiles: {', '.join(jvm_profiles)}")
+            java_major = jvm.java_version(launch_options.get("executablePath") or planner.plan(latest_version).java)
+            launch_options["jvmArguments"] = jvm.jvm_arguments(jvm_profiles[profile_name], java_major,
+                                                               args.instances)
+            logger.info(f"Using JVM profile {profile_name} for java {java_major}: "
+                        f"{' '.join(launch_options['jvmArguments'])}")
+    minecraft_command = planner.plan(latest_version, launch_options).command(login_data)
+
+    cds_archive = None
+    if args.cds:
+        from .cds import CdsArchive, MIN_JAVA_VERSION
+        from .jvm import java_version
+
+        java_major = java_version(minecraft_command[0])
+        if java_major is None or java_major < MIN_JAVA_VERSION:
+            logger.warning(f"Class data archives need java {MIN_JAVA_VERSION} or newer, not using one")
+        else:
+            cds_archive = CdsArchive(minecraft_directory, latest_version,
+                                     planner.plan(latest_version, launch_options).classpath, minecraft_command[0])
+            minecraft_command[1:1] = cds_archive.arguments()
 
+    command_span.stop()
+    progress.close()
+    game_starting()
     logger.debug(f"Running command: {' '.join(minecraft_command)}")
 
     def announce(message):
@@ -322,11 +551,52 @@ def launch(gui: bool = False, args=None):
 
     # Start Minecraft
     announce("Starting minecraft")
-    logpipe = LogPipe(java_logger)
-
-    # noinspection PyTypeChecker
-    with subprocess.Popen(minecraft_command, stdout=logpipe, stderr=logpipe) as _:
-        logpipe.close()
+    runs = []
+
+    def start_minecraft():
+        log_store = None
+        if args.log_store:
+            from .logstore import LogStore
+
+            log_store = LogStore().open(args.log_store)
+            logger.info(f"Writing game output to {log_store.directory}")
+        milestones = None
+        if args.timing_report is not None:
+            from .milestones import MilestoneTracker
+
+            info = catalog.get(latest_version)
+            milestones = MilestoneTracker(
+                # Restarts are timed from when they start
+                launch_started if not runs else None, args.timing_report or None,
+                {"version": latest_version, "base": info.base if info else None,
+                 "loader": info.loader if info else None, "jvm_profile": profile_name,
+                 "cds": cds_archive.exists if cds_archive else None, "run": len(runs) + 1},
+                echo=True)
+        runs.append(milestones)
+        logpipe = LogPipe(java_logger, store=log_store, milestones=milestones)
+        try:
+            with span("spawn"):
+                # noinspection PyTypeChecker
+                process = subprocess.Popen(minecraft_command, stdout=logpipe, stderr=logpipe)
+        finally:
+            logpipe.close()
+        if milestones is not None:
+            milestones.mark("process_started")
+        return process
+
+    from .supervisor import Supervisor
+
+    monitor_interval = args.monitor_interval
+    if monitor_interval is None and args.metrics_file:
+        monitor_interval = 5
+    supervisor = Supervisor(start_minecraft, game_directory=launch_options.get("gameDirectory", minecraft_directory),
+                            interval=monitor_interval, metrics_file=args.metrics_file,
+                            restarts=args.restart_on_crash)
+    with span("game"):
+        returncode = supervisor.run()
+    if cds_archive is not None:
+        cds_archive.finish(returncode)
+    return returncode
 
 
 if __name__ == "__main__":
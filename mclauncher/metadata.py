@@ -0,0 +1,237 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import get_data_directory
+
+__all__ = ("MetadataCache", "OfflineError", "DEFAULT_URLS", "DEFAULT_TTLS")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URLS = {
+    "version_manifest": "https://launchermeta.mojang.com/mc/game/version_manifest.json",
+    "fabric_game_versions": "https://meta.fabricmc.net/v2/versions/game",
+    "fabric_loader_versions": "https://meta.fabricmc.net/v2/versions/loader",
+    "fabric_profile": "https://meta.fabricmc.net/v2/versions/loader/{game_version}/{loader_version}/profile/json",
+    "fabric_server_profile": "https://meta.fabricmc.net/v2/versions/loader/{game_version}/{loader_version}/server/"
+                             "json",
+    "forge_maven_metadata": "https://files.minecraftforge.net/maven/net/minecraftforge/forge/maven-metadata.xml",
+    "java_runtimes": "https://launchermeta.mojang.com/v1/products/java-runtime/"
+                     "2ec0cc96c44e5a76b9c8b7c39df7210883d12871/all.json",
+}
+
+# How many seconds each resource is used without asking the server whether it changed
+DEFAULT_TTLS = {
+    "version_manifest": 10 * 60,
+    "fabric_game_versions": 60 * 60,
+    "fabric_loader_versions": 60 * 60,
+    # A released loader's profile never changes
+    "fabric_profile": float("inf"),
+    "fabric_server_profile": float("inf"),
+    "forge_maven_metadata": 60 * 60,
+    "java_runtimes": 24 * 60 * 60,
+}
+
+
+class OfflineError(Exception):
+    """Raised when a resource is needed in offline mode but was never cached."""
+
+
+class MetadataCache:
+    """
+    On-disk cache for the version manifest and mod loader metadata. Resources are reused until their TTL expires,
+    then revalidated with a conditional request (``If-None-Match``/``If-Modified-Since``), so unchanged resources
+    aren't downloaded again.
+
+    Parameters
+    -----------
+    directory: Optional[:class:`str`]
+        Where to store the cached resources. Defaults to ``cache/metadata`` in the data directory.
+    offline: :class:`bool`
+        Never touch the network, resolve everything from the cache.
+    urls: Optional[Dict[:class:`str`, :class:`str`]]
+        Overrides for :data:`DEFAULT_URLS`.
+    ttls: Optional[Dict[:class:`str`, :class:`float`]]
+        Overrides for :data:`DEFAULT_TTLS`.
+    """
+
+    def __init__(self, directory: Optional[str] = None, offline: bool = False, urls: Optional[Dict[str, str]] = None,
+                 ttls: Optional[Dict[str, float]] = None) -> None:
+        self.directory = directory or os.path.join(get_data_directory(), "cache", "metadata")
+        self.offline = offline
+        self.urls = {**DEFAULT_URLS, **(urls or {})}
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._memory: Dict[str, Tuple[object, float]] = {}
+        self._session = None
+
+    @property
+    def session(self):
+        """The :class:`requests.Session` used for all requests, so connections are reused."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.directory, key + ".body"), os.path.join(self.directory, key + ".meta")
+
+    def _store(self, path: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url: str, ttl: float = 0) -> bytes:
+        """
+        Return the body of ``url``, from the cache if possible.
+
+        Parameters
+        -----------
+        url: :class:`str`
+            The resource to fetch.
+        ttl: :class:`float`
+            How old, in seconds, the cached copy may be before it is revalidated.
+
+        Returns
+        --------
+        :class:`bytes`
+            The body of the resource.
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            meta, body = None, None
+
+        if self.offline:
+            if body is None:
+                raise OfflineError(f"{url} is not cached, can't fetch it in offline mode")
+            return body
+        if body is not None and time.time() - meta["fetched_at"] < ttl:
+            logger.debug(f"Using cached {url}")
+            return body
+
+        import requests
+
+        headers = {}
+        if body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=30)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if body is None:
+                raise
+            logger.warning(f"Failed to revalidate {url}, using the cached copy: {e}")
+            return body
+
+        if response.status_code == 304:
+            logger.debug(f"{url} not modified")
+            meta["fetched_at"] = time.time()
+        else:
+            logger.debug(f"Downloaded {url}")
+            body = response.content
+            meta = {"url": url, "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"), "fetched_at": time.time()}
+            self._store(body_path, body)
+        self._store(meta_path, json.dumps(meta).encode())
+        return body
+
+    def get(self, name: str, parse=json.loads):
+        """
+        Fetch one of the named resources in :attr:`urls` and parse it. The parsed copy is kept for the resource's TTL
+        (for good if it has none), so a cache object that lives across launches still sees new versions.
+        """
+        ttl = self.ttls.get(name, 0)
+        entry = self._memory.get(name)
+        if entry is None or (ttl and time.monotonic() - entry[1] >= ttl):
+            entry = self._memory[name] = (parse(self.fetch(self.urls[name], ttl)), time.monotonic())
+        return entry[0]
+
+    def get_latest_version(self) -> Dict[str, str]:
+        """The latest release and snapshot, like :func:`minecraft_launcher_lib.utils.get_latest_version`."""
+        return self.get("version_manifest")["latest"]
+
+    def get_version_list(self) -> List[Dict[str, str]]:
+        """All versions Mojang offers, as they appear in the version manifest."""
+        return self.get("version_manifest")["versions"]
+
+    def get_version_url(self, version: str) -> Optional[str]:
+        """The URL of the version JSON of ``version``, or ``None`` if Mojang doesn't offer it."""
+        for i in self.get_version_list():
+            if i["id"] == version:
+                return i["url"]
+        return None
+
+    def is_version_valid(self, version: str, minecraft_directory: str) -> bool:
+        """Whether ``version`` is installed or can be downloaded."""
+        if os.path.isdir(os.path.join(minecraft_directory, "versions", version)):
+            return True
+        return self.get_version_url(version) is not None
+
+    def list_forge_versions(self) -> List[str]:
+        """All forge versions, newest first."""
+        return self.get("forge_maven_metadata",
+                        lambda body: re.findall("(?<=<version>).*?(?=</version>)", body.decode()))
+
+    def find_forge_version(self, vanilla_version: str) -> Optional[str]:
+        """The newest forge version for ``vanilla_version``, or ``None`` if forge doesn't support it."""
+        for i in self.list_forge_versions():
+            if i.split("-")[0] == vanilla_version:
+                return i
+        return None
+
+    def is_fabric_version_supported(self, version: str) -> bool:
+        """Whether fabric supports the Minecraft version ``version``."""
+        return any(i["version"] == version for i in self.get("fabric_game_versions"))
+
+    def get_latest_fabric_loader_version(self) -> str:
+        """The newest fabric loader version."""
+        return self.get("fabric_loader_versions")[0]["version"]
+
+    def get_fabric_profile(self, game_version: str, loader_version: str, server: bool = False) -> Dict[str, Any]:
+        """
+        The version JSON of fabric loader ``loader_version`` for ``game_version``, like fabric's installer writes, or
+        the server's if ``server`` is set.
+        """
+        name = "fabric_server_profile" if server else "fabric_profile"
+        url = self.urls[name].format(game_version=game_version, loader_version=loader_version)
+        return json.loads(self.fetch(url, self.ttls.get(name, 0)))
@@ -0,0 +1,141 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import datetime
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = ("MILESTONES", "MilestoneTracker")
+
+logger = logging.getLogger(__name__)
+
+# Log lines that mark how far the game got, in the order they usually appear
+MILESTONES: Tuple[Tuple[str, str], ...] = (
+    ("window", r"Backend library: LWJGL|LWJGL Version|Created display"),
+    # Logged when the reload starts, the game logs nothing when it finishes: the texture atlas and sound engine lines
+    # below come from the last part of it
+    ("resource_reload_start", r"Reloading ResourceManager"),
+    ("texture_atlas", r"Created: \d+x\d+x\d+ minecraft:textures/atlas/blocks"),
+    ("sound_engine", r"Sound engine started"),
+    ("server_done", r"Done \((?P<seconds>[\d.]+)s\)!"),
+    ("world_join", r"joined the game|logged in with entity id|Connecting to [^,]+, \d+"),
+)
+
+
+class MilestoneTracker:
+    """
+    Watches game output for startup milestones (see :data:`MILESTONES`) and times them against the start of the
+    launch. Only the first occurrence of each counts; once all of them, or joining a world, have been seen, lines
+    are no longer matched. Pass it to :class:`~mclauncher.pipe.LogPipe`, which closes it when the game exits:
+    :meth:`close` logs (or prints) the report and appends it to ``report_file`` as a JSON line.
+
+    Parameters
+    -----------
+    started: Optional[:class:`float`]
+        When the launch started, as a :func:`time.time` timestamp. Defaults to now.
+    report_file: Optional[:class:`str`]
+        Append the report to this file.
+    context: Optional[Dict[:class:`str`, Any]]
+        Extra fields for the report, such as the version, loader and JVM profile.
+    echo: :class:`bool`
+        Print the report instead of logging it.
+    """
+
+    # Milestones come from INFO lines, which the logger may not show
+    level = logging.INFO
+
+    def __init__(self, started: Optional[float] = None, report_file: Optional[str] = None,
+                 context: Optional[Dict[str, Any]] = None, echo: bool = False) -> None:
+        self.started = time.time() if started is None else started
+        self.report_file = report_file
+        self.context = dict(context or {})
+        self.echo = echo
+        self.milestones: Dict[str, float] = {}
+        self.details: Dict[str, Dict[str, str]] = {}
+        self._pattern = re.compile("|".join(f"(?P<{name}>{pattern.replace('(?P<', f'(?P<{name}_')})"
+                                            for name, pattern in MILESTONES))
+        self._done = False
+
+    def mark(self, name: str, timestamp: Optional[float] = None) -> None:
+        """Record a milestone the launcher itself knows about, such as starting the process."""
+        if name not in self.milestones:
+            self.milestones[name] = (time.time() if timestamp is None else timestamp) - self.started
+
+    def write(self, records: List[logging.LogRecord]) -> None:
+        if self._done:
+            return
+        search = self._pattern.search
+        for record in records:
+            match = search(record.getMessage())
+            if match is None:
+                continue
+            name = match.lastgroup
+            if name not in self.milestones:
+                self.mark(name, record.created)
+                details = {key[len(name) + 1:]: value for key, value in match.groupdict().items()
+                           if key.startswith(name + "_") and value is not None}
+                if details:
+                    self.details[name] = details
+                logger.debug(f"Reached {name} after {self.milestones[name]:.2f}s")
+            if "world_join" in self.milestones or len(self.milestones) >= len(MILESTONES):
+                self._done = True
+                return
+
+    def report(self) -> Dict[str, Any]:
+        """The timing report: the context, and the seconds from the start of the launch to each milestone."""
+        report: Dict[str, Any] = {
+            "launched_at": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            **self.context,
+            "milestones": {name: round(seconds, 3)
+                           for name, seconds in sorted(self.milestones.items(), key=lambda item: item[1])},
+        }
+        if "server_done" in self.details:
+            report["server_reported_seconds"] = float(self.details["server_done"]["seconds"])
+        return report
+
+    def format(self) -> str:
+        """The report as text."""
+        report = self.report()
+        lines = [f"Launch timings ({', '.join(f'{k}: {v}' for k, v in report.items() if k != 'milestones')})"]
+        for name, seconds in report["milestones"].items():
+            lines.append(f"  {name:<16} {seconds:8.2f}s")
+        if not report["milestones"]:
+            lines.append("  no milestones reached")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        if self.echo:
+            print(self.format())
+        else:
+            logger.info(self.format())
+        if self.report_file:
+            directory = os.path.dirname(self.report_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.report_file, "a") as f:
+                f.write(json.dumps(self.report()) + "\n")
@@ -0,0 +1,307 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import selectors
+import subprocess
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, IO, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .logstore import LogStore
+from .pipe import LogParser, LogPipe, LogSink, consumer_level
+
+__all__ = ("InstanceSpec", "Instance", "OutputReader", "launch_many", "offline_login_data")
+
+logger = logging.getLogger(__name__)
+
+
+class InstanceSpec(NamedTuple):
+    """
+    One game instance to launch.
+
+    Attributes
+    -----------
+    name: :class:`str`
+        A unique name, used for the instance's logger (``minecraft.<name>``) and log store.
+    version: :class:`str`
+        The version to launch.
+    game_directory: Optional[:class:`str`]
+        The instance's game directory. Defaults to ``instances/<name>`` in the minecraft directory, so instances
+        don't share options and saves.
+    account: Optional[:class:`str`]
+        The stored account to play as.
+    username: Optional[:class:`str`]
+        Play as this name in offline mode instead of using an account, e.g. for bots on a local server.
+    jvm_arguments: Tuple[:class:`str`, ...]
+        Extra JVM arguments.
+    jvm_profile: Optional[:class:`str`]
+        The JVM tuning profile, see :mod:`mclauncher.jvm`.
+    java: Optional[:class:`str`]
+        Run this command instead of the version's java executable.
+    """
+    name: str
+    version: str
+    game_directory: Optional[str] = None
+    account: Optional[str] = None
+    username: Optional[str] = None
+    jvm_arguments: Tuple[str, ...] = ()
+    jvm_profile: Optional[str] = None
+    java: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InstanceSpec":
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown instance fields: {', '.join(sorted(unknown))}")
+        if "name" not in data or "version" not in data:
+            raise ValueError("Instances need a name and a version")
+        if data.get("account") and data.get("username"):
+            raise ValueError(f"{data['name']}: use either an account or an offline username")
+        return cls(**{**data, "jvm_arguments": tuple(data.get("jvm_arguments", ()))})
+
+    def options(self, minecraft_directory: str, jvm_arguments: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        The options for :meth:`~mclauncher.command.CommandPlanner.plan`, with ``jvm_arguments`` (from a JVM profile)
+        before the instance's own.
+        """
+        options: Dict[str, Any] = {
+            "gameDirectory": self.game_directory or os.path.join(minecraft_directory, "instances", self.name)}
+        jvm_arguments = list(jvm_arguments) + list(self.jvm_arguments)
+        if jvm_arguments:
+            options["jvmArguments"] = jvm_arguments
+        return options
+
+
+def offline_login_data(username: str) -> Dict[str, str]:
+    """Login data for playing as ``username`` in offline mode, with the UUID the server derives for it."""
+    digest = hashlib.md5(f"OfflinePlayer:{username}".encode()).digest()
+    return {"username": username, "uuid": uuid.UUID(bytes=digest, version=3).hex, "token": "0"}
+
+
+class Instance:
+    """
+    A game process started by :func:`launch_many`.
+
+    Parameters
+    -----------
+    name: :class:`str`
+        The instance name.
+    command: List[:class:`str`]
+        The command to run.
+    cwd: Optional[:class:`str`]
+        The working directory. Created if it doesn't exist.
+    env: Optional[Dict[:class:`str`, :class:`str`]]
+        The environment. Defaults to this process's.
+    """
+
+    def __init__(self, name: str, command: List[str], cwd: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None) -> None:
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.logger = logging.getLogger(f"minecraft.{name}")
+        self.process: Optional[subprocess.Popen] = None
+        self.returncode: Optional[int] = None
+        self.error: Optional[OSError] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return f"<Instance name={self.name!r} returncode={self.returncode!r}>"
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class OutputReader(threading.Thread):
+    """
+    Reads the output pipes of any number of processes on one thread, using :mod:`selectors`, and sends the parsed
+    records to a :class:`~mclauncher.pipe.LogSink`. Pipes can be added while it runs.
+
+    Parameters
+    -----------
+    sink: :class:`~mclauncher.pipe.LogSink`
+        Where the records go.
+    """
+
+    chunk_size = LogPipe.chunk_size
+
+    def __init__(self, sink: LogSink) -> None:
+        super().__init__(name="mclauncher-output", daemon=True)
+        self.sink = sink
+        self._selector = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = os.pipe()
+        self._pending: "queue.Queue[Tuple[IO[bytes], tuple]]" = queue.Queue()
+        self._stopping = False
+
+    def add(self, file: IO[bytes], parser: LogParser, consumers: Sequence = (),
+            on_close: Optional[Callable[[], None]] = None) -> None:
+        """
+        Read ``file`` until it ends, passing the records to ``consumers`` as well (see
+        :class:`~mclauncher.pipe.LogSink`), then close it and them and call ``on_close`` from the reader thread.
+        """
+        self._pending.put((file, (parser, consumers, on_close)))
+        os.write(self._wake_write, b"\0")
+
+    def stop(self) -> None:
+        """Stop once every pipe has ended."""
+        self._stopping = True
+        os.write(self._wake_write, b"\0")
+
+    def _close(self, file: IO[bytes], parser: LogParser, consumers: Sequence,
+               on_close: Optional[Callable[[], None]]) -> None:
+        self._selector.unregister(file)
+        file.close()
+        self.sink.put(parser.flush(), consumers)
+        self.sink.close(consumers)
+        if on_close is not None:
+            on_close()
+
+    def run(self) -> None:
+        selector, sink, read, chunk_size = self._selector, self.sink, os.read, self.chunk_size
+        selector.register(self._wake_read, selectors.EVENT_READ, None)
+        try:
+            while not (self._stopping and len(selector.get_map()) == 1 and self._pending.empty()):
+                for key, _ in selector.select():
+                    if key.data is None:
+                        read(self._wake_read, 4096)
+                        while not self._pending.empty():
+                            file, data = self._pending.get_nowait()
+                            selector.register(file, selectors.EVENT_READ, data)
+                        continue
+                    parser, consumers, on_close = key.data
+                    try:
+                        data = read(key.fd, chunk_size)
+                    except OSError:
+                        data = b""
+                    if data:
+                        sink.put(parser.feed(data), consumers)
+                    else:
+                        self._close(key.fileobj, parser, consumers, on_close)
+        finally:
+            selector.close()
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+
+def launch_many(instances: Iterable[Instance], max_running: Optional[int] = None,
+                log_store: Optional[LogStore] = None) -> List[Instance]:
+    """
+    Run game instances concurrently, at most ``max_running`` at a time, and wait for all of them to exit. The output
+    of every instance is logged to its own logger by a single :class:`OutputReader` thread (on Windows, where pipes
+    can't be selected, each instance gets a :class:`~mclauncher.pipe.LogPipe` instead).
+
+    Parameters
+    -----------
+    instances: Iterable[:class:`Instance`]
+        The instances to run, started in order.
+    max_running: Optional[:class:`int`]
+        How many instances can run at once. Defaults to no limit.
+    log_store: Optional[:class:`~mclauncher.logstore.LogStore`]
+        Keep each instance's output in this store, under its name.
+
+    Returns
+    --------
+    List[:class:`Instance`]
+        The instances, with their exit codes.
+    """
+    sink = LogSink()
+    sink.start()
+    reader = None if os.name == "nt" else OutputReader(sink)
+    if reader is not None:
+        reader.start()
+    done: "queue.Queue[Instance]" = queue.Queue()
+    started: List[Instance] = []
+    running = 0
+
+    def finish(instance: Instance) -> None:
+        instance.returncode = instance.process.wait()
+        instance.finished = time.monotonic()
+        log = logger.info if instance.returncode == 0 else logger.warning
+        log(f"{instance.name} exited with code {instance.returncode} after {instance.duration:.1f}s")
+
+    def start(instance: Instance) -> bool:
+        store = log_store.open(instance.name) if log_store is not None else None
+        consumers = (store,) if store is not None else ()
+        parser = LogParser(instance.logger, consumer_level(consumers))
+        if instance.cwd:
+            os.makedirs(instance.cwd, exist_ok=True)
+        pipe = None
+        if reader is None:
+            pipe = LogPipe(instance.logger, sink, store)
+        try:
+            instance.process = subprocess.Popen(instance.command, cwd=instance.cwd, env=instance.env,
+                                                stdout=pipe or subprocess.PIPE, stderr=pipe or subprocess.STDOUT)
+        except OSError as e:
+            logger.error(f"Could not start {instance.name}: {e}")
+            instance.error = e
+            if pipe is not None:
+                pipe.close()
+            elif store is not None:
+                store.close()
+            return False
+        instance.started = time.monotonic()
+        logger.info(f"Started {instance.name} (pid {instance.process.pid})")
+        if pipe is not None:
+            pipe.close()
+
+            def wait():
+                instance.process.wait()
+                pipe.join()
+                done.put(instance)
+
+            threading.Thread(target=wait, daemon=True).start()
+        else:
+            reader.add(instance.process.stdout, parser, consumers, lambda: done.put(instance))
+        return True
+
+    try:
+        for instance in instances:
+            started.append(instance)
+            while max_running and running >= max_running:
+                finish(done.get())
+                running -= 1
+            if start(instance):
+                running += 1
+        while running:
+            finish(done.get())
+            running -= 1
+    finally:
+        for instance in started:
+            if instance.process is not None and instance.process.poll() is None:
+                instance.process.terminate()
+        if reader is not None:
+            reader.stop()
+            reader.join()
+        sink.stop()
+    return started
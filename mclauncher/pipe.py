@@ -23,12 +23,162 @@ SOFTWARE.
 """
 
 import logging
-import re
-import threading
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueListener
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .utils import inherit_context
+
+__all__ = ("LogPipe", "LogParser", "LogSink", "consumer_level")
+
+# Levels log4j uses that the logging module doesn't know
+_EXTRA_LEVELS = {"TRACE": 5, "FATAL": logging.CRITICAL}
+
+
+class LogParser:
+    """
+    Turns raw game output into :class:`logging.LogRecord` objects. Lines are split at the bytes level and the log4j
+    prefix (``[12:34:56] [Render thread/INFO]: message``) is parsed with plain slicing instead of a regex.
+
+    Parameters
+    -----------
+    logger: :class:`logging.Logger`
+        The logger the records are made for.
+    level: Optional[:class:`int`]
+        Also make records at or above this level when the logger ignores them, for consumers such as a log store.
+    """
+
+    def __init__(self, logger: logging.Logger, level: Optional[int] = None) -> None:
+        self.logger = logger
+        self.store_level = logging.CRITICAL + 1 if level is None else level
+        self._buffer = b""
+        self._levels: Dict[bytes, int] = {}
+        self._templates: Dict[int, dict] = {}
+
+    def level(self, name: bytes) -> int:
+        """The logging level for a log4j level name, cached."""
+        level = self._levels.get(name)
+        if level is None:
+            text = name.decode("ascii", "replace")
+            level = _EXTRA_LEVELS.get(text, logging.getLevelName(text))
+            if not isinstance(level, int):
+                level = logging.INFO
+            self._levels[name] = level
+        return level
+
+    def parse_line(self, line: bytes) -> Optional[logging.LogRecord]:
+        """Make a record for one line of output, or ``None`` if the logger ignores its level."""
+        if line[-1:] == b"\r":
+            line = line[:-1]
+        # [hh:mm:ss] [thread/LEVEL]: message
+        if line[:1] == b"[" and line[9:12] == b"] [":
+            end = line.find(b"]: ", 12)
+            slash = line.rfind(b"/", 12, end) if end != -1 else -1
+            if slash != -1:
+                name = line[slash + 1:end]
+                level = self._levels.get(name) or self.level(name)
+                if level < self.store_level and not self.logger.isEnabledFor(level):
+                    return None
+                return self.make_record(level, (line[12:slash] + b" - " + line[end + 3:]).decode("utf-8", "replace"))
+        if logging.INFO < self.store_level and not self.logger.isEnabledFor(logging.INFO):
+            return None
+        return self.make_record(logging.INFO, "Java - " + line.decode("utf-8", "replace"))
+
+    def make_record(self, level: int, message: str) -> logging.LogRecord:
+        """
+        Make a record for :attr:`logger`. :meth:`logging.Logger.makeRecord` looks up the thread, process and so on
+        for every record, which costs more than parsing the line does; here that's done once per level and copied.
+        """
+        template = self._templates.get(level)
+        if template is None:
+            template = vars(self.logger.makeRecord(self.logger.name, level, "(minecraft)", 0, "", None, None))
+            self._templates[level] = template
+        record = logging.LogRecord.__new__(logging.LogRecord)
+        record.__dict__.update(template)
+        record.msg = message
+        record.created = created = time.time()
+        record.msecs = (created - int(created)) * 1000
+        record.relativeCreated = template["relativeCreated"] + (created - template["created"]) * 1000
+        return record
+
+    def feed(self, data: bytes) -> List[logging.LogRecord]:
+        """Parse a chunk of output. Incomplete lines are kept until the rest arrives."""
+        lines = (self._buffer + data).split(b"\n") if self._buffer else data.split(b"\n")
+        self._buffer = lines.pop()
+        records = []
+        for line in lines:
+            record = self.parse_line(line)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def flush(self) -> List[logging.LogRecord]:
+        """Parse whatever is left of an unterminated last line."""
+        line, self._buffer = self._buffer, b""
+        record = self.parse_line(line) if line else None
+        return [record] if record is not None else []
+
+
+def consumer_level(consumers: Sequence) -> Optional[int]:
+    """The lowest level any of ``consumers`` wants records for, for :class:`LogParser`."""
+    return min((consumer.level for consumer in consumers), default=None)
+
+
+class LogSink(QueueListener):
+    """
+    Hands records to their loggers on a separate thread, in batches, so slow handlers never hold up reading the
+    game's output.
 
-logging.basicConfig(level=0,
-                    format="%(asctime)s [%(levelname)s] (%(name)s): %(message)s")
+    Batches can also go to consumers, objects with a ``level`` attribute (the lowest level they want), a
+    ``write(records)`` method and a ``close()`` method, such as a :class:`~mclauncher.logstore.LogWriter`. They get
+    every record the parser made for them, including ones the logger ignores.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(queue.Queue())
+        self._inherit = None
+
+    def start(self) -> None:
+        # Records are handled in the context of whoever started the sink, see inherit_context()
+        self._inherit = inherit_context()
+        super().start()
+
+    def put(self, records: List[logging.LogRecord], consumers: Sequence = ()) -> None:
+        """Queue a batch of records, to be logged and passed to ``consumers``."""
+        if records:
+            self.queue.put_nowait((records, consumers))
+
+    def close(self, consumers: Sequence) -> None:
+        """Close ``consumers`` once every batch queued before has been passed to them."""
+        if consumers:
+            self.queue.put_nowait((None, consumers))
+
+    def handle(self, item: Tuple[Optional[List[logging.LogRecord]], Sequence]) -> None:
+        if self._inherit is not None:
+            self._inherit()
+            self._inherit = None
+        records, consumers = item
+        for consumer in consumers:
+            try:
+                if records is None:
+                    consumer.close()
+                else:
+                    consumer.write(records)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"{type(consumer).__name__} failed: {e!r}")
+        if records is None:
+            return
+        loggers: Dict[str, logging.Logger] = {}
+        for record in records:
+            logger = loggers.get(record.name)
+            if logger is None:
+                logger = loggers[record.name] = logging.getLogger(record.name)
+            # With consumers, the parser may also make records below the logger's level
+            if not consumers or logger.isEnabledFor(record.levelno):
+                logger.handle(record)
 
 
 class LogPipe(threading.Thread):
@@ -36,23 +186,40 @@ class LogPipe(threading.Thread):
     Credits to https://stackoverflow.com/a/61111999 for the original implementation of this.
     """
 
-    def __init__(self, logger: logging.Logger) -> None:
+    # How much output to read at once
+    chunk_size = 64 * 1024
+
+    def __init__(self, logger: logging.Logger, sink: Optional[LogSink] = None, store=None, milestones=None,
+                 consumers: Sequence = ()) -> None:
         """
-        Initialize the object as a mock PIPE that logs to :param:`logger` in :meth:`.write`. For use with
-        :class:`subprocess.Popen`. 
+        Initialize the object as a mock PIPE that logs the output written to it to :param:`logger`. For use with
+        :class:`subprocess.Popen`.
 
         Parameters
         -----------
         logger: :class:`logging.Logger`
             The logger to use in this object.
+        sink: Optional[:class:`LogSink`]
+            Where to send the records. By default the pipe runs a sink of its own.
+        store: Optional[:class:`~mclauncher.logstore.LogWriter`]
+            Also keep every line in this log store. It is closed when the pipe is.
+        milestones: Optional[:class:`~mclauncher.milestones.MilestoneTracker`]
+            Also look for startup milestones in the output. It is closed when the pipe is.
+        consumers: Sequence
+            Other consumers of the records (see :class:`LogSink`), such as
+            :class:`~mclauncher.server.ServerMetrics`. They are closed when the pipe is.
         """
         super().__init__()
         self.daemon = False
         self.fdRead, self.fdWrite = os.pipe()
-        self.pipeReader = os.fdopen(self.fdRead)
-        self.start()
         self.logger = logger
-        self.regex = re.compile(r"^\[(?:\d{2}:){2}\d{2}] \[(?P<name>.+)/(?P<level>[A-Z]+)]: (?P<message>.+)", re.DOTALL)
+        self.consumers = tuple(consumer for consumer in (store, milestones, *consumers) if consumer is not None)
+        self.parser = LogParser(logger, consumer_level(self.consumers))
+        self._own_sink = sink is None
+        self.sink = sink or LogSink()
+        if self._own_sink:
+            self.sink.start()
+        self.start()
 
     def fileno(self):
         """Return the write file descriptor of the pipe"""
@@ -60,19 +227,20 @@ class LogPipe(threading.Thread):
 
     def run(self):
         """Run the thread, logging everything."""
-        for line in iter(self.pipeReader.readline, ''):
-            match = re.search(self.regex, line.strip("\n"))
-            if match:
-                name, level, message = match.groups()
-            else:
-                name, level, message = "Java", "INFO", line
-
-            message = f"{name} - {message}"
-
-            level = logging.getLevelName(level)
-            self.logger.log(level, message)
-
-        self.pipeReader.close()
+        read, parser, sink, consumers = os.read, self.parser, self.sink, self.consumers
+        fd, chunk_size = self.fdRead, self.chunk_size
+        try:
+            while True:
+                data = read(fd, chunk_size)
+                if not data:
+                    break
+                sink.put(parser.feed(data), consumers)
+            sink.put(parser.flush(), consumers)
+        finally:
+            os.close(fd)
+            sink.close(consumers)
+            if self._own_sink:
+                self.sink.stop()
 
     def close(self):
         """Close the write end of the pipe."""
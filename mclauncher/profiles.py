@@ -0,0 +1,162 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import shlex
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+__all__ = ("LauncherProfile", "ProfileIndex")
+
+logger = logging.getLogger(__name__)
+
+
+class LauncherProfile(NamedTuple):
+    """A profile from the official launcher's ``launcher_profiles.json``, without its icon."""
+    id: str
+    name: str
+    type: str
+    last_version_id: Optional[str]
+    game_dir: Optional[str]
+    java_dir: Optional[str]
+    java_args: Optional[str]
+    resolution: Optional[List[int]]
+    last_used: str
+
+    @classmethod
+    def from_dict(cls, profile_id: str, data: Dict[str, Any]) -> "LauncherProfile":
+        resolution = data.get("resolution")
+        if isinstance(resolution, dict) and "width" in resolution and "height" in resolution:
+            resolution = [int(resolution["width"]), int(resolution["height"])]
+        else:
+            resolution = None
+        return cls(profile_id, data.get("name") or profile_id, data.get("type", "custom"), data.get("lastVersionId"),
+                   data.get("gameDir"), data.get("javaDir"), data.get("javaArgs"), resolution,
+                   data.get("lastUsed", ""))
+
+    def version(self, latest: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        The version the profile launches. The launcher's own ``latest-release`` and ``latest-snapshot`` profiles are
+        resolved with ``latest``, the ``latest`` entry of the version manifest.
+        """
+        version = self.last_version_id or self.type
+        if version in ("latest-release", "latest-snapshot"):
+            return latest.get(version.split("-")[1]) if latest else None
+        return version
+
+    def launch_options(self) -> Dict[str, Any]:
+        """The profile's settings as options for :meth:`mclauncher.command.CommandPlanner.plan`."""
+        options: Dict[str, Any] = {}
+        if self.game_dir:
+            options["gameDirectory"] = os.path.expanduser(self.game_dir)
+        if self.java_dir:
+            options["executablePath"] = os.path.expanduser(self.java_dir)
+        if self.java_args:
+            options["jvmArguments"] = shlex.split(self.java_args, posix=os.name != "nt")
+        if self.resolution:
+            options["customResolution"] = True
+            options["resolutionWidth"], options["resolutionHeight"] = (str(n) for n in self.resolution)
+        return options
+
+
+class ProfileIndex:
+    """
+    Index of the profiles in a ``.minecraft`` directory's ``launcher_profiles.json``, by name and by version. The file
+    is only parsed when its size or mtime changed: the index (without the icons, which make up most of the file) is
+    kept next to it.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory.
+    """
+
+    filename = "mclauncher_profiles.json"
+
+    def __init__(self, minecraft_directory: str) -> None:
+        self.minecraft_directory = str(minecraft_directory)
+        self.profiles_path = os.path.join(self.minecraft_directory, "launcher_profiles.json")
+        self.cache_path = os.path.join(self.minecraft_directory, self.filename)
+        self._stamp = None
+        self.profiles: Dict[str, LauncherProfile] = {}
+        self._by_name: Dict[str, LauncherProfile] = {}
+        self._by_version: Dict[str, LauncherProfile] = {}
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+            self._stamp = data["stamp"]
+            self.profiles = {profile_id: LauncherProfile(*fields) for profile_id, fields in data["profiles"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self._stamp = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Pick up changes to ``launcher_profiles.json`` since the index was built."""
+        try:
+            stat = os.stat(self.profiles_path)
+            stamp = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp and (self._by_name or not self.profiles):
+            return
+        if stamp != self._stamp:
+            self.profiles = {}
+            if stamp is not None:
+                logger.debug(f"Parsing {self.profiles_path}")
+                try:
+                    with open(self.profiles_path, "r", encoding="utf-8") as f:
+                        profiles = json.load(f).get("profiles") or {}
+                    self.profiles = {profile_id: LauncherProfile.from_dict(profile_id, data)
+                                     for profile_id, data in profiles.items() if isinstance(data, dict)}
+                except (ValueError, AttributeError):
+                    logger.warning(f"Ignoring invalid launcher profiles {self.profiles_path}")
+            self._stamp = stamp
+            try:
+                tmp_path = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump({"stamp": stamp, "profiles": self.profiles}, f)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                logger.debug(f"Couldn't save the profile index: {e}")
+        self._build()
+
+    def _build(self) -> None:
+        self._by_name = {}
+        self._by_version = {}
+        # Most recently used last, so it wins when several profiles share a name or version
+        for profile in sorted(self.profiles.values(), key=lambda p: p.last_used):
+            self._by_name[profile.id] = profile
+            self._by_name[profile.name.lower()] = profile
+            if profile.last_version_id:
+                self._by_version[profile.last_version_id] = profile
+
+    def get(self, name: str) -> Optional[LauncherProfile]:
+        """The profile with this id or name (not case sensitive), or ``None``."""
+        return self._by_name.get(name) or self._by_name.get(name.lower())
+
+    def for_version(self, version: str) -> Optional[LauncherProfile]:
+        """The most recently used profile launching exactly ``version``, or ``None``."""
+        return self._by_version.get(version)
@@ -0,0 +1,187 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, TextIO
+
+__all__ = ("Progress", "ProgressTask")
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressTask:
+    """
+    One task reporting to a :class:`Progress`. :attr:`callback` is the callback dict
+    :mod:`minecraft_launcher_lib` and :class:`~mclauncher.download.Downloader` take, so the task can be handed to them
+    directly.
+    """
+
+    def __init__(self, progress: "Progress", name: str) -> None:
+        self.progress = progress
+        self.name = name
+        self.status = ""
+        self.value = 0
+        self.maximum = 0
+        self.done = False
+        self.failed = False
+        self._quarter = 0
+
+    @property
+    def callback(self) -> Dict[str, Callable]:
+        return {"setStatus": self.set_status, "setProgress": self.set_progress, "setMax": self.set_max}
+
+    def set_status(self, status: str) -> None:
+        self.status = str(status)
+        self.value = self.maximum = 0
+        self.progress.update(self, True)
+
+    def set_progress(self, value: int) -> None:
+        self.value = value
+        self.progress.update(self)
+
+    def set_max(self, maximum: int) -> None:
+        self.maximum = maximum
+        self.value = 0
+        self._quarter = 0
+        self.progress.update(self)
+
+    def finish(self, status: Optional[str] = None) -> None:
+        """Mark the task as done, with a last status."""
+        self.done = True
+        self.value = self.maximum = 0
+        self.status = status or self.status
+        self.progress.update(self, True)
+
+    def fail(self, status: str) -> None:
+        """Mark the task as done because it failed."""
+        self.failed = True
+        self.finish(status)
+
+    def format(self) -> str:
+        text = f"{self.name}: {self.status}"
+        if self.maximum:
+            text += f" {self.value}/{self.maximum} ({self.value * 100 // self.maximum}%)"
+        return text
+
+
+class Progress:
+    """
+    Reports the progress of tasks that run at the same time, like installing the game while the user logs in, in one
+    place. On a terminal, all running tasks share one status line that is redrawn at most every ``interval`` seconds
+    as they progress, and a task's last status is written out when it's done. Otherwise every status change is
+    written on its own line, and progress every quarter of the way.
+
+    Parameters
+    -----------
+    stream: Optional[TextIO]
+        Where to write. Defaults to stdout.
+    interval: :class:`float`
+        The least number of seconds between two progress updates.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, interval: float = 0.2) -> None:
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.tasks: List[ProgressTask] = []
+        self.live = bool(getattr(self.stream, "isatty", lambda: False)())
+        self._lock = threading.RLock()
+        self._last_update = 0.0
+        self._line_length = 0
+        self._paused = False
+
+    def task(self, name: str, status: str = "") -> ProgressTask:
+        """Start reporting a new task."""
+        task = ProgressTask(self, name)
+        with self._lock:
+            self.tasks.append(task)
+        if status:
+            task.set_status(status)
+        return task
+
+    def update(self, task: ProgressTask, changed: bool = False) -> None:
+        """Called by ``task`` when it changed; ``changed`` means its status changed rather than just its progress."""
+        with self._lock:
+            if changed:
+                logger.debug(task.format())
+            if self.live:
+                now = time.monotonic()
+                if not changed and now - self._last_update < self.interval and task.value != task.maximum:
+                    return
+                self._last_update = now
+                if task.done:
+                    self.write(task.format())
+                elif not self._paused:
+                    self._redraw()
+                return
+            if not changed:
+                if not task.maximum or task.value * 4 // task.maximum <= task._quarter:
+                    return
+                task._quarter = task.value * 4 // task.maximum
+            self.stream.write(task.format() + "\n")
+            self.stream.flush()
+
+    def _redraw(self) -> None:
+        line = " | ".join(task.format() for task in self.tasks if not task.done)
+        self.stream.write("\r" + line.ljust(self._line_length))
+        self._line_length = len(line)
+        self.stream.flush()
+
+    def _clear(self) -> None:
+        if self.live and self._line_length:
+            self.stream.write("\r" + " " * self._line_length + "\r")
+            self.stream.flush()
+            self._line_length = 0
+
+    def write(self, text: str) -> None:
+        """Write a line of text without it getting mixed up with the status line."""
+        with self._lock:
+            self._clear()
+            self.stream.write(text + "\n")
+            if self.live and not self._paused:
+                self._redraw()
+            self.stream.flush()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Stop drawing while the user is asked something."""
+        with self._lock:
+            self._clear()
+            self._paused = True
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused = False
+                if self.live:
+                    self._redraw()
+
+    def close(self) -> None:
+        """Clear the status line."""
+        with self._lock:
+            self._clear()
+            self.tasks = []
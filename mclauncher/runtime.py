@@ -0,0 +1,366 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import glob
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .download import Downloader, DownloadTask
+from .install import InstallError
+from .utils import get_data_directory
+
+__all__ = ("JavaRuntime", "RuntimeManager", "probe_java", "java_requirement", "runtime_platform",
+           "DEFAULT_REQUIREMENT")
+
+logger = logging.getLogger(__name__)
+
+# What versions without a javaVersion (everything before 1.17) run on
+DEFAULT_REQUIREMENT = {"component": "jre-legacy", "majorVersion": 8}
+
+_cache_lock = threading.Lock()
+
+
+class JavaRuntime(NamedTuple):
+    """A java installation."""
+    path: str
+    major: int
+    version: str
+    arch: Optional[str]
+    # Where it was found: "mojang", "JAVA_HOME", "system" or "PATH"
+    source: str = ""
+    # The Mojang runtime component, e.g. java-runtime-gamma, for runtimes in the runtime directory
+    component: Optional[str] = None
+
+
+def runtime_platform() -> str:
+    """The name Mojang's runtime manifest uses for this platform."""
+    machine = platform.machine().lower()
+    bits = platform.architecture()[0]
+    if sys.platform == "win32":
+        if machine in ("arm64", "aarch64"):
+            return "windows-arm64"
+        return "windows-x86" if bits == "32bit" else "windows-x64"
+    if sys.platform == "darwin":
+        return "mac-os-arm64" if machine in ("arm64", "aarch64") else "mac-os"
+    return "linux-i386" if bits == "32bit" else "linux"
+
+
+def _host_arch() -> str:
+    machine = platform.machine().lower()
+    return {"x86_64": "amd64", "amd64": "amd64", "arm64": "aarch64", "aarch64": "aarch64", "i386": "x86",
+            "i686": "x86", "x86": "x86"}.get(machine, machine)
+
+
+def _parse_version(output: str):
+    match = re.search(r"^\s*java\.version = (\S+)", output, re.MULTILINE) or \
+        re.search(r'version "([^"]+)"', output)
+    if not match:
+        return None, None
+    version = match.group(1)
+    parts = re.match(r"(\d+)(?:\.(\d+))?", version)
+    if not parts:
+        return None, None
+    major = int(parts.group(1))
+    if major == 1 and parts.group(2):
+        major = int(parts.group(2))
+    return major, version
+
+
+def probe_java(java: str, cache_path: Optional[str] = None, source: str = "",
+               component: Optional[str] = None) -> Optional[JavaRuntime]:
+    """
+    Find out the version and architecture of a java executable, or return ``None`` if it can't be run. Results are
+    cached by path and invalidated when the executable's size or modification time changes, so each installation is
+    only started once.
+
+    Parameters
+    -----------
+    java: :class:`str`
+        The executable, or a name to look up on the ``PATH``.
+    cache_path: Optional[:class:`str`]
+        The cache file. Defaults to ``cache/java_runtimes.json`` in the data directory.
+    source: :class:`str`
+        Stored in :attr:`JavaRuntime.source`.
+    component: Optional[:class:`str`]
+        Stored in :attr:`JavaRuntime.component`.
+
+    Returns
+    --------
+    Optional[:class:`JavaRuntime`]
+        The runtime.
+    """
+    path = shutil.which(java) or java
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    cache_path = cache_path or os.path.join(get_data_directory(), "cache", "java_runtimes.json")
+    with _cache_lock:
+        try:
+            with open(cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    entry = cache.get(path)
+    if entry is None or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+        try:
+            result = subprocess.run([path, "-XshowSettings:properties", "-version"], stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, timeout=30)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not run {path}: {e}")
+            return None
+        output = result.stdout.decode("utf-8", "replace")
+        major, version = _parse_version(output)
+        if major is None:
+            logger.warning(f"Could not tell the version of {path}")
+            return None
+        arch = re.search(r"^\s*os\.arch = (\S+)", output, re.MULTILINE)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "major": major, "version": version,
+                 "arch": arch.group(1) if arch else None}
+        with _cache_lock:
+            try:
+                with open(cache_path, "r") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            cache[path] = entry
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, cache_path)
+    return JavaRuntime(path, entry["major"], entry["version"], entry["arch"], source, component)
+
+
+def java_requirement(minecraft_directory: str, version: str) -> Optional[Dict[str, Any]]:
+    """
+    The ``javaVersion`` of an installed version (e.g. ``{"component": "java-runtime-gamma", "majorVersion": 17}``),
+    looked up through the versions it inherits from. ``None`` if no version in the chain has one.
+    """
+    seen = set()
+    while version is not None and version not in seen:
+        seen.add(version)
+        try:
+            with open(os.path.join(minecraft_directory, "versions", version, version + ".json"), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "javaVersion" in data:
+            return data["javaVersion"]
+        version = data.get("inheritsFrom")
+    return None
+
+
+def _system_patterns() -> List[str]:
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        roots = [os.environ.get(name) for name in ("ProgramFiles", "ProgramFiles(x86)", "ProgramW6432")]
+        return [os.path.join(root, vendor, "*", "bin", "java.exe") for root in filter(None, roots)
+                for vendor in ("Java", "Eclipse Adoptium", "Eclipse Foundation", "Microsoft", "Zulu", "BellSoft",
+                               "Amazon Corretto")]
+    if sys.platform == "darwin":
+        return ["/Library/Java/JavaVirtualMachines/*/Contents/Home/bin/java",
+                os.path.join(home, "Library", "Java", "JavaVirtualMachines", "*", "Contents", "Home", "bin", "java")]
+    return ["/usr/lib/jvm/*/bin/java", "/usr/lib64/jvm/*/bin/java", "/usr/java/*/bin/java", "/opt/java/*/bin/java",
+            "/opt/jdk*/bin/java", os.path.join(home, ".sdkman", "candidates", "java", "*", "bin", "java"),
+            os.path.join(home, ".jdks", "*", "bin", "java")]
+
+
+class RuntimeManager:
+    """
+    Finds java installations and picks the one a version needs. Installations are found in the ``runtime``
+    directory (Mojang's runtime components), ``JAVA_HOME``, the usual system JDK locations and the ``PATH``, and each
+    one is probed once (see :func:`probe_java`). Missing Mojang runtime components are installed from their
+    manifests, all files at once.
+
+    Parameters
+    -----------
+    minecraft_directory: :class:`str`
+        The ``.minecraft`` directory, whose ``runtime`` directory holds the Mojang runtimes.
+    metadata: Optional[:class:`~mclauncher.metadata.MetadataCache`]
+        Used to fetch the runtime manifests. Defaults to a new one.
+    downloader: Optional[:class:`~mclauncher.download.Downloader`]
+        Downloads runtime files. Defaults to one with 8 workers.
+    cache_path: Optional[:class:`str`]
+        The probe cache, see :func:`probe_java`.
+    search_patterns: Optional[List[:class:`str`]]
+        Glob patterns of system java executables. Defaults to the usual locations on this platform.
+    """
+
+    def __init__(self, minecraft_directory: str, metadata=None, downloader: Optional[Downloader] = None,
+                 cache_path: Optional[str] = None, search_patterns: Optional[List[str]] = None) -> None:
+        self.minecraft_directory = str(minecraft_directory)
+        self.metadata = metadata
+        self.downloader = downloader
+        self.cache_path = cache_path
+        self.search_patterns = _system_patterns() if search_patterns is None else search_patterns
+        self.platform = runtime_platform()
+        self._runtimes: Optional[List[JavaRuntime]] = None
+
+    def component_directory(self, component: str) -> str:
+        return os.path.join(self.minecraft_directory, "runtime", component, self.platform, component)
+
+    def component_java(self, component: str) -> Optional[str]:
+        """The java executable of an installed Mojang runtime component, or ``None``."""
+        base = self.component_directory(component)
+        for path in (os.path.join(base, "bin", "java"), os.path.join(base, "bin", "java.exe"),
+                     os.path.join(base, "jre.bundle", "Contents", "Home", "bin", "java")):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def discover(self, refresh: bool = False) -> List[JavaRuntime]:
+        """Every java installation that could be found, Mojang's runtimes first."""
+        if self._runtimes is not None and not refresh:
+            return self._runtimes
+        candidates = []
+        runtime_directory = os.path.join(self.minecraft_directory, "runtime")
+        if os.path.isdir(runtime_directory):
+            for component in sorted(os.listdir(runtime_directory)):
+                java = self.component_java(component)
+                if java is not None:
+                    candidates.append((java, "mojang", component))
+        java_home = os.environ.get("JAVA_HOME")
+        if java_home:
+            candidates.append((os.path.join(java_home, "bin", "java.exe" if sys.platform == "win32" else "java"),
+                               "JAVA_HOME", None))
+        for pattern in self.search_patterns:
+            candidates.extend((path, "system", None) for path in sorted(glob.glob(pattern)))
+        on_path = shutil.which("java")
+        if on_path:
+            candidates.append((on_path, "PATH", None))
+
+        runtimes = []
+        seen = set()
+        for path, source, component in candidates:
+            real_path = os.path.realpath(path)
+            if real_path in seen or not os.path.isfile(real_path):
+                continue
+            seen.add(real_path)
+            runtime = probe_java(path, self.cache_path, source, component)
+            if runtime is not None:
+                runtimes.append(runtime)
+        self._runtimes = runtimes
+        logger.debug(f"Found java runtimes: {', '.join(f'{r.path} ({r.version})' for r in runtimes) or 'none'}")
+        return runtimes
+
+    def select(self, requirement: Optional[Dict[str, Any]] = None) -> Optional[JavaRuntime]:
+        """
+        Pick the runtime for a version's ``javaVersion``: the Mojang component it names, otherwise an installation of
+        the same major version, preferring this machine's architecture. Versions from java 17 on also run on newer
+        java, so the closest newer one is used if there's no exact match. ``None`` means none fits.
+        """
+        requirement = requirement or DEFAULT_REQUIREMENT
+        component = requirement.get("component")
+        major = requirement.get("majorVersion")
+        # Looked up directly rather than in the discovered runtimes, which may predate its install
+        java = self.component_java(component) if component else None
+        runtime = probe_java(java, self.cache_path, "mojang", component) if java else None
+        if runtime is not None:
+            return runtime
+        runtimes = self.discover()
+        host = _host_arch()
+
+        def preference(runtime: JavaRuntime):
+            return runtime.arch not in (None, host), runtime.major
+
+        exact = [runtime for runtime in runtimes if runtime.major == major]
+        if exact:
+            return min(exact, key=preference)
+        if major is not None and major >= 17:
+            newer = [runtime for runtime in runtimes if runtime.major > major]
+            if newer:
+                return min(newer, key=preference)
+        return None
+
+    def install(self, component: str) -> JavaRuntime:
+        """
+        Install a Mojang runtime component (e.g. ``java-runtime-gamma``), downloading all its files in parallel.
+
+        Raises
+        -------
+        :class:`~mclauncher.install.InstallError`
+            Mojang has no such component for this platform, or the installed java can't be run.
+        """
+        if self.metadata is None:
+            from .metadata import MetadataCache
+
+            self.metadata = MetadataCache()
+        entries = self.metadata.get("java_runtimes").get(self.platform, {}).get(component)
+        if not entries:
+            raise InstallError(f"There is no {component} java runtime for {self.platform}")
+        # The manifest URLs contain the manifest's hash, so they never change
+        files = json.loads(self.metadata.fetch(entries[0]["manifest"]["url"], float("inf")))["files"]
+        base = self.component_directory(component)
+        logger.info(f"Installing java runtime {component} ({len(files)} files)")
+        tasks, links, executables = [], [], []
+        for name, entry in files.items():
+            path = os.path.join(base, *name.split("/"))
+            if entry["type"] == "directory":
+                os.makedirs(path, exist_ok=True)
+            elif entry["type"] == "file":
+                raw = entry["downloads"]["raw"]
+                tasks.append(DownloadTask(raw["url"], path, sha1=raw.get("sha1"), size=raw.get("size")))
+                if entry.get("executable"):
+                    executables.append(path)
+            elif entry["type"] == "link":
+                links.append((path, entry["target"]))
+        (self.downloader or Downloader()).download(tasks)
+        for path in executables:
+            os.chmod(path, os.stat(path).st_mode | 0o111)
+        for path, target in links:
+            if not os.path.lexists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    os.symlink(target, path)
+                except OSError as e:
+                    logger.debug(f"Could not link {path} to {target}: {e}")
+        with open(os.path.join(os.path.dirname(base), ".version"), "w") as f:
+            f.write(entries[0]["version"]["name"])
+        self._runtimes = None
+        java = self.component_java(component)
+        runtime = probe_java(java, self.cache_path, "mojang", component) if java else None
+        if runtime is None:
+            raise InstallError(f"The {component} java runtime was installed, but its java can't be run")
+        return runtime
+
+    def ensure(self, requirement: Optional[Dict[str, Any]] = None, install: bool = True) -> Optional[JavaRuntime]:
+        """Like :meth:`select`, but install the Mojang component first if it's missing and ``install`` is set."""
+        requirement = requirement or DEFAULT_REQUIREMENT
+        component = requirement.get("component")
+        if install and component and self.component_java(component) is None:
+            try:
+                return self.install(component)
+            except InstallError as e:
+                logger.warning(f"{e}, looking for another java")
+        return self.select(requirement)
@@ -0,0 +1,274 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .download import DownloadTask
+from .install import Installer, InstallError
+from .utils import run_in_thread
+
+__all__ = ("ServerLaunch", "ServerInstaller", "ServerMetrics", "ServerConsole", "accept_eula")
+
+logger = logging.getLogger(__name__)
+
+_LAG = re.compile(r"Can't keep up! Is the server overloaded\? Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")
+_DONE = re.compile(r"Done \((?P<seconds>[\d.]+)s\)!")
+_TICKS_PER_SECOND = 20
+
+
+class ServerLaunch(NamedTuple):
+    """An installed dedicated server and how to start it."""
+    id: str
+    jar: str
+    # The javaVersion of the Minecraft version, if it has one
+    java: Optional[Dict[str, Any]]
+    # Everything after java and the JVM flags
+    arguments: List[str]
+
+    def command(self, java: str, jvm_arguments: Sequence[str] = ()) -> List[str]:
+        """The command starting the server with ``java``."""
+        return [java, *jvm_arguments, *self.arguments]
+
+
+class ServerInstaller:
+    """
+    Installs dedicated servers. The server jar is downloaded next to the client jar, into the ``versions`` directory
+    of the ``.minecraft`` directory, so every server directory shares it and it goes through the shared store like
+    any other download. Fabric servers run from the library cache, see
+    :meth:`~mclauncher.fabric.FabricInstaller.install_server`.
+
+    Parameters
+    -----------
+    installer: :class:`~mclauncher.install.Installer`
+        The ``.minecraft`` directory to install into, with the metadata cache and downloader to use.
+    """
+
+    def __init__(self, installer: Installer) -> None:
+        self.installer = installer
+
+    def jar_path(self, version: str) -> str:
+        return os.path.join(self.installer.path, "versions", version, f"{version}-server.jar")
+
+    def install(self, version: str, fabric_loader: Optional[str] = None) -> ServerLaunch:
+        """
+        Install the server of ``version``, optionally with fabric loader ``fabric_loader``, and its java runtime.
+
+        Raises
+        -------
+        :class:`~mclauncher.install.InstallError`
+            The version has no server, or its jar or java runtime is missing in offline mode.
+        :class:`~mclauncher.metadata.OfflineError`
+            The fabric server profile isn't cached in offline mode.
+        """
+        data = self.installer.load_version(version)
+        server = data.get("downloads", {}).get("server")
+        if server is None:
+            raise InstallError(f"Version {version} has no dedicated server")
+        jar = self.jar_path(version)
+        requirement = data.get("javaVersion")
+        if self.installer.metadata.offline:
+            if not os.path.isfile(jar):
+                raise InstallError(f"The {version} server jar isn't downloaded, it can't be in offline mode")
+            from .runtime import RuntimeManager
+
+            # The same lookup the server is started with, so an installed JDK of the right version is enough
+            if requirement is not None and \
+                    RuntimeManager(self.installer.path, self.installer.metadata).select(requirement) is None:
+                raise InstallError(f"Java {requirement.get('majorVersion')} ({requirement.get('component')}) for the "
+                                   f"{version} server isn't installed, it can't be in offline mode")
+        else:
+            self.installer.downloader.download([DownloadTask(server["url"], jar, sha1=server.get("sha1"),
+                                                             size=server.get("size"))])
+            self.installer.install_runtime(data)
+        if fabric_loader is None:
+            return ServerLaunch(version, jar, requirement, ["-jar", jar, "nogui"])
+
+        from .fabric import FabricInstaller, fabric_version_id
+
+        main_class, classpath = FabricInstaller(self.installer).install_server(version, fabric_loader)
+        return ServerLaunch(fabric_version_id(version, fabric_loader), jar, requirement,
+                            [f"-Dfabric.gameJarPath={jar}", "-cp", os.pathsep.join(classpath), main_class, "nogui"])
+
+
+def accept_eula(directory: str) -> None:
+    """Agree to the Minecraft EULA (https://aka.ms/MinecraftEULA) for the server in ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "eula.txt"), "w") as f:
+        f.write(f"# Accepted through mclauncher on {time.strftime('%Y-%m-%d %H:%M:%S')}\neula=true\n")
+
+
+class ServerMetrics:
+    """
+    Watches dedicated server output for its startup time ("Done (12.345s)!") and for tick lag ("Can't keep up! ...
+    Running 2503ms or 50 ticks behind"), and works out the average ticks per second from the ticks the server
+    skipped. Each one is logged and, like :class:`~mclauncher.supervisor.Supervisor` events, appended to
+    ``metrics_file`` as a JSON line; a summary follows when the server exits. Pass it to
+    :class:`~mclauncher.pipe.LogPipe`, which closes it then.
+
+    Parameters
+    -----------
+    metrics_file: Optional[:class:`str`]
+        Append the metrics to this file.
+    name: :class:`str`
+        What to call the server in messages and metrics.
+    started: Optional[:class:`float`]
+        When the server was started, as a :func:`time.time` timestamp. Defaults to now.
+    """
+
+    # "Done" is logged at INFO
+    level = logging.INFO
+
+    def __init__(self, metrics_file: Optional[str] = None, name: str = "server",
+                 started: Optional[float] = None) -> None:
+        self.metrics_file = metrics_file
+        self.name = name
+        self.started = time.time() if started is None else started
+        self.ready: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+        self.lag_events = 0
+        self.ticks_behind = 0
+        self.ms_behind = 0
+        self.worst_ms = 0
+        self._metrics: Optional[IO[str]] = None
+        if metrics_file:
+            directory = os.path.dirname(metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._metrics = open(metrics_file, "a")
+
+    def _event(self, event: str, timestamp: float, **data: Any) -> None:
+        if self._metrics is not None:
+            self._metrics.write(json.dumps({"event": event, "name": self.name, "time": timestamp, **data}) + "\n")
+            self._metrics.flush()
+
+    def tps(self, now: Optional[float] = None) -> Optional[float]:
+        """Average ticks per second since the server was ready, ``None`` before that."""
+        if self.ready is None:
+            return None
+        uptime = (time.time() if now is None else now) - self.ready
+        if uptime <= 0:
+            return float(_TICKS_PER_SECOND)
+        return max(0.0, _TICKS_PER_SECOND - self.ticks_behind / uptime)
+
+    def write(self, records: List[logging.LogRecord]) -> None:
+        for record in records:
+            message = record.getMessage()
+            if "Can't keep up!" in message:
+                match = _LAG.search(message)
+                if match is None:
+                    continue
+                ms, ticks = int(match["ms"]), int(match["ticks"])
+                self.lag_events += 1
+                self.ticks_behind += ticks
+                self.ms_behind += ms
+                self.worst_ms = max(self.worst_ms, ms)
+                tps = self.tps(record.created)
+                logger.info(f"{self.name} is {ms} ms ({ticks} ticks) behind; {self.lag_events} lag spikes, "
+                            f"{self.ticks_behind} ticks skipped so far"
+                            + (f", {tps:.2f} TPS on average" if tps is not None else ""))
+                self._event("lag", record.created, behind_ms=ms, ticks=ticks, tps=tps)
+            elif self.ready is None and "Done (" in message:
+                match = _DONE.search(message)
+                if match is None:
+                    continue
+                self.ready = record.created
+                self.startup_seconds = float(match["seconds"])
+                wall = self.ready - self.started
+                logger.info(f"{self.name} started in {self.startup_seconds:.2f}s ({wall:.2f}s after launching)")
+                self._event("started", record.created, startup_seconds=self.startup_seconds, wall_seconds=wall)
+
+    def report(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """The metrics so far."""
+        now = time.time() if now is None else now
+        return {"startup_seconds": self.startup_seconds,
+                "uptime": round(now - self.ready, 3) if self.ready is not None else None,
+                "lag_events": self.lag_events, "ticks_behind": self.ticks_behind, "ms_behind": self.ms_behind,
+                "worst_ms": self.worst_ms, "tps": self.tps(now)}
+
+    def close(self) -> None:
+        now = time.time()
+        report = self.report(now)
+        if report["uptime"] is None:
+            logger.info(f"{self.name} stopped before it finished starting")
+        else:
+            logger.info(f"{self.name} ran {report['uptime']:.0f}s: {self.lag_events} lag spikes, "
+                        f"{self.ticks_behind} ticks skipped (worst {self.worst_ms} ms), {report['tps']:.2f} TPS "
+                        f"on average")
+        self._event("summary", now, **report)
+        if self._metrics is not None:
+            self._metrics.close()
+            self._metrics = None
+
+
+class ServerConsole:
+    """
+    Passes lines from ``stdin`` on to the running server as console commands, e.g. ``say hello`` or ``stop``. The
+    server may be restarted; lines go to whichever process was attached last.
+
+    Parameters
+    -----------
+    stdin: Optional[IO[:class:`str`]]
+        Where commands come from. Defaults to :data:`sys.stdin`.
+    """
+
+    def __init__(self, stdin: Optional[IO[str]] = None) -> None:
+        self.stdin = stdin
+        self.process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def attach(self, process: subprocess.Popen) -> None:
+        """Send commands to ``process`` (started with ``stdin=subprocess.PIPE``) from now on."""
+        with self._lock:
+            self.process = process
+            if not self._started:
+                self._started = True
+                run_in_thread("mclauncher-console", self._forward)
+
+    def send(self, command: str) -> bool:
+        """Send ``command`` to the server, returning whether it could be."""
+        with self._lock:
+            process = self.process
+        if process is None or process.poll() is not None:
+            return False
+        try:
+            process.stdin.write(command.rstrip("\n").encode() + b"\n")
+            process.stdin.flush()
+        except OSError:
+            return False
+        return True
+
+    def _forward(self) -> None:
+        stdin = self.stdin or sys.stdin
+        for line in iter(stdin.readline, ""):
+            if not self.send(line):
+                logger.warning(f"The server isn't running, dropped command {line.strip()!r}")
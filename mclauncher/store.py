@@ -0,0 +1,195 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional
+
+from .utils import get_data_directory
+
+__all__ = ("SharedStore",)
+
+logger = logging.getLogger(__name__)
+
+# ioctl request to clone a file's extents (FICLONE), supported by btrfs, xfs and others on Linux
+_FICLONE = 0x40049409
+
+
+def _reflink(source: str, destination: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+
+
+class SharedStore:
+    """
+    A content-addressed store for libraries, natives and assets, shared by any number of ``.minecraft``
+    directories. Objects are stored by sha1 and hardlinked into each directory (falling back to reflinks or copies),
+    so each file is downloaded and stored once per machine.
+
+    Directories using the store are registered with it. An object is referenced while the file index of a
+    registered directory lists its sha1, or while a hardlink to it exists; :meth:`gc` only removes objects that are
+    neither.
+
+    Parameters
+    -----------
+    root: Optional[:class:`str`]
+        Where the store lives. Defaults to ``store`` in the data directory.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or os.path.join(get_data_directory(), "store")
+        self.objects = os.path.join(self.root, "objects")
+        self._roots_path = os.path.join(self.root, "roots.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.objects, exist_ok=True)
+
+    def object_path(self, sha1: str) -> str:
+        return os.path.join(self.objects, sha1[:2], sha1)
+
+    def has(self, sha1: str) -> bool:
+        return os.path.isfile(self.object_path(sha1))
+
+    def add(self, path: str, sha1: str) -> None:
+        """Put the verified file at ``path`` into the store, sharing its data if possible."""
+        object_path = self.object_path(sha1)
+        if os.path.isfile(object_path):
+            return
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            if not _reflink(path, tmp_path):
+                shutil.copyfile(path, tmp_path)
+        # Objects are shared between directories, make sure nothing modifies them in place
+        os.chmod(tmp_path, 0o444 | (os.stat(path).st_mode & 0o111))
+        os.replace(tmp_path, object_path)
+
+    def link(self, sha1: str, destination: str) -> Optional[str]:
+        """
+        Place the object ``sha1`` at ``destination``, replacing whatever is there.
+
+        Returns
+        --------
+        Optional[:class:`str`]
+            How the file was placed (``"hardlink"``, ``"reflink"`` or ``"copy"``), or ``None`` if the object isn't in
+            the store.
+        """
+        object_path = self.object_path(sha1)
+        if not os.path.isfile(object_path):
+            return None
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp_path = f"{destination}.{threading.get_ident()}.link"
+        try:
+            os.link(object_path, tmp_path)
+            method = "hardlink"
+        except OSError:
+            if _reflink(object_path, tmp_path):
+                method = "reflink"
+            else:
+                shutil.copyfile(object_path, tmp_path)
+                method = "copy"
+        os.replace(tmp_path, destination)
+        return method
+
+    def roots(self) -> List[str]:
+        """The ``.minecraft`` directories registered with the store."""
+        try:
+            with open(self._roots_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_roots(self, roots: List[str]) -> None:
+        tmp_path = f"{self._roots_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sorted(set(roots)), f)
+        os.replace(tmp_path, self._roots_path)
+
+    def register(self, minecraft_directory: str) -> None:
+        """Record that ``minecraft_directory`` uses the store, so :meth:`gc` keeps its files."""
+        minecraft_directory = os.path.abspath(minecraft_directory)
+        with self._lock:
+            roots = self.roots()
+            if minecraft_directory not in roots:
+                self._write_roots(roots + [minecraft_directory])
+
+    def referenced(self) -> set:
+        """The sha1 of every object listed in the file index of a registered directory."""
+        from .fileindex import FileIndex
+
+        referenced = set()
+        roots = self.roots()
+        existing = [root for root in roots if os.path.isdir(root)]
+        if existing != roots:
+            logger.info(f"Unregistering {len(roots) - len(existing)} directories that no longer exist")
+            self._write_roots(existing)
+        for root in existing:
+            referenced.update(entry[2] for entry in FileIndex(root).files.values() if entry[2])
+        return referenced
+
+    def gc(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Remove objects no registered directory references and no hardlink points to.
+
+        Parameters
+        -----------
+        dry_run: :class:`bool`
+            Only count what would be removed.
+
+        Returns
+        --------
+        Dict[:class:`str`, :class:`int`]
+            The number of ``objects`` kept, ``removed`` and the ``bytes`` freed.
+        """
+        referenced = self.referenced()
+        stats = {"objects": 0, "removed": 0, "bytes": 0}
+        for prefix in os.listdir(self.objects):
+            prefix_path = os.path.join(self.objects, prefix)
+            for name in os.listdir(prefix_path):
+                path = os.path.join(prefix_path, name)
+                if name.endswith(".tmp"):
+                    continue
+                st = os.stat(path)
+                if name in referenced or st.st_nlink > 1:
+                    stats["objects"] += 1
+                    continue
+                stats["removed"] += 1
+                stats["bytes"] += st.st_size
+                if not dry_run:
+                    os.remove(path)
+        return stats
@@ -0,0 +1,225 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import glob
+import json
+import logging
+import os
+import subprocess
+import time
+from typing import Any, Callable, Dict, IO, List, NamedTuple, Optional
+
+__all__ = ("ProcessSample", "Supervisor", "read_process", "find_crash_reports")
+
+logger = logging.getLogger(__name__)
+
+_MIB = 1024 * 1024
+
+
+class ProcessSample(NamedTuple):
+    """Resource usage of a process at one point in time."""
+    time: float
+    pid: int
+    rss: int
+    peak_rss: int
+    cpu_time: float
+    cpu_percent: float
+    threads: int
+    fds: int
+
+
+def read_process(pid: int) -> Optional[Dict[str, Any]]:
+    """
+    Read the resource usage of ``pid`` from ``/proc``: resident and peak memory in bytes, user plus system CPU
+    time in seconds, and the thread and file descriptor counts. Returns ``None`` where there is no ``/proc`` or the
+    process has exited.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/status", "rb") as f:
+            status = f.read()
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return None
+    # The fields after the command name, which may itself contain spaces and parentheses; fields[0] is field 3
+    fields = stat[stat.rfind(b")") + 2:].split()
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    if fields[0] in (b"Z", b"X") or not rss:
+        # Exiting, or exited but not waited for yet
+        return None
+    peak_rss = 0
+    for line in status.splitlines():
+        if line.startswith(b"VmHWM:"):
+            peak_rss = int(line.split()[1]) * 1024
+            break
+    return {
+        "rss": rss,
+        "peak_rss": peak_rss,
+        "cpu_time": (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"),
+        "threads": int(fields[17]),
+        "fds": fds,
+    }
+
+
+def find_crash_reports(game_directory: str, since: float, pid: Optional[int] = None) -> List[str]:
+    """
+    Crash reports written to ``game_directory`` after ``since``: Minecraft's own ``crash-reports/*.txt``, and the
+    JVM's ``hs_err_pid<pid>.log`` if it crashed outright.
+    """
+    patterns = [os.path.join(game_directory, "crash-reports", "*.txt")]
+    if pid is not None:
+        patterns.append(os.path.join(game_directory, f"hs_err_pid{pid}.log"))
+    reports = []
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            try:
+                if os.stat(path).st_mtime >= since:
+                    reports.append(path)
+            except OSError:
+                pass
+    return sorted(reports)
+
+
+class Supervisor:
+    """
+    Runs the game and watches it: samples its memory, CPU, threads and file descriptors from ``/proc`` every
+    ``interval`` seconds, notices when it crashes (a non-zero exit code or a new crash report) and can start it
+    again, waiting :attr:`backoff` seconds before the first restart and twice as long before each one after.
+
+    Samples and events go to the logger and, as JSON lines, to ``metrics_file``.
+
+    Parameters
+    -----------
+    start: Callable[[], :class:`subprocess.Popen`]
+        Starts the game, once per run.
+    game_directory: Optional[:class:`str`]
+        Where to look for crash reports.
+    interval: Optional[:class:`float`]
+        Seconds between samples. ``None`` or 0 disables sampling.
+    metrics_file: Optional[:class:`str`]
+        Append samples and events to this file.
+    restarts: :class:`int`
+        How many times to restart after a crash.
+    name: :class:`str`
+        What to call the game in messages and metrics.
+    """
+
+    backoff = 2.0
+    max_backoff = 60.0
+    # A run this long resets the backoff
+    stable_after = 300.0
+
+    def __init__(self, start: Callable[[], subprocess.Popen], game_directory: Optional[str] = None,
+                 interval: Optional[float] = None, metrics_file: Optional[str] = None, restarts: int = 0,
+                 name: str = "minecraft") -> None:
+        self.start = start
+        self.game_directory = game_directory
+        self.interval = interval or None
+        self.metrics_file = metrics_file
+        self.restarts = restarts
+        self.name = name
+        self.samples: List[ProcessSample] = []
+        self._metrics: Optional[IO[str]] = None
+
+    def _event(self, event: str, **data: Any) -> None:
+        if self._metrics is not None:
+            self._metrics.write(json.dumps({"event": event, "name": self.name, "time": time.time(), **data}) + "\n")
+            self._metrics.flush()
+
+    def sample(self, process: subprocess.Popen, previous: Optional[ProcessSample] = None) -> Optional[ProcessSample]:
+        """Take a sample of ``process``, logging and recording it."""
+        usage = read_process(process.pid)
+        if usage is None:
+            return None
+        now = time.time()
+        cpu_percent = 0.0
+        if previous is not None and now > previous.time:
+            cpu_percent = (usage["cpu_time"] - previous.cpu_time) / (now - previous.time) * 100
+        sample = ProcessSample(now, process.pid, usage["rss"], usage["peak_rss"], usage["cpu_time"], cpu_percent,
+                               usage["threads"], usage["fds"])
+        self.samples.append(sample)
+        logger.info(f"{self.name}: {sample.rss / _MIB:.0f} MiB resident (peak {sample.peak_rss / _MIB:.0f} MiB), "
+                    f"{sample.cpu_percent:.0f}% CPU, {sample.threads} threads, {sample.fds} open files")
+        self._event("sample", **sample._asdict())
+        return sample
+
+    def _wait(self, process: subprocess.Popen) -> int:
+        if self.interval is None:
+            return process.wait()
+        previous = None
+        while True:
+            try:
+                return process.wait(timeout=self.interval)
+            except subprocess.TimeoutExpired:
+                previous = self.sample(process, previous) or previous
+
+    def run(self) -> int:
+        """Run the game until it exits cleanly or runs out of restarts, and return its last exit code."""
+        if self.metrics_file:
+            directory = os.path.dirname(self.metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._metrics = open(self.metrics_file, "a")
+        if self.interval is not None and read_process(os.getpid()) is None:
+            logger.warning("Resource sampling needs /proc, which this system doesn't have")
+            self.interval = None
+        try:
+            attempt = 0
+            delay = self.backoff
+            while True:
+                started = time.time()
+                process = self.start()
+                self._event("start", pid=process.pid, attempt=attempt)
+                try:
+                    returncode = self._wait(process)
+                except BaseException:
+                    process.terminate()
+                    process.wait()
+                    raise
+                runtime = time.time() - started
+                crash_reports = find_crash_reports(self.game_directory, started, process.pid) \
+                    if self.game_directory else []
+                peaks = [sample.peak_rss for sample in self.samples if sample.pid == process.pid]
+                self._event("exit", pid=process.pid, returncode=returncode, runtime=runtime,
+                            crash_reports=crash_reports, peak_rss=max(peaks) if peaks else None)
+                if peaks:
+                    logger.info(f"{self.name} used at most {max(peaks) / _MIB:.0f} MiB")
+                if returncode == 0 and not crash_reports:
+                    return 0
+                logger.error(f"{self.name} crashed with exit code {returncode} after {runtime:.0f}s"
+                             + "".join(f"\nCrash report: {report}" for report in crash_reports))
+                if attempt >= self.restarts:
+                    return returncode or 1
+                if runtime >= self.stable_after:
+                    delay = self.backoff
+                attempt += 1
+                logger.warning(f"Restarting {self.name} in {delay:.0f}s (restart {attempt} of {self.restarts})")
+                self._event("restart", attempt=attempt, delay=delay)
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        finally:
+            if self._metrics is not None:
+                self._metrics.close()
+                self._metrics = None
@@ -0,0 +1,220 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+__all__ = ("Timings", "timings", "collect", "span")
+
+
+class _NullSpan:
+    """What :func:`span` returns while timings are off: entering and leaving it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def begin(self) -> "_NullSpan":
+        return self
+
+    def stop(self) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed section of code, nested in the span that was open on the same thread when it started."""
+    __slots__ = ("name", "args", "start", "end", "thread", "parent", "_timings")
+
+    def __init__(self, timings: "Timings", name: str, args: Dict[str, Any]) -> None:
+        self._timings = timings
+        self.name = name
+        self.args = args
+        self.thread = threading.get_ident()
+        self.parent: Optional[Span] = None
+        self.start = self.end = 0.0
+
+    @property
+    def path(self) -> Tuple[str, ...]:
+        path = []
+        span: Optional[Span] = self
+        while span is not None:
+            path.append(span.name)
+            span = span.parent
+        return tuple(reversed(path))
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def begin(self) -> "Span":
+        stack = self._timings._stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        self.end = time.perf_counter()
+        stack = self._timings._stack()
+        if self in stack:
+            del stack[stack.index(self):]
+        self._timings._record(self)
+
+    def __enter__(self) -> "Span":
+        return self.begin()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+class Timings:
+    """
+    Collects :class:`Span` objects while enabled, and reports them as a phase breakdown (``text``), as ``json`` or
+    as a Chrome trace (``chrome``, for ``chrome://tracing`` or Perfetto). While disabled, :func:`span` hands out a
+    shared object that does nothing, so timed code costs one function call.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_names: Dict[int, str] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.spans = []
+        self.origin = time.perf_counter()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def _stack(self) -> List[Span]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if span.thread not in self._thread_names:
+                self._thread_names[span.thread] = threading.current_thread().name
+
+    def span(self, name: str, **args: Any):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def phases(self) -> List[Tuple[Tuple[str, ...], int, float]]:
+        """Total time and count per span path, in order of first appearance."""
+        totals: Dict[Tuple[str, ...], List[Any]] = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            entry = totals.setdefault(span.path, [0, 0.0])
+            entry[0] += 1
+            entry[1] += span.duration
+        return [(path, count, total) for path, (count, total) in totals.items()]
+
+    def report(self, format: str = "text") -> str:
+        """
+        The collected spans as ``text``, ``json`` or ``chrome``.
+
+        Parameters
+        -----------
+        format: :class:`str`
+            The format.
+
+        Returns
+        --------
+        :class:`str`
+            The report.
+        """
+        elapsed = time.perf_counter() - self.origin
+        if format == "text":
+            lines = [f"{'Phase':<44} {'Time':>10} {'%':>6} {'Count':>6}"]
+            for path, count, total in self.phases():
+                name = "  " * (len(path) - 1) + path[-1]
+                lines.append(f"{name:<44} {total:9.3f}s {total / elapsed * 100 if elapsed else 0:5.1f}% {count:6}")
+            lines.append(f"{'total':<44} {elapsed:9.3f}s")
+            return "\n".join(lines)
+        if format == "json":
+            return json.dumps({
+                "total": elapsed,
+                "phases": [{"path": list(path), "count": count, "total": total}
+                           for path, count, total in self.phases()],
+                "spans": [{"name": span.name, "path": list(span.path), "start": span.start - self.origin,
+                           "duration": span.duration, "thread": self._thread_names.get(span.thread),
+                           "args": span.args} for span in sorted(self.spans, key=lambda span: span.start)],
+            }, indent=2, default=str)
+        if format == "chrome":
+            pid = os.getpid()
+            thread_ids = {thread: i for i, thread in enumerate(self._thread_names, 1)}
+            events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_ids[thread],
+                       "args": {"name": name}} for thread, name in self._thread_names.items()]
+            for span in self.spans:
+                events.append({"name": span.name, "cat": span.path[0], "ph": "X", "pid": pid,
+                               "tid": thread_ids[span.thread], "ts": (span.start - self.origin) * 1e6,
+                               "dur": span.duration * 1e6, "args": {k: str(v) for k, v in span.args.items()}})
+            return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+        raise ValueError(f"Unknown timings format: {format}")
+
+
+# The timings of this process, unless a launch collects its own with collect()
+timings = Timings()
+_current: "contextvars.ContextVar[Timings]" = contextvars.ContextVar("mclauncher_timings", default=timings)
+
+
+@contextlib.contextmanager
+def collect(collector: Timings) -> Iterator[Timings]:
+    """
+    Send the spans of this thread, and of the threads it starts, to ``collector`` inside the block instead of
+    :data:`timings`. Lets launches that run at the same time in the daemon each time only their own work.
+    """
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+def span(name: str, **args: Any):
+    """
+    Time a section of code: ``with span("install", version=version): ...``. The keyword arguments are kept with the
+    span. Does nothing unless the current :class:`Timings` (:data:`timings`, or the one given to :func:`collect`) is
+    enabled.
+    """
+    return _current.get().span(name, **args)
@@ -21,13 +21,11 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-try:
-    from kivy.lang import Builder
-except ImportError:
-    pass  # Kivy is not installed. Doesn't matter though since we don't use it.
+
 
 def prep():
     from kivy.app import App
+    from kivy.lang import Builder
     from kivy.uix.widget import Widget
     from kivy.properties import ObjectProperty
 
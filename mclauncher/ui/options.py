@@ -79,6 +79,6 @@ max_verbosity = int(max(logging._levelToName.keys()) / 10)
 
 all_options.append(Option(name="manual auth", options=("-m",), flags=("--manual-auth",), action="store_true",
                           default=False,
-                          help="Manually visit and paste url for authentication. When false, the script will create a "
-                               "flask server on localhost, and automatically get the token after authenticating. "
+                          help="Manually visit and paste url for authentication. When false, the script will start a "
+                               "small server on localhost, and automatically get the token after authenticating. "
                                "Defaults to false."))
@@ -0,0 +1,220 @@
+"""
+MIT License
+
+Copyright (c) 2021-present BobDotCom
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional
+
+__all__ = ("get_data_directory", "run_in_thread", "inherit_context", "keep_resident", "resident", "on_game_start",
+           "game_starting", "on_log_level", "configure_logging", "link_file")
+
+# Objects kept between launches, see resident(). None unless a long-running process asked for it.
+_resident: Optional[Dict[Hashable, Any]] = None
+_resident_lock = threading.RLock()
+# Called right before the game starts, see on_game_start()
+_game_start: "contextvars.ContextVar[Optional[Callable[[], None]]]" = contextvars.ContextVar("mclauncher_game_start",
+                                                                                             default=None)
+# Takes over configure_logging(), see on_log_level()
+_log_level: "contextvars.ContextVar[Optional[Callable[[int], None]]]" = contextvars.ContextVar("mclauncher_log_level",
+                                                                                               default=None)
+
+
+def get_data_directory() -> str:
+    """
+    Returns the directory mclauncher keeps its own data (credentials, caches, logs) in, creating it if it doesn't
+    exist yet. The location can be overridden with the ``MCLAUNCHER_HOME`` environment variable.
+
+    Returns
+    --------
+    :class:`str`
+        The path to the data directory.
+    """
+    path = os.environ.get("MCLAUNCHER_HOME")
+    if not path:
+        if sys.platform == "win32":
+            path = os.path.join(os.getenv("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming")),
+                                "mclauncher")
+        elif sys.platform == "darwin":
+            path = os.path.join(os.path.expanduser("~"), "Library", "Application Support", "mclauncher")
+        else:
+            path = os.path.join(os.getenv("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share")),
+                                "mclauncher")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def run_in_thread(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Call ``func`` in a new daemon thread and return a future for its result. Unlike an executor's threads, the
+    thread doesn't keep the process alive if it is still waiting (e.g. for a browser login) when the launch fails.
+
+    Parameters
+    -----------
+    name: :class:`str`
+        The thread's name.
+    func: Callable
+        The function to call with ``args`` and ``kwargs``.
+
+    Returns
+    --------
+    :class:`concurrent.futures.Future`
+        The future.
+    """
+    future = Future()
+    inherit = inherit_context()
+
+    def run():
+        inherit()
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def inherit_context() -> Callable[[], None]:
+    """
+    Capture the calling thread's context variables and return a function that sets them in whatever thread calls it.
+    Threads mclauncher starts call it first (executors take it as their ``initializer``), so they run in the context of
+    the code that started them. The daemon relies on this to send each client the output of its own launch.
+    """
+    context = contextvars.copy_context()
+
+    def apply() -> None:
+        for var, value in context.items():
+            var.set(value)
+    return apply
+
+
+def keep_resident(enabled: bool = True) -> None:
+    """Make :func:`resident` keep objects between launches, for processes that launch more than once."""
+    global _resident
+    with _resident_lock:
+        _resident = {} if enabled else None
+
+
+def resident(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Return the object kept under ``key``, making it with ``factory`` first. Unless :func:`keep_resident` was called,
+    nothing is kept and this just calls ``factory``.
+
+    Parameters
+    -----------
+    key: Hashable
+        What the object is for, e.g. ``("catalog", minecraft_directory)``.
+    factory: Callable[[], Any]
+        Makes the object.
+    """
+    with _resident_lock:
+        if _resident is None:
+            return factory()
+        if key not in _resident:
+            _resident[key] = factory()
+        return _resident[key]
+
+
+@contextlib.contextmanager
+def on_game_start(callback: Callable[[], None]) -> Iterator[None]:
+    """
+    Have :func:`game_starting` call ``callback`` inside the block, in this thread and the threads it starts. The daemon
+    uses it to let other requests for the same minecraft directory in once a request has installed and planned its
+    launch, instead of after the game exits.
+    """
+    token = _game_start.set(callback)
+    try:
+        yield
+    finally:
+        _game_start.reset(token)
+
+
+def game_starting() -> None:
+    """Called by the commands right before they start the game or server, once nothing else is installed or planned."""
+    callback = _game_start.get()
+    if callback is not None:
+        callback()
+
+
+@contextlib.contextmanager
+def on_log_level(callback: Callable[[int], None]) -> Iterator[None]:
+    """
+    Have :func:`configure_logging` call ``callback`` with the level instead, inside the block, in this thread and the
+    threads it starts. The daemon uses it to give each request its own verbosity without touching the others'.
+    """
+    token = _log_level.set(callback)
+    try:
+        yield
+    finally:
+        _log_level.reset(token)
+
+
+def configure_logging(level: int, names: Optional[Iterable[str]] = None) -> None:
+    """
+    Log to stderr (unless logging was set up already) at ``level`` and above.
+
+    Parameters
+    -----------
+    level: :class:`int`
+        The level.
+    names: Optional[Iterable[:class:`str`]]
+        The loggers to set the level of. Defaults to all of them.
+    """
+    callback = _log_level.get()
+    if callback is not None:
+        callback(level)
+        return
+    # noinspection PyTypeChecker
+    logging.basicConfig(level=level, format="$asctime [$levelname] ($name): $message", style="$")
+    for name in logging.root.manager.loggerDict if names is None else names:
+        logging.getLogger(name).setLevel(level)
+
+
+def link_file(source: str, destination: str) -> None:
+    """
+    Put ``source`` at ``destination`` as a hardlink, or as a copy where hardlinks aren't possible (e.g. across file
+    systems). ``destination`` is replaced atomically.
+
+    Parameters
+    -----------
+    source: :class:`str`
+        The file to link.
+    destination: :class:`str`
+        Where to put it. Missing parent directories are created.
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
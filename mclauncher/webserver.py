@@ -22,61 +22,17 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import io
-import multiprocessing
+import logging
+import threading
 import time
+from concurrent.futures import CancelledError, Future, TimeoutError, wait
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Optional, Callable
+from urllib.parse import urlparse, parse_qs
 
-import requests
-import click
-
-from flask import Flask, request, current_app
-import logging
-
-
-def override_logger(log_level):
-    logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] (%(name)s): %(message)s")
-
-    global logger
-    logger = logging.getLogger(__name__)
-    logging.getLogger('werkzeug').setLevel(log_level)
-    loggers = [logging.getLogger(name) for name in logging.root.manager.loggerDict]
-    for logger in loggers:
-        logger.setLevel(log_level)
-
-    click_echo = click.echo
-    click_secho = click.secho
-
-    def secho(message=None, file=None, nl=True, err=False, color=None, **styles):
-        file = file or io.StringIO()
-        click_secho(message, file, nl, err, color, **styles)
-        logger.info(file.getvalue())
-        file.close()
-
-    def echo(message=None, file=None, nl=True, err=False, color=None):
-        file = file or io.StringIO()
-        click_echo(message, file, nl, err, color)
-        logger.info(file.getvalue())
-        file.close()
-
-    click.echo = echo
-    click.secho = secho
-
+from .timings import span
 
 logger = logging.getLogger(__name__)
-app = Flask(__name__)
-
-
-@app.after_request
-def response_processor(response):
-    @response.call_on_close
-    def process_after_request():
-        with app.app_context():
-            # noinspection PyUnresolvedReferences
-            current_app.f.put(True)
-
-    return response
-
 
 response_html = """<!DOCTYPE html>
 <html lang="en">
@@ -97,55 +53,134 @@ response_html = """<!DOCTYPE html>
 </html>"""
 
 
-@app.route("/")
-def recieve_code():
-    # noinspection PyUnresolvedReferences
-    current_app.q.put(request.args['code'])
-    return response_html
-
-
-def start_server(port: int, q: multiprocessing.Queue, f: multiprocessing.Queue,
-                 log_level: int) -> None:
-    override_logger(log_level)
-    with app.app_context():
-        current_app.q = q
-        current_app.f = f
-    app.run(port=port)
-
-
-def stop_server(p: multiprocessing.Process) -> None:
-    p.terminate()
-
-
-def run_server(when_ready: Optional[Callable[[], None]] = None, port: int = 5000, log_level: int = 30) -> str:
-    override_logger(log_level)
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Handles the redirect from the login page, passing the code to the server's future."""
+
+    server: "CallbackServer"
+
+    def do_GET(self):  # noqa: N802
+        query = parse_qs(urlparse(self.path).query)
+        if "code" not in query:
+            self.send_error(400, "Missing code")
+            return
+        body = response_html.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+        if not self.server.code.done():
+            self.server.code.set_result(query["code"][0])
+
+    def log_message(self, format, *args):  # noqa: A002
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class CallbackServer(HTTPServer):
+    """
+    A minimal HTTP server that waits for the login redirect. The socket is bound and listening as soon as the object
+    is created, so the browser can be opened right away.
+
+    Parameters
+    -----------
+    port: :class:`int`
+        The port to listen on. ``0`` picks a free one.
+    host: :class:`str`
+        The address to listen on.
+    """
+
+    # How often the serving thread checks whether it should stop, when no requests come in
+    timeout = 0.05
+
+    def __init__(self, port: int = 5000, host: str = "127.0.0.1") -> None:
+        super().__init__((host, port), CallbackHandler)
+        self.code: Future = Future()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def _serve(self) -> None:
+        # Unlike serve_forever, this exits as soon as the code has arrived instead of on the next poll
+        while not self.code.done() and not self._stopping.is_set():
+            self.handle_request()
+
+    def start(self) -> "CallbackServer":
+        """Start serving requests on a background thread."""
+        self._thread = threading.Thread(target=self._serve, name="mclauncher-auth-callback", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving, close the socket and wait for the background thread to exit."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> "CallbackServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def run_server(when_ready: Optional[Callable[[], None]] = None, port: int = 5000, log_level: int = 30,
+               timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> str:
+    """
+    Listen for the login redirect on ``localhost:port`` and return the code it carries.
+
+    Parameters
+    -----------
+    when_ready: Optional[Callable[[], None]]
+        Called once the server accepts connections, usually to open the login page.
+    port: :class:`int`
+        The port to listen on.
+    log_level: :class:`int`
+        The level to log the server's messages at.
+    timeout: Optional[:class:`float`]
+        How many seconds to wait for the code. Waits forever by default.
+    cancel: Optional[:class:`threading.Event`]
+        Stop waiting, and close the server, once this is set.
+
+    Returns
+    --------
+    :class:`str`
+        The authorization code.
+
+    Raises
+    -------
+    :class:`concurrent.futures.TimeoutError`
+        No code came within ``timeout``.
+    :class:`concurrent.futures.CancelledError`
+        ``cancel`` was set before the code came.
+    """
+    logger.setLevel(log_level)
     logger.info('Starting up webserver')
-    q = multiprocessing.Queue()
-    f = multiprocessing.Queue()
-    p = multiprocessing.Process(target=start_server, args=(port, q, f, log_level))
-    p.start()
-    logger.info('Webserver started up')
-    if when_ready is not None:
-        logger.info('Executing when_ready')
-        time.sleep(0.5)  # give the server a moment to start up
-        good = False
-        for _ in range(150):
-            try:
-                req = requests.get(f"http://localhost:{port}/")
-            except requests.exceptions.ConnectionError:
-                time.sleep(0.1)
+    with span("callback_server", port=port), CallbackServer(port) as server:
+        logger.info('Webserver started up')
+        if when_ready is not None:
+            logger.info('Executing when_ready')
+            with span("when_ready"):
+                when_ready()
+        logger.info("Waiting for code")
+        with span("wait_for_code"):
+            if cancel is None:
+                code = server.code.result(timeout)
             else:
-                if req.status_code == 400:
-                    good = True
-                    break
-        if not good:
-            raise RuntimeError("failed to connect to localhost")
-        when_ready()
-    logger.info("Waiting for code")
-    code = q.get(block=True)
-    logger.info("Received code")
-    logger.info("Shutting down webserver")
-    f.get(block=True)
-    stop_server(p)
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not wait([server.code], CallbackServer.timeout).done:
+                    if cancel.is_set():
+                        logger.info("Login cancelled")
+                        raise CancelledError("The login was cancelled")
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise TimeoutError(f"No login code within {timeout} seconds")
+                code = server.code.result()
+        logger.info("Received code")
+        logger.info("Shutting down webserver")
     logger.info('Webserver shut down')
     return code
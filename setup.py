@@ -79,7 +79,6 @@ setuptools.setup(
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
@@ -88,8 +87,11 @@ setuptools.setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
         'Topic :: Utilities',
         ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     install_requires=requirements,
+    extras_require={
+        'zstd': ['zstandard'],
+    },
     license='MIT',
     project_urls={
         'Documentation': 'https://mclauncher.readthedocs.io/en/latest/index.html',
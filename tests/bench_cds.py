@@ -0,0 +1,99 @@
+"""
+Measures time-to-main-menu of an installed version with and without a class data sharing archive: a few launches
+without one, a training run that makes it, and a few launches with it. Each launch is timed from starting java until
+the game logs that it reached the main menu, then the game is closed.
+
+This needs an installed version and java 13 or newer; login data is an offline placeholder, which is enough to get
+to the main menu. tests/fake_java.py can be passed as the java to check the script itself.
+
+Usage: python tests/bench_cds.py version [runs] [--minecraft-directory path] [--java path] [--marker regex]
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from mclauncher.cds import MIN_JAVA_VERSION, CdsArchive
+from mclauncher.command import CommandPlanner
+from mclauncher.jvm import java_version
+from mclauncher.multi import offline_login_data
+
+# Logged once the title screen's resources are loaded
+MAIN_MENU = r"Sound engine started|Created: \d+x\d+x\d+ minecraft:textures/atlas/blocks"
+
+
+def time_to_menu(command, marker, cwd, timeout=300):
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd)
+    elapsed = None
+    try:
+        deadline = start + timeout
+        for line in process.stdout:
+            if marker.search(line.decode("utf-8", "replace")):
+                elapsed = time.perf_counter() - start
+                break
+            if time.perf_counter() > deadline:
+                break
+    finally:
+        # A clean shutdown, so a training run dumps its archive
+        process.terminate()
+        try:
+            process.communicate(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+    if elapsed is None:
+        raise RuntimeError("The game exited or timed out before reaching the main menu")
+    return elapsed, process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-main-menu with and without a CDS archive.")
+    parser.add_argument("version")
+    parser.add_argument("runs", nargs="?", type=int, default=3)
+    parser.add_argument("--minecraft-directory", default=None)
+    parser.add_argument("--java", default=None, help="Use this java instead of the version's runtime.")
+    parser.add_argument("--marker", default=MAIN_MENU, help="Regex for the log line that means the menu is up.")
+    args = parser.parse_args()
+
+    import minecraft_launcher_lib
+
+    minecraft_directory = args.minecraft_directory or minecraft_launcher_lib.utils.get_minecraft_directory()
+    plan = CommandPlanner(minecraft_directory).plan(args.version)
+    command = plan.command(offline_login_data("Benchmark"))
+    if args.java:
+        command[0] = os.path.abspath(args.java) if os.path.exists(args.java) else args.java
+    major = java_version(command[0])
+    if args.java is None and (major is None or major < MIN_JAVA_VERSION):
+        parser.error(f"{command[0]} is java {major}, class data archives need {MIN_JAVA_VERSION} or newer")
+    marker = re.compile(args.marker)
+
+    directory = tempfile.mkdtemp()
+    try:
+        archive = CdsArchive(minecraft_directory, args.version, plan.classpath, command[0], directory=directory)
+
+        def launch(extra):
+            return time_to_menu(command[:1] + extra + command[1:], marker, minecraft_directory)
+
+        without = [launch([])[0] for _ in range(args.runs)]
+        training, returncode = launch(archive.arguments())
+        # Closed by us, so a non-zero code is expected; only a missing archive means training failed
+        if archive.finish(0 if os.path.isfile(archive.training_path) else returncode) is None:
+            parser.error("The training run didn't produce an archive")
+        archived = [launch(archive.arguments())[0] for _ in range(args.runs)]
+        size = os.path.getsize(archive.path)
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'without archive':>16}: {statistics.median(without):6.2f}s median of {args.runs}")
+    print(f"{'training run':>16}: {training:6.2f}s, archive is {size / 1024 / 1024:.1f} MiB")
+    print(f"{'with archive':>16}: {statistics.median(archived):6.2f}s median of {args.runs}")
+    print(f"{'speedup':>16}: {statistics.median(without) / statistics.median(archived):6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
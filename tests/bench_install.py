@@ -0,0 +1,65 @@
+"""
+Compares the wall time of a cold install from a local mirror: the parallel install engine against the serial,
+one-request-per-file download the launcher used before (minecraft_launcher_lib's download_file for every file).
+
+Usage: python tests/bench_install.py [assets] [workers] [latency_ms]
+"""
+import logging
+import shutil
+import sys
+import tempfile
+import time
+
+from minecraft_launcher_lib.helper import download_file
+
+from mclauncher.download import Downloader
+from mclauncher.install import Installer
+from mclauncher.metadata import MetadataCache
+from standin import StandIn, add_version, metadata_urls
+
+
+def make_installer(standin, directory, workers):
+    metadata = MetadataCache(directory + "/cache", urls=metadata_urls(standin))
+    return Installer(directory + "/minecraft", metadata, Downloader(workers),
+                     resources_url=standin.url("/resources"))
+
+
+def serial_install(standin, directory):
+    # Resolving the file list isn't part of the measurement, only the downloads are
+    installer = make_installer(standin, directory, 1)
+    data = installer.load_version("bench")
+    tasks = installer.version_tasks(data)
+    start = time.perf_counter()
+    for task in tasks:
+        download_file(task.url, task.path, sha1=task.sha1)
+    return time.perf_counter() - start, len(tasks)
+
+
+def parallel_install(standin, directory, workers):
+    installer = make_installer(standin, directory, workers)
+    data = installer.load_version("bench")
+    tasks = installer.version_tasks(data)
+    start = time.perf_counter()
+    installer.downloader.download(tasks)
+    return time.perf_counter() - start, len(tasks)
+
+
+def main(assets=2000, workers=16, latency_ms=20):
+    logging.basicConfig(level=logging.WARNING)
+    with StandIn() as standin:
+        add_version(standin, "bench", assets=assets, libraries=40)
+        standin.delay = latency_ms / 1000
+        results = {}
+        for name, run in (("serial", lambda d: serial_install(standin, d)),
+                          (f"{workers} workers", lambda d: parallel_install(standin, d, workers))):
+            directory = tempfile.mkdtemp()
+            try:
+                results[name], files = run(directory)
+            finally:
+                shutil.rmtree(directory)
+            print(f"{name:>12}: {results[name]:7.2f}s for {files} files ({files / results[name]:8.1f} files/s)")
+        print(f"{'speedup':>12}: {results['serial'] / results[f'{workers} workers']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,100 @@
+"""
+Measures how fast game output gets through :class:`mclauncher.pipe.LogPipe`: a synthetic log in the format Minecraft
+writes is pushed through the pipe as fast as possible and the lines/s and CPU time per line are reported, for the
+pipe against the previous readline-and-regex implementation (reproduced here as the baseline).
+
+Usage: python tests/bench_logpipe.py [lines] [enabled_level]
+"""
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from mclauncher.pipe import LogPipe
+
+
+class LegacyLogPipe(threading.Thread):
+    def __init__(self, logger):
+        super().__init__()
+        self.daemon = False
+        self.fdRead, self.fdWrite = os.pipe()
+        self.pipeReader = os.fdopen(self.fdRead)
+        self.start()
+        self.logger = logger
+        self.regex = re.compile(r"^\[(?:\d{2}:){2}\d{2}] \[(?P<name>.+)/(?P<level>[A-Z]+)]: (?P<message>.+)", re.DOTALL)
+
+    def fileno(self):
+        return self.fdWrite
+
+    def run(self):
+        for line in iter(self.pipeReader.readline, ''):
+            match = re.search(self.regex, line.strip("\n"))
+            if match:
+                name, level, message = match.groups()
+            else:
+                name, level, message = "Java", "INFO", line
+            message = f"{name} - {message}"
+            level = logging.getLevelName(level)
+            self.logger.log(level, message)
+        self.pipeReader.close()
+
+    def close(self):
+        os.close(self.fdWrite)
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        record.getMessage()
+        self.count += 1
+
+
+def synthetic_log(lines):
+    rng = random.Random(0)
+    threads = ["Render thread", "Server thread", "Worker-Main-3", "main"]
+    levels = ["INFO"] * 6 + ["WARN", "DEBUG", "ERROR"]
+    out = []
+    for i in range(lines):
+        if i % 50 == 49:
+            out.append(f"\tat net.minecraft.class_{i % 977}.method_{i % 31}(SourceFile:{i % 400})\n")
+        else:
+            out.append(f"[{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}] [{rng.choice(threads)}/"
+                       f"{rng.choice(levels)}]: Loaded chunk {i} at {rng.randrange(-3000, 3000)}, 64\n")
+    return "".join(out).encode()
+
+
+def run(pipe_class, data, level):
+    logger = logging.getLogger(f"bench.{pipe_class.__name__}")
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = CountingHandler()
+    logger.handlers[:] = [handler]
+    start, cpu = time.perf_counter(), time.process_time()
+    pipe = pipe_class(logger)
+    view = memoryview(data)
+    for offset in range(0, len(data), 65536):
+        os.write(pipe.fileno(), view[offset:offset + 65536])
+    pipe.close()
+    pipe.join()
+    return time.perf_counter() - start, time.process_time() - cpu, handler.count
+
+
+def main(lines=2_000_000, level="INFO"):
+    data = synthetic_log(lines)
+    results = {}
+    for name, pipe_class in (("legacy", LegacyLogPipe), ("LogPipe", LogPipe)):
+        wall, cpu, handled = run(pipe_class, data, level)
+        results[name] = wall
+        print(f"{name:>8}: {wall:6.2f}s, {lines / wall:10.0f} lines/s, {cpu / lines * 1e6:6.2f} µs CPU/line "
+              f"({handled} records handled)")
+    print(f"{'speedup':>8}: {results['legacy'] / results['LogPipe']:6.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000, *sys.argv[2:])
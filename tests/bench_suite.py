@@ -0,0 +1,336 @@
+"""
+The offline benchmark suite. Everything runs against the local stand-in in tests/standin.py (a synthetic version with
+its assets and libraries, fabric and forge metadata and an auth server) and tests/fake_java.py, so the numbers only
+depend on mclauncher and the machine:
+
+- ``install_cold``: install the version into an empty directory.
+- ``install_warm``: install it again over a complete install, with the file index.
+- ``metadata_cold``/``metadata_warm``: resolve the version, the fabric loader and the forge version, with an empty
+  and with a filled metadata cache.
+- ``command_cold``/``command_warm``: build the launch command, without and with a cached command plan.
+- ``auth_callback``: from starting the callback server until the browser's code is exchanged for login data.
+- ``logpipe``: push game output through :class:`mclauncher.pipe.LogPipe`.
+- ``launch_cold``/``launch_warm``: the whole ``launch()``, from parsing the arguments until the game exited, on a
+  new machine (install and token refresh included) and again right after.
+
+Each benchmark runs a few rounds and its median, min and max are appended to the results file as JSON lines, with the
+git commit they were measured on. Every result is compared to the last one of another commit measured with the same
+parameters, and a benchmark whose median got slower by more than the threshold is flagged; the exit code is 1 then.
+
+Usage: python tests/bench_suite.py [name ...] [--rounds n] [--output path] [--threshold percent] [--assets n]
+                                   [--latency ms] [--lines n]
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from contextlib import closing
+
+from mclauncher.auth import CredentialStore, HttpTokenEndpoint
+from mclauncher.catalog import VersionCatalog
+from mclauncher.command import CommandPlanner
+from mclauncher.download import Downloader
+from mclauncher.fileindex import FileIndex
+from mclauncher.install import Installer
+from mclauncher.metadata import MetadataCache
+from mclauncher.pipe import LogPipe
+from mclauncher.utils import get_data_directory
+from mclauncher.webserver import run_server
+from bench_logpipe import synthetic_log
+from standin import StandIn, add_loaders, add_token_endpoint, add_version, launcher_environment, metadata_urls
+
+VERSION = "1.20.1"
+LOGIN_DATA = {"username": "Steve", "uuid": "8667ba71b85a4004af54457a9734eed7", "token": "token"}
+
+
+class Suite:
+    """The stand-in and the directories the benchmarks share. Directories are made on first use."""
+
+    def __init__(self, standin, directory, args):
+        self.standin = standin
+        self.directory = directory
+        self.args = args
+        self.auth_server = add_token_endpoint(standin)
+        self._installed = None
+        self._metadata = None
+        self._commands = None
+        self._home = None
+        self._count = 0
+
+    def new_directory(self, name):
+        self._count += 1
+        path = os.path.join(self.directory, f"{name}-{self._count}")
+        os.makedirs(path)
+        return path
+
+    def installer(self, minecraft_directory, cache_directory):
+        metadata = MetadataCache(cache_directory, urls=metadata_urls(self.standin))
+        return Installer(minecraft_directory, metadata, Downloader(self.args.workers),
+                         resources_url=self.standin.url("/resources"), index=FileIndex(minecraft_directory))
+
+    @property
+    def installed(self):
+        if self._installed is None:
+            self._installed = self.new_directory("installed")
+            self.installer(self._installed, os.path.join(self._installed, "cache")).install(VERSION)
+        return self._installed
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self._metadata = self.new_directory("metadata")
+            resolve_loaders(MetadataCache(self._metadata, urls=metadata_urls(self.standin)))
+        return self._metadata
+
+    @property
+    def commands(self):
+        if self._commands is None:
+            self._commands = self.new_directory("commands")
+            CommandPlanner(self.installed, cache_directory=self._commands).plan(VERSION)
+        return self._commands
+
+    @property
+    def home(self):
+        if self._home is None:
+            self._home = self.new_directory("home")
+            run_launch(self, self._home)
+        return self._home
+
+
+def find_free_port():
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+
+def resolve_loaders(metadata):
+    assert metadata.is_version_valid(VERSION, "")
+    assert metadata.is_fabric_version_supported(VERSION)
+    metadata.get_latest_fabric_loader_version()
+    assert metadata.find_forge_version(VERSION) is not None
+
+
+def run_launch(suite, home):
+    from mclauncher.main import launch
+
+    with launcher_environment(suite.standin, home), open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        if CredentialStore().load() is None:
+            # Expired, so the first launch refreshes it like it would after a while away
+            CredentialStore().save({**LOGIN_DATA, "refresh_token": "refresh", "expires_in": 0})
+        start = time.perf_counter()
+        returncode = launch(args=[VERSION, "--auth-server", suite.auth_server,
+                                  "--download-workers", str(suite.args.workers)])
+        elapsed = time.perf_counter() - start
+    if returncode != 0:
+        raise RuntimeError(f"The game exited with code {returncode}")
+    return elapsed
+
+
+def install_cold(suite):
+    directory = suite.new_directory("install")
+    installer = suite.installer(os.path.join(directory, "minecraft"), os.path.join(directory, "cache"))
+    start = time.perf_counter()
+    installer.install(VERSION)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(directory)
+    return elapsed
+
+
+def install_warm(suite):
+    installer = suite.installer(suite.installed, os.path.join(suite.installed, "cache"))
+    start = time.perf_counter()
+    installer.install(VERSION)
+    return time.perf_counter() - start
+
+
+def metadata_cold(suite):
+    directory = suite.new_directory("metadata")
+    start = time.perf_counter()
+    resolve_loaders(MetadataCache(directory, urls=metadata_urls(suite.standin)))
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(directory)
+    return elapsed
+
+
+def metadata_warm(suite):
+    directory = suite.metadata
+    start = time.perf_counter()
+    resolve_loaders(MetadataCache(directory, urls=metadata_urls(suite.standin)))
+    return time.perf_counter() - start
+
+
+def command_cold(suite):
+    directory = suite.new_directory("commands")
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(suite.installed, VersionCatalog.filename))
+    start = time.perf_counter()
+    CommandPlanner(suite.installed, cache_directory=directory).plan(VERSION).command(LOGIN_DATA)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(directory)
+    return elapsed
+
+
+def command_warm(suite):
+    directory = suite.commands
+    start = time.perf_counter()
+    CommandPlanner(suite.installed, cache_directory=directory).plan(VERSION).command(LOGIN_DATA)
+    return time.perf_counter() - start
+
+
+def auth_callback(suite):
+    port = find_free_port()
+
+    def follow_redirect():
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/?code=benchmark").read()
+
+    start = time.perf_counter()
+    code = run_server(lambda: threading.Thread(target=follow_redirect, daemon=True).start(), port)
+    HttpTokenEndpoint(suite.auth_server).authorize(code)
+    return time.perf_counter() - start
+
+
+def logpipe(suite, _data={}):
+    if suite.args.lines not in _data:
+        _data[suite.args.lines] = synthetic_log(suite.args.lines)
+    data = _data[suite.args.lines]
+    logger = logging.getLogger("bench_suite.logpipe")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers[:] = [logging.NullHandler()]
+    start = time.perf_counter()
+    pipe = LogPipe(logger)
+    view = memoryview(data)
+    for offset in range(0, len(data), 65536):
+        os.write(pipe.fileno(), view[offset:offset + 65536])
+    pipe.close()
+    pipe.join()
+    return time.perf_counter() - start
+
+
+def launch_cold(suite):
+    home = suite.new_directory("home")
+    elapsed = run_launch(suite, home)
+    shutil.rmtree(home)
+    return elapsed
+
+
+def launch_warm(suite):
+    return run_launch(suite, suite.home)
+
+
+BENCHMARKS = {benchmark.__name__: benchmark for benchmark in (
+    install_cold, install_warm, metadata_cold, metadata_warm, command_cold, command_warm, auth_callback, logpipe,
+    launch_cold, launch_warm)}
+
+
+def git_commit():
+    """The commit being measured, with ``+dirty`` appended if the work tree has changes."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("+dirty" if dirty else "")
+
+
+def load_results(path):
+    results = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                with contextlib.suppress(ValueError):
+                    results.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return results
+
+
+def previous_result(results, result):
+    """The last result of the same benchmark and parameters measured on another commit."""
+    for previous in reversed(results):
+        if previous.get("benchmark") == result["benchmark"] and previous.get("params") == result["params"] \
+                and previous.get("commit") != result["commit"]:
+            return previous
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite and record the results.")
+    parser.add_argument("benchmarks", nargs="*", metavar="name", help=f"Benchmarks to run: {', '.join(BENCHMARKS)}. "
+                                                                      f"Defaults to all of them.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join(get_data_directory(), "bench_results.jsonl"),
+                        help="The JSON lines file results are appended to and compared with.")
+    parser.add_argument("--threshold", type=float, default=10, metavar="percent",
+                        help="Flag benchmarks whose median got this much slower. Defaults to 10.")
+    parser.add_argument("--assets", type=int, default=500, help="Assets in the synthetic version.")
+    parser.add_argument("--libraries", type=int, default=20, help="Libraries in the synthetic version.")
+    parser.add_argument("--latency", type=float, default=0, metavar="ms", help="Simulated network latency.")
+    parser.add_argument("--lines", type=int, default=200_000, help="Lines of game output for the logpipe benchmark.")
+    parser.add_argument("--workers", type=int, default=8, help="Download workers.")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    # launch() configures logging with basicConfig, which does nothing once the root logger has a handler
+    logging.basicConfig(handlers=[logging.NullHandler()])
+    params = {"assets": args.assets, "libraries": args.libraries, "latency": args.latency, "lines": args.lines,
+              "workers": args.workers}
+    commit = git_commit()
+    history = load_results(args.output)
+    regressions = []
+    directory = tempfile.mkdtemp(prefix="mclauncher-bench-")
+    try:
+        with StandIn() as standin:
+            add_version(standin, VERSION, assets=args.assets, libraries=args.libraries)
+            add_loaders(standin, [VERSION, "1.19.4"])
+            standin.delay = args.latency / 1000
+            suite = Suite(standin, directory, args)
+            print(f"Commit {commit}\n")
+            for name in args.benchmarks or BENCHMARKS:
+                times = [BENCHMARKS[name](suite) for _ in range(args.rounds)]
+                result = {"benchmark": name, "commit": commit, "time": time.time(), "params": params,
+                          "python": platform.python_version(), "platform": platform.platform(),
+                          "rounds": args.rounds, "median": statistics.median(times), "min": min(times),
+                          "max": max(times)}
+                line = (f"{name:>14}: median {result['median'] * 1000:9.2f} ms, min {result['min'] * 1000:9.2f} ms, "
+                        f"max {result['max'] * 1000:9.2f} ms")
+                previous = previous_result(history, result)
+                if previous is not None:
+                    change = (result["median"] / previous["median"] - 1) * 100
+                    line += f"  {change:+6.1f}% vs {previous['commit'][:10]}"
+                    if change > args.threshold:
+                        line += "  REGRESSION"
+                        regressions.append(name)
+                print(line, flush=True)
+                history.append(result)
+                os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+                with open(args.output, "a") as f:
+                    f.write(json.dumps(result) + "\n")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(f"\nResults appended to {args.output}")
+    if regressions:
+        print(f"Slower by more than {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
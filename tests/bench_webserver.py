@@ -0,0 +1,108 @@
+"""
+Measures the latency of the auth callback server: the time from calling ``run_server`` until the code is returned,
+with a simulated browser that follows the redirect as soon as ``when_ready`` is called.
+
+The previous implementation (Flask in a subprocess, polled with requests until it answered) is reproduced here as
+the baseline. It needs Flask and requests installed; it is skipped otherwise.
+
+Usage: python tests/bench_webserver.py [rounds]
+"""
+import logging
+import multiprocessing
+import socket
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import closing
+
+from mclauncher.webserver import run_server
+
+
+def find_free_port():
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+
+def browser(port):
+    def follow_redirect():
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/?code=benchmark").read()
+        except Exception:
+            pass  # the legacy server may be terminated before the response is fully read
+    return lambda: threading.Thread(target=follow_redirect, daemon=True).start()
+
+
+def _legacy_start_server(port, q, f):
+    import logging
+    from flask import Flask, request
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = Flask(__name__)
+
+    @app.after_request
+    def response_processor(response):
+        response.call_on_close(lambda: f.put(True))
+        return response
+
+    @app.route("/")
+    def recieve_code():
+        q.put(request.args['code'])
+        return "Authorized"
+
+    app.run(port=port)
+
+
+def legacy_run_server(when_ready, port):
+    import requests
+    q = multiprocessing.Queue()
+    f = multiprocessing.Queue()
+    p = multiprocessing.Process(target=_legacy_start_server, args=(port, q, f))
+    p.start()
+    time.sleep(0.5)
+    for _ in range(150):
+        try:
+            req = requests.get(f"http://localhost:{port}/")
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+        else:
+            if req.status_code == 400:
+                break
+    when_ready()
+    code = q.get(block=True)
+    f.get(block=True)
+    p.terminate()
+    p.join()
+    return code
+
+
+def measure(implementation, rounds):
+    timings = []
+    for _ in range(rounds):
+        port = find_free_port()
+        start = time.perf_counter()
+        assert implementation(browser(port), port) == "benchmark"
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings):
+    print(f"{name:>8}: median {statistics.median(timings) * 1000:8.2f} ms, "
+          f"min {min(timings) * 1000:8.2f} ms, max {max(timings) * 1000:8.2f} ms ({len(timings)} rounds)")
+
+
+def main(rounds=10):
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+    report("current", measure(lambda when_ready, port: run_server(when_ready, port), rounds))
+    try:
+        import flask  # noqa: F401
+        import requests  # noqa: F401
+    except ImportError:
+        print("  legacy: skipped, Flask and requests are needed for the baseline")
+    else:
+        report("legacy", measure(legacy_run_server, rounds))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+A stand-in for the java binary that behaves like a Minecraft client from the launcher's point of view: it answers
+``-version``, prints log4j-formatted output for the username and game directory it was given and exits, writing a
+file in place of the class data archive if asked to with ``-XX:ArchiveClassesAtExit``. Cheap enough to start
+hundreds of at once.
+
+Started as ``java -cp <classpath> <main class> ...``, it acts as a forge installer processor instead: the file after
+``--output`` gets the main class followed by the contents of every file after ``--input``.
+
+Environment variables:
+
+- ``FAKE_JAVA_VERSION``: the version ``-version`` reports. Defaults to 17.0.8.
+- ``FAKE_JAVA_LINES``: how many lines of chatter to print. Defaults to 20.
+- ``FAKE_JAVA_DELAY``: seconds to wait between lines. Defaults to 0.
+- ``FAKE_JAVA_EXIT``: the exit code. Defaults to 0.
+- ``FAKE_JAVA_CRASH``: write a crash report to the game directory and exit with code 255 if set.
+- ``FAKE_JAVA_PROCESSOR_LOG``: a file processors append their main class to.
+- ``FAKE_JAVA_RENDEZVOUS``: ``directory:count``, wait (up to 20 seconds) until ``count`` games are running at once.
+"""
+import os
+import sys
+import time
+
+
+def argument(args, name, default=None):
+    return args[args.index(name) + 1] if name in args[:-1] else default
+
+
+def log(thread, level, message):
+    print(f"[{time.strftime('%H:%M:%S')}] [{thread}/{level}]: {message}", flush=True)
+
+
+def processor(main_class, args):
+    data = main_class.encode() + b":"
+    for i, arg in enumerate(args[:-1]):
+        if arg == "--input":
+            with open(args[i + 1], "rb") as f:
+                data += f.read()
+    output = argument(args, "--output")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "wb") as f:
+        f.write(data)
+    if os.environ.get("FAKE_JAVA_PROCESSOR_LOG"):
+        with open(os.environ["FAKE_JAVA_PROCESSOR_LOG"], "a") as f:
+            f.write(main_class + "\n")
+    return int(os.environ.get("FAKE_JAVA_EXIT", "0"))
+
+
+def server(args):
+    main_class = args[args.index("-cp") + 2] if "-cp" in args else argument(args, "-jar")
+    log("Server thread", "INFO", f"Launching {main_class}")
+    try:
+        with open("eula.txt") as f:
+            accepted = "eula=true" in f.read()
+    except OSError:
+        accepted = False
+    if not accepted:
+        with open("eula.txt", "w") as f:
+            f.write("eula=false\n")
+        log("Server thread", "WARN", "You need to agree to the EULA in order to run the server.")
+        return 0
+    log("Server thread", "INFO", 'Done (1.234s)! For help, type "help"')
+    for _ in range(int(os.environ.get("FAKE_SERVER_LAG", "0"))):
+        log("Server thread", "WARN", "Can't keep up! Is the server overloaded? Running 2500ms or 50 ticks behind")
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "stop":
+            break
+        if command.startswith("say "):
+            log("Server thread", "INFO", f"[Server] {command[4:]}")
+    log("Server thread", "INFO", "Stopping server")
+    return int(os.environ.get("FAKE_JAVA_EXIT", "0"))
+
+
+def main(args):
+    if args[:1] == ["-cp"]:
+        return processor(args[2], args[3:])
+    if "nogui" in args:
+        return server(args)
+    if "-version" in args:
+        version = os.environ.get("FAKE_JAVA_VERSION", "17.0.8")
+        if "-XshowSettings:properties" in args:
+            print(f"Property settings:\n    java.version = {version}\n"
+                  f"    os.arch = {os.environ.get('FAKE_JAVA_ARCH', 'amd64')}\n", file=sys.stderr)
+        print(f'openjdk version "{version}" 2023-07-18\nOpenJDK Runtime Environment (build {version}+7)',
+              file=sys.stderr)
+        return 0
+    lines = int(os.environ.get("FAKE_JAVA_LINES", "20"))
+    delay = float(os.environ.get("FAKE_JAVA_DELAY", "0"))
+
+    log("main", "INFO", f"Setting user: {argument(args, '--username', 'Player')}")
+    log("main", "INFO", f"Game directory: {argument(args, '--gameDir', os.getcwd())}")
+    log("Render thread", "INFO", "Backend library: LWJGL version 3.3.1 SNAPSHOT")
+    log("Render thread", "INFO", "Sound engine started")
+    if os.environ.get("FAKE_JAVA_RENDEZVOUS"):
+        # Wait until this many games are running at once: "directory:count"
+        directory, count = os.environ["FAKE_JAVA_RENDEZVOUS"].rsplit(":", 1)
+        open(os.path.join(directory, str(os.getpid())), "w").close()
+        deadline = time.time() + 20
+        while len(os.listdir(directory)) < int(count):
+            if time.time() > deadline:
+                log("Render thread", "FATAL", "The other games didn't start")
+                return 1
+            time.sleep(0.05)
+    for i in range(lines):
+        if delay:
+            time.sleep(delay)
+        log("Render thread", "WARN" if i % 10 == 9 else "INFO", f"Loaded chunk {i}")
+    print("Unformatted output from a mod", file=sys.stderr, flush=True)
+    if os.environ.get("FAKE_JAVA_CRASH"):
+        reports = os.path.join(argument(args, "--gameDir", os.getcwd()), "crash-reports")
+        os.makedirs(reports, exist_ok=True)
+        path = os.path.join(reports, time.strftime("crash-%Y-%m-%d_%H.%M.%S-client.txt"))
+        with open(path, "w") as f:
+            f.write("---- Minecraft Crash Report ----\nDescription: Unexpected error\n")
+        log("Render thread", "FATAL", f"Preparing crash report with UUID {os.getpid()}")
+        print(f"#@!@# Game crashed! Crash report saved to: #@!@# {path}", flush=True)
+        return 255
+    log("Render thread", "INFO", "Stopping!")
+    returncode = int(os.environ.get("FAKE_JAVA_EXIT", "0"))
+    for arg in args:
+        if arg.startswith("-XX:ArchiveClassesAtExit=") and returncode == 0:
+            with open(arg.split("=", 1)[1], "w") as f:
+                f.write("fake class data archive\n")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
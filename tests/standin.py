@@ -0,0 +1,319 @@
+"""
+A local HTTP stand-in for the services mclauncher talks to, so tests and benchmarks run offline.
+
+Serve static resources by adding them to ``StandIn.routes``; every resource gets an ETag and Last-Modified date and
+honours conditional and ``Range`` requests. Requests are counted per path in ``StandIn.hits``. ``StandIn.failures``
+makes a path answer with a 500 the given number of times, and ``StandIn.delay`` simulates network latency.
+POST requests are answered by the handlers in ``StandIn.posts``, which get the form data and return a JSON-serializable
+object.
+
+:func:`add_version`, :func:`add_loaders` and :func:`add_token_endpoint` add a synthetic version, fabric and forge
+metadata and an auth server. :func:`launcher_environment` points :func:`mclauncher.main.launch` at all of it, with
+tests/fake_java.py as the java.
+"""
+import collections
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import random
+import shlex
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+FAKE_JAVA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_java.py")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        server = self.server.standin
+        path = self.path.split("?")[0]
+        server.hits[path] += 1
+        if server.delay:
+            time.sleep(server.delay)
+        if server.failures.get(path):
+            server.failures[path] -= 1
+            self.send_error(500)
+            return
+        if path not in server.routes:
+            self.send_error(404)
+            return
+        body = server.routes[path]
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes=") and range_header.endswith("-") and server.ranges:
+            start = int(range_header[len("bytes="):-1])
+            if start >= len(body):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            server.ranges_served += 1
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # noqa: N802
+        server = self.server.standin
+        path = self.path.split("?")[0]
+        server.hits[path] += 1
+        form = dict(parse_qsl(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()))
+        if path not in server.posts:
+            self.send_error(404)
+            return
+        body = json.dumps(server.posts[path](form)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class StandIn:
+    def __init__(self):
+        self.routes = {}
+        self.posts = {}
+        self.hits = collections.Counter()
+        self.failures = {}
+        self.delay = 0
+        self.ranges = True
+        self.ranges_served = 0
+        self.last_modified = formatdate(usegmt=True)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self._server.server_address[1]}{path}"
+
+    def add(self, path, body):
+        """Serve ``body`` (bytes, str or JSON-serializable object) at ``path`` and return its URL."""
+        if isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.routes[path] = body
+        return self.url(path)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def add_version(standin, version_id, assets=100, libraries=10, asset_size=2048, library_size=16 * 1024, seed=0):
+    """
+    Add a synthetic vanilla version with its version JSON, asset index, assets, libraries and client jar, and list it
+    in ``/mc/game/version_manifest.json``. Returns the version JSON.
+    """
+    rng = random.Random(seed)
+
+    def blob(size):
+        return bytes(rng.getrandbits(8) for _ in range(16)) * (size // 16)
+
+    objects = {}
+    for i in range(assets):
+        data = blob(asset_size) + str(i).encode()
+        digest = sha1(data)
+        standin.add(f"/resources/{digest[:2]}/{digest}", data)
+        objects[f"minecraft/sounds/{version_id}/{i}.ogg"] = {"hash": digest, "size": len(data)}
+    index_url = standin.add(f"/indexes/{version_id}.json", {"objects": objects})
+    index = standin.routes[f"/indexes/{version_id}.json"]
+
+    library_entries = []
+    for i in range(libraries):
+        data = blob(library_size) + str(i).encode()
+        path = f"org/example/lib{i}/{version_id}/lib{i}-{version_id}.jar"
+        library_entries.append({"name": f"org.example:lib{i}:{version_id}", "downloads": {"artifact": {
+            "path": path, "url": standin.add(f"/libraries/{path}", data), "sha1": sha1(data), "size": len(data)}}})
+
+    client = blob(library_size) + b"client"
+    server = blob(library_size) + b"server"
+    version = {
+        "id": version_id,
+        "type": "release",
+        "mainClass": "net.minecraft.client.main.Main",
+        "assets": version_id,
+        "assetIndex": {"id": version_id, "url": index_url, "sha1": sha1(index), "size": len(index)},
+        "downloads": {"client": {"url": standin.add(f"/versions/{version_id}/client.jar", client),
+                                 "sha1": sha1(client), "size": len(client)},
+                      "server": {"url": standin.add(f"/versions/{version_id}/server.jar", server),
+                                 "sha1": sha1(server), "size": len(server)}},
+        "libraries": library_entries,
+        "arguments": {"game": ["--username", "${auth_player_name}", "--version", "${version_name}",
+                               "--gameDir", "${game_directory}", "--assetsDir", "${assets_root}",
+                               "--assetIndex", "${assets_index_name}", "--uuid", "${auth_uuid}",
+                               "--accessToken", "${auth_access_token}", "--userType", "${user_type}",
+                               {"rules": [{"action": "allow", "features": {"has_custom_resolution": True}}],
+                                "value": ["--width", "${resolution_width}", "--height", "${resolution_height}"]}],
+                      "jvm": ["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"]},
+    }
+    version_url = standin.add(f"/versions/{version_id}/{version_id}.json", version)
+
+    manifest_path = "/mc/game/version_manifest.json"
+    manifest = json.loads(standin.routes.get(manifest_path, b'{"latest": {}, "versions": []}'))
+    manifest["latest"]["release"] = version_id
+    manifest["versions"].insert(0, {"id": version_id, "type": "release", "url": version_url})
+    standin.add(manifest_path, manifest)
+    return version
+
+
+def add_loaders(standin, game_versions, fabric_loaders=("0.14.22", "0.14.21"), forge_versions=None):
+    """
+    Add fabric's game and loader version lists, client and server profiles and libraries for each game version and
+    loader, and forge's maven metadata, listing ``game_versions``. Forge versions default to one per game version.
+    """
+    standin.add("/fabric/v2/versions/game", [{"version": version, "stable": True} for version in game_versions])
+    standin.add("/fabric/v2/versions/loader", [{"separator": ".", "build": i, "maven": f"net.fabricmc:fabric-loader:"
+                                                f"{loader}", "version": loader, "stable": True}
+                                               for i, loader in enumerate(fabric_loaders)])
+    loader = b"fabric loader" * 1024
+    for game_version in game_versions:
+        intermediary = f"intermediary {game_version}".encode() * 1024
+        standin.add(f"/fabric/maven/net/fabricmc/intermediary/{game_version}/intermediary-{game_version}.jar",
+                    intermediary)
+        for loader_version in fabric_loaders:
+            standin.add(f"/fabric/maven/net/fabricmc/fabric-loader/{loader_version}/fabric-loader-{loader_version}"
+                        f".jar", loader)
+            libraries = [
+                {"name": f"net.fabricmc:fabric-loader:{loader_version}", "url": standin.url("/fabric/maven/"),
+                 "sha1": sha1(loader), "size": len(loader)},
+                {"name": f"net.fabricmc:intermediary:{game_version}", "url": standin.url("/fabric/maven/")},
+            ]
+            for side, main_class in (("profile", "KnotClient"), ("server", "KnotServer")):
+                standin.add(f"/fabric/v2/versions/loader/{game_version}/{loader_version}/{side}/json", {
+                    "id": f"fabric-loader-{loader_version}-{game_version}" + ("-server" if side == "server" else ""),
+                    "inheritsFrom": game_version,
+                    "type": "release",
+                    "mainClass": f"net.fabricmc.loader.impl.launch.knot.{main_class}",
+                    "arguments": {"game": [], "jvm": ["-DFabricMcEmu= net.minecraft.client.main.Main "]
+                                  if side == "profile" else []},
+                    "libraries": libraries})
+    if forge_versions is None:
+        forge_versions = [f"{version}-47.1.0" for version in game_versions]
+    standin.add("/forge/maven-metadata.xml",
+                "<metadata><groupId>net.minecraftforge</groupId><artifactId>forge</artifactId><versioning><versions>"
+                + "".join(f"<version>{version}</version>" for version in forge_versions)
+                + "</versions></versioning></metadata>")
+
+
+def add_token_endpoint(standin, lifetime=3600):
+    """
+    Add an auth server that accepts any code or refresh token, like the one behind
+    :class:`mclauncher.auth.HttpTokenEndpoint`. Returns its URL.
+    """
+    def login_data(secret):
+        return {"username": "Steve", "uuid": "8667ba71b85a4004af54457a9734eed7", "token": f"token-{secret}",
+                "refresh_token": f"refresh-{secret}", "expires_in": lifetime}
+
+    standin.posts["/authorize"] = lambda form: login_data(form.get("code"))
+    standin.posts["/refresh"] = lambda form: login_data(form.get("refresh_token"))
+    return standin.url("")
+
+
+def add_java_runtime(standin, component, version="17.0.8", platform=None, files=20):
+    """
+    Serve Mojang's java runtime manifest with ``component`` in it: a ``bin/java`` running tests/fake_java.py as java
+    ``version``, ``files`` library files and a link. POSIX only.
+    """
+    from mclauncher.runtime import runtime_platform
+
+    platform = platform or runtime_platform()
+    java = f'#!/bin/sh\nFAKE_JAVA_VERSION={version} exec {shlex.quote(sys.executable)} {shlex.quote(FAKE_JAVA)} "$@"\n'
+    contents = {"bin/java": (java.encode(), True), "release": (f'JAVA_VERSION="{version}"\n'.encode(), False)}
+    for i in range(files):
+        contents[f"lib/module-{i}.jmod"] = (os.urandom(4096), False)
+    manifest = {"bin": {"type": "directory"}, "lib": {"type": "directory"},
+                "legal": {"type": "link", "target": "lib"}}
+    for name, (data, executable) in contents.items():
+        url = standin.add(f"/runtime/{component}/{name}", data)
+        manifest[name] = {"type": "file", "executable": executable,
+                          "downloads": {"raw": {"url": url, "sha1": sha1(data), "size": len(data)}}}
+    manifest_url = standin.add(f"/runtime/{component}/manifest.json", {"files": manifest})
+    runtimes = json.loads(standin.routes.get("/runtime/all.json", b"{}"))
+    runtimes.setdefault(platform, {})[component] = [{"manifest": {"url": manifest_url},
+                                                     "version": {"name": version}}]
+    standin.add("/runtime/all.json", runtimes)
+
+
+def metadata_urls(standin):
+    """URL overrides for :class:`mclauncher.metadata.MetadataCache` pointing at the stand-in."""
+    urls = {"version_manifest": standin.url("/mc/game/version_manifest.json"),
+            "java_runtimes": standin.url("/runtime/all.json")}
+    if "/fabric/v2/versions/game" in standin.routes:
+        urls.update(fabric_game_versions=standin.url("/fabric/v2/versions/game"),
+                    fabric_loader_versions=standin.url("/fabric/v2/versions/loader"),
+                    fabric_profile=standin.url("/fabric/v2/versions/loader/{game_version}/{loader_version}/profile/"
+                                               "json"),
+                    fabric_server_profile=standin.url("/fabric/v2/versions/loader/{game_version}/{loader_version}/"
+                                                      "server/json"),
+                    forge_maven_metadata=standin.url("/forge/maven-metadata.xml"))
+    return urls
+
+
+def fake_java_executable(directory):
+    """Write a ``java`` that runs tests/fake_java.py into ``directory`` and return its path. POSIX only."""
+    os.makedirs(directory, exist_ok=True)
+    java = os.path.join(directory, "java")
+    with open(java, "w") as f:
+        f.write(f'#!/bin/sh\nexec {shlex.quote(sys.executable)} {shlex.quote(FAKE_JAVA)} "$@"\n')
+    os.chmod(java, 0o755)
+    return java
+
+
+@contextlib.contextmanager
+def launcher_environment(standin, home):
+    """
+    Run :func:`mclauncher.main.launch` against the stand-in: ``home`` is used as the home directory (so the game goes
+    in ``home/.minecraft``) and the data directory, the stand-in replaces Mojang's servers and ``java`` on the ``PATH``
+    is tests/fake_java.py. Works on POSIX systems only.
+    """
+    from unittest import mock
+
+    import mclauncher.install
+    from mclauncher.metadata import DEFAULT_URLS
+
+    home = str(home)
+    bin_directory = os.path.dirname(fake_java_executable(os.path.join(home, "bin")))
+    environment = {"HOME": home, "MCLAUNCHER_HOME": os.path.join(home, "mclauncher"),
+                   "PATH": bin_directory + os.pathsep + os.environ.get("PATH", "")}
+    installer = functools.partial(mclauncher.install.Installer, resources_url=standin.url("/resources"))
+    with mock.patch.dict(os.environ, environment), mock.patch.dict(DEFAULT_URLS, metadata_urls(standin)), \
+            mock.patch.object(mclauncher.install, "Installer", installer):
+        yield
+
+
+def installed_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names)
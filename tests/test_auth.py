@@ -0,0 +1,107 @@
+import os
+import stat
+import time
+
+import pytest
+
+from mclauncher.auth import AuthError, CredentialStore, TokenEndpoint, get_login_data
+
+
+class FakeTokenEndpoint(TokenEndpoint):
+    """Offline stand-in for the auth server."""
+
+    def __init__(self, fail_refresh=False):
+        self.fail_refresh = fail_refresh
+        self.calls = []
+
+    def authorize(self, code):
+        self.calls.append(("authorize", code))
+        return {"username": "Steve", "uuid": "1234", "token": f"token-{code}", "refresh_token": f"refresh-{code}"}
+
+    def refresh(self, refresh_token):
+        self.calls.append(("refresh", refresh_token))
+        if self.fail_refresh:
+            raise AuthError("refresh token revoked")
+        return {"username": "Steve", "uuid": "1234", "token": "token-refreshed"}
+
+
+def browser_login():
+    return "code"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CredentialStore(str(tmp_path / "credentials.json"))
+
+
+def test_login_is_cached(store):
+    endpoint = FakeTokenEndpoint()
+    first = get_login_data(endpoint, store, browser_login)
+    second = get_login_data(endpoint, store, lambda: pytest.fail("should not log in again"))
+    assert first == second
+    assert endpoint.calls == [("authorize", "code")]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_store_permissions(store):
+    get_login_data(FakeTokenEndpoint(), store, browser_login)
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+
+def test_expired_login_is_refreshed(store):
+    endpoint = FakeTokenEndpoint()
+    store.save({"token": "old", "refresh_token": "refresh-old", "expires_in": 0})
+    login_data = get_login_data(endpoint, store, lambda: pytest.fail("should refresh silently"))
+    assert login_data["token"] == "token-refreshed"
+    assert endpoint.calls == [("refresh", "refresh-old")]
+    # The refresh token is kept when the endpoint doesn't hand out a new one
+    assert store.load()["refresh_token"] == "refresh-old"
+    assert store.load()["expires_at"] > time.time()
+
+
+def test_failed_refresh_falls_back_to_login(store):
+    endpoint = FakeTokenEndpoint(fail_refresh=True)
+    store.save({"token": "old", "refresh_token": "refresh-old", "expires_in": 0})
+    login_data = get_login_data(endpoint, store, browser_login)
+    assert login_data["token"] == "token-code"
+    assert endpoint.calls == [("refresh", "refresh-old"), ("authorize", "code")]
+
+
+def test_accounts_are_separate(store):
+    endpoint = FakeTokenEndpoint()
+    get_login_data(endpoint, store, browser_login, account="alt")
+    assert store.load() is None
+    get_login_data(endpoint, store, browser_login, fresh=True, account="alt")
+    assert len(endpoint.calls) == 2
+
+
+def test_non_json_reply_falls_back_to_login(store, monkeypatch):
+    import requests
+
+    from mclauncher.auth import HttpTokenEndpoint
+
+    def portal(url, data):
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = b"<html>Sign in to the hotel wifi</html>"
+        return response
+
+    monkeypatch.setattr(requests, "post", portal)
+    endpoint = HttpTokenEndpoint("http://auth.invalid")
+    with pytest.raises(AuthError):
+        endpoint.refresh("refresh-old")
+    store.save({"token": "old", "refresh_token": "refresh-old", "expires_in": 0})
+    logins = []
+    with pytest.raises(AuthError):
+        # The refresh fails cleanly, so the browser login is tried, whose code exchange fails the same way
+        get_login_data(endpoint, store, lambda: logins.append(1) or "code")
+    assert logins == [1]
+
+
+def test_incomplete_endpoint_fails_early():
+    class NoRefresh(TokenEndpoint):
+        def authorize(self, code):
+            return {}
+
+    with pytest.raises(TypeError):
+        NoRefresh()
@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from mclauncher.catalog import VersionCatalog, parse_version_id
+
+
+@pytest.mark.parametrize("version_id, inherits_from, expected", [
+    ("1.18.1", None, ("1.18.1", None, None, None)),
+    ("22w03a", None, ("22w03a", None, None, None)),
+    ("fabric-loader-0.12.12-1.18.1", "1.18.1", ("1.18.1", "fabric", "0.12.12", None)),
+    ("1.18.1-forge-39.0.5", "1.18.1", ("1.18.1", "forge", "39.0.5", None)),
+    ("1.12.2-forge1.12.2-14.23.5.2855", "1.12.2", ("1.12.2", "forge", "14.23.5.2855", None)),
+    ("1.18.1-OptiFine_HD_U_H4", "1.18.1", ("1.18.1", None, None, "OptiFine_HD_U_H4")),
+    ("Impact 4.9.1", "1.12.2", ("1.12.2", None, None, "Impact 4.9.1")),
+])
+def test_parse_version_id(version_id, inherits_from, expected):
+    info = parse_version_id(version_id, inherits_from=inherits_from)
+    assert (info.base, info.loader, info.loader_version, info.client) == expected
+
+
+def add_version(mc, version_id, **data):
+    os.makedirs(os.path.join(mc, "versions", version_id))
+    with open(os.path.join(mc, "versions", version_id, version_id + ".json"), "w") as f:
+        json.dump({"id": version_id, "type": "release", **data}, f)
+
+
+def test_lookups_and_invalidation(tmp_path):
+    mc = str(tmp_path)
+    add_version(mc, "1.18.1")
+    add_version(mc, "1.18.1-OptiFine_HD_U_H4", inheritsFrom="1.18.1")
+    add_version(mc, "1.17.1-OptiFine_HD_U_G9", inheritsFrom="1.17.1")
+    add_version(mc, "fabric-loader-0.12.12-1.18.1", inheritsFrom="1.18.1")
+
+    catalog = VersionCatalog(mc)
+    assert catalog.get("1.18.1").loader is None
+    assert catalog.get("1.19") is None
+    assert [i.id for i in catalog.find_clients("optifine", base="1.18.1")] == ["1.18.1-OptiFine_HD_U_H4"]
+    assert len(catalog.find_clients("OPTI")) == 2
+    assert catalog.find_clients("impact") == []
+    assert [i.id for i in catalog.find("1.18.1", loader="fabric")] == ["fabric-loader-0.12.12-1.18.1"]
+
+    # New versions are picked up, and unchanged ones aren't parsed again
+    add_version(mc, "1.18.1-forge-39.0.5", inheritsFrom="1.18.1")
+    os.remove(os.path.join(mc, "versions", "1.17.1-OptiFine_HD_U_G9", "1.17.1-OptiFine_HD_U_G9.json"))
+    reloaded = VersionCatalog(mc)
+    assert reloaded.get("1.18.1-forge-39.0.5").loader_version == "39.0.5"
+    assert reloaded.get("1.17.1-OptiFine_HD_U_G9") is None
+
+
+def test_cached_entries_are_not_parsed(tmp_path, monkeypatch):
+    mc = str(tmp_path)
+    add_version(mc, "1.18.1")
+    VersionCatalog(mc)
+    load = json.load
+
+    def fail_on_version_json(f):
+        if f.name.endswith("1.18.1.json"):
+            pytest.fail(f"parsed {f.name}")
+        return load(f)
+
+    monkeypatch.setattr("json.load", fail_on_version_json)
+    assert VersionCatalog(mc).get("1.18.1") is not None
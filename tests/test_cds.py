@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+from mclauncher.cds import CdsArchive
+
+FAKE_JAVA = os.path.join(os.path.dirname(__file__), "fake_java.py")
+
+
+def run(archive, env=None):
+    arguments = archive.arguments()
+    returncode = subprocess.run([sys.executable, FAKE_JAVA] + arguments, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, env=dict(os.environ, **(env or {}))).returncode
+    return arguments, archive.finish(returncode)
+
+
+def test_training_run_then_reuse(tmp_path):
+    mc = str(tmp_path / "minecraft")
+    jar = tmp_path / "lib.jar"
+    jar.write_bytes(b"jar")
+    classpath = os.pathsep.join([str(jar), str(tmp_path / "client.jar")])
+
+    archive = CdsArchive(mc, "1.0", classpath, FAKE_JAVA)
+    arguments, path = run(archive)
+    assert arguments[0].startswith("-XX:ArchiveClassesAtExit=")
+    assert path == archive.path and os.path.isfile(path)
+    assert os.listdir(archive.directory) == [os.path.basename(path)]
+
+    again = CdsArchive(mc, "1.0", classpath, FAKE_JAVA)
+    assert run(again) == ([f"-XX:SharedArchiveFile={path}"], None)
+
+    # A changed jar is a new archive, and the old one goes once that is made
+    jar.write_bytes(b"jar, but newer")
+    changed = CdsArchive(mc, "1.0", classpath, FAKE_JAVA)
+    assert changed.key != archive.key and not changed.exists
+    run(changed)
+    assert os.listdir(archive.directory) == [os.path.basename(changed.path)]
+
+
+def test_key_depends_on_classpath_and_java(tmp_path):
+    first = CdsArchive(str(tmp_path), "1.0", "a.jar", FAKE_JAVA)
+    assert first.key == CdsArchive(str(tmp_path), "1.0", "a.jar", FAKE_JAVA).key
+    assert first.key != CdsArchive(str(tmp_path), "1.0", "b.jar", FAKE_JAVA).key
+    assert first.key != CdsArchive(str(tmp_path), "1.0", "a.jar", sys.executable).key
+
+
+def test_crashed_training_run_keeps_nothing(tmp_path):
+    archive = CdsArchive(str(tmp_path), "1.0", "", FAKE_JAVA)
+    assert run(archive, {"FAKE_JAVA_EXIT": "1"})[1] is None
+    assert os.listdir(archive.directory) == []
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from mclauncher.command import CommandPlanner
+
+LOGIN_DATA = {"username": "Steve", "uuid": "1234", "token": "secret"}
+
+
+def write_version(mc, version_id, **data):
+    os.makedirs(os.path.join(mc, "versions", version_id), exist_ok=True)
+    version = {
+        "id": version_id, "type": "release", "mainClass": "net.minecraft.client.main.Main", "assets": "1",
+        "libraries": [{"name": "org.example:lib:1.0"}],
+        "arguments": {"game": ["--username", "${auth_player_name}", "--uuid", "${auth_uuid}",
+                               "--accessToken", "${auth_access_token}", "--gameDir", "${game_directory}"],
+                      "jvm": ["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"]},
+    }
+    version.update(data)
+    with open(os.path.join(mc, "versions", version_id, version_id + ".json"), "w") as f:
+        json.dump(version, f)
+
+
+@pytest.fixture
+def mc(tmp_path):
+    mc = str(tmp_path / "minecraft")
+    write_version(mc, "1.0")
+    write_version(mc, "fabric-loader-0.1-1.0", inheritsFrom="1.0", libraries=[{"name": "net.fabricmc:loader:0.1"}],
+                  arguments={"game": []})
+    return mc
+
+
+def test_plan_matches_library(mc, tmp_path):
+    from minecraft_launcher_lib.command import get_minecraft_command
+
+    plan = CommandPlanner(mc, cache_directory=str(tmp_path / "plans")).plan("fabric-loader-0.1-1.0")
+    assert plan.command(LOGIN_DATA) == get_minecraft_command("fabric-loader-0.1-1.0", mc, LOGIN_DATA)
+    assert "secret" not in json.dumps(plan._asdict())
+    assert "loader-0.1.jar" in plan.classpath
+
+
+def test_plan_is_cached(mc, tmp_path, monkeypatch):
+    cache = str(tmp_path / "plans")
+    first = CommandPlanner(mc, cache_directory=cache).plan("fabric-loader-0.1-1.0")
+
+    monkeypatch.setattr("minecraft_launcher_lib.command.get_minecraft_command",
+                        lambda *args: pytest.fail("plan should come from the cache"))
+    assert CommandPlanner(mc, cache_directory=cache).plan("fabric-loader-0.1-1.0") == first
+
+
+def test_changed_parent_invalidates_plan(mc, tmp_path):
+    cache = str(tmp_path / "plans")
+    planner = CommandPlanner(mc, cache_directory=cache)
+    first = planner.plan("fabric-loader-0.1-1.0")
+    write_version(mc, "1.0", libraries=[{"name": "org.example:lib:2.0"}])
+    second = planner.plan("fabric-loader-0.1-1.0")
+    assert second != first
+    assert "lib-2.0.jar" in second.classpath
+    # Different options are a different plan
+    assert planner.plan("fabric-loader-0.1-1.0", {"gameDirectory": "/games/a"}).command(LOGIN_DATA)[-1] == "/games/a"
@@ -0,0 +1,121 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from mclauncher.auth import CredentialStore
+from mclauncher.daemon import Daemon, DaemonError, request
+from standin import StandIn, add_token_endpoint, add_version, launcher_environment
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the daemon needs Unix domain sockets")
+
+
+@contextlib.contextmanager
+def running_daemon(tmp_path):
+    # Not a fixture: pytest swaps sys.stdout between setup and call, which would undo the daemon's output routing
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=5, libraries=2)
+        auth_server = add_token_endpoint(standin)
+        with launcher_environment(standin, tmp_path):
+            CredentialStore().save({"username": "Steve", "uuid": "1234", "token": "old", "refresh_token": "old",
+                                    "expires_in": 3600})
+            path = str(tmp_path / "daemon.sock")
+            server = Daemon(path)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            yield standin, path, ["--auth-server", auth_server]
+            assert request([], path, stop=True) == 0
+            thread.join(5)
+            assert not thread.is_alive() and not os.path.exists(path)
+
+
+def run(path, args):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    return request(args, path, io.StringIO(), stdout, stderr), stdout.getvalue(), stderr.getvalue()
+
+
+def test_launch(tmp_path):
+    with running_daemon(tmp_path) as (standin, path, args):
+        assert request([], path, ping=True) == 0
+        for _ in range(2):
+            code, stdout, stderr = run(path, args)
+            assert code == 0
+            assert stdout.count("Starting minecraft") == 1
+            # The game's output, read and logged on the daemon's threads
+            assert "Loaded chunk 9" in stderr
+        # The second launch used the daemon's warm metadata
+        assert standin.hits["/mc/game/version_manifest.json"] == 1
+
+        code, stdout, stderr = run(path, ["2.0"] + args)
+        assert code == 2 and "Invalid version" in stderr
+        assert run(path, ["daemon"])[0] == 2
+
+
+def test_concurrent_clients_get_their_own_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_JAVA_LINES", "50")
+    results = [None, None]
+    with running_daemon(tmp_path) as (_, path, args):
+        def client(i):
+            results[i] = run(path, args)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+    for code, stdout, stderr in results:
+        assert code == 0
+        assert stdout.count("Starting minecraft") == 1
+        assert stderr.count("Loaded chunk 49") == 1
+
+
+def test_games_in_one_directory_run_side_by_side(tmp_path, monkeypatch):
+    # Each game waits for the other one, which only starts if the first request let go of the directory
+    rendezvous = tmp_path / "rendezvous"
+    rendezvous.mkdir()
+    monkeypatch.setenv("FAKE_JAVA_RENDEZVOUS", f"{rendezvous}:2")
+    results = [None, None]
+    with running_daemon(tmp_path) as (_, path, args):
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, run(path, args))) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+    assert [result[0] for result in results] == [0, 0]
+    assert len(os.listdir(rendezvous)) == 2
+
+
+def test_concurrent_clients_keep_their_own_settings(tmp_path, monkeypatch):
+    rendezvous = tmp_path / "rendezvous"
+    rendezvous.mkdir()
+    monkeypatch.setenv("FAKE_JAVA_RENDEZVOUS", f"{rendezvous}:2")
+    report = str(tmp_path / "timings.json")
+    results = [None, None]
+    with running_daemon(tmp_path) as (_, path, args):
+        requests = [args + ["-vv", "--timings", "json", "--timings-output", report], args]
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, run(path, requests[i])))
+                   for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+    (verbose_code, _, verbose_stderr), (quiet_code, quiet_stdout, quiet_stderr) = results
+    assert verbose_code == quiet_code == 0
+    assert "[DEBUG]" in verbose_stderr
+    assert "[DEBUG]" not in quiet_stderr and "[INFO] (mclauncher" not in quiet_stderr
+    assert '"spans"' not in quiet_stdout
+    with open(report) as f:
+        spans = json.load(f)["spans"]
+    assert [span["name"] for span in spans].count("launch") == 1
+
+
+def test_no_daemon(tmp_path):
+    with pytest.raises(DaemonError):
+        request([], str(tmp_path / "missing.sock"))
+    # A socket left behind by a daemon that died is replaced
+    (tmp_path / "stale.sock").write_text("")
+    Daemon(str(tmp_path / "stale.sock")).server_close()
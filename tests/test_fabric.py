@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+import pytest
+
+from mclauncher.download import Downloader
+from mclauncher.fabric import FabricInstaller
+from mclauncher.install import Installer, InstallError
+from mclauncher.metadata import MetadataCache, OfflineError
+from standin import StandIn, add_loaders, add_version, metadata_urls
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=5, libraries=2)
+        add_loaders(standin, ["1.0"], fabric_loaders=("0.14.22",))
+        yield standin
+
+
+def make_fabric_installer(standin, tmp_path, name, offline=False):
+    metadata = MetadataCache(str(tmp_path / "metadata"), offline=offline, urls=metadata_urls(standin))
+    installer = Installer(str(tmp_path / name), metadata, Downloader(4), resources_url=standin.url("/resources"))
+    return FabricInstaller(installer, str(tmp_path / "libraries"))
+
+
+def test_install(standin, tmp_path):
+    fabric = make_fabric_installer(standin, tmp_path, "first")
+    fabric.installer.install("1.0")
+    assert fabric.install("1.0", "0.14.22") == "fabric-loader-0.14.22-1.0"
+    mc = tmp_path / "first"
+    with open(mc / "versions" / "fabric-loader-0.14.22-1.0" / "fabric-loader-0.14.22-1.0.json") as f:
+        assert json.load(f)["inheritsFrom"] == "1.0"
+    loader = mc / "libraries" / "net" / "fabricmc" / "fabric-loader" / "0.14.22" / "fabric-loader-0.14.22.jar"
+    assert loader.read_bytes() == standin.routes["/fabric/maven/net/fabricmc/fabric-loader/0.14.22/"
+                                                 "fabric-loader-0.14.22.jar"]
+    # The whole version resolves, parent included
+    assert len(fabric.installer.load_version("fabric-loader-0.14.22-1.0")["libraries"]) == 4
+
+
+def test_cached_install_works_offline(standin, tmp_path):
+    make_fabric_installer(standin, tmp_path, "first").install("1.0", "0.14.22")
+    hits = sum(standin.hits.values())
+    start = time.perf_counter()
+    fabric = make_fabric_installer(standin, tmp_path, "second", offline=True)
+    assert fabric.install("1.0", "0.14.22") == "fabric-loader-0.14.22-1.0"
+    assert time.perf_counter() - start < 1
+    assert sum(standin.hits.values()) == hits
+    assert os.path.isfile(tmp_path / "second" / "libraries" / "net" / "fabricmc" / "intermediary" / "1.0" /
+                          "intermediary-1.0.jar")
+
+
+def test_offline_without_cache(standin, tmp_path):
+    with pytest.raises(OfflineError):
+        make_fabric_installer(standin, tmp_path, "minecraft", offline=True).install("1.0", "0.14.22")
+    # The profile is cached but the libraries aren't
+    make_fabric_installer(standin, tmp_path, "minecraft").installer.metadata.get_fabric_profile("1.0", "0.14.22")
+    with pytest.raises(InstallError):
+        make_fabric_installer(standin, tmp_path, "minecraft", offline=True).install("1.0", "0.14.22")
+
+
+def test_libraries_use_the_installers_session_and_store(standin, tmp_path):
+    import requests
+
+    from mclauncher.store import SharedStore
+
+    class CountingSession(requests.Session):
+        urls = []
+
+        def get(self, url, **kwargs):
+            self.urls.append(url)
+            return super().get(url, **kwargs)
+
+    store = SharedStore(str(tmp_path / "store"))
+    metadata = MetadataCache(str(tmp_path / "metadata"), urls=metadata_urls(standin))
+    installer = Installer(str(tmp_path / "mc"), metadata, Downloader(4, session=CountingSession(), store=store),
+                          resources_url=standin.url("/resources"))
+    FabricInstaller(installer, str(tmp_path / "libraries")).install("1.0", "0.14.22")
+    assert any("/fabric/maven/" in url for url in CountingSession.urls)
+    assert os.listdir(tmp_path / "store" / "objects")
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from mclauncher.download import Downloader
+from mclauncher.fileindex import FileIndex
+from mclauncher.install import Installer
+from mclauncher.metadata import MetadataCache
+from standin import StandIn, add_version
+
+
+@pytest.fixture
+def installed(tmp_path):
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=20, libraries=3)
+        mc = str(tmp_path / "minecraft")
+
+        def install(full=False):
+            index = FileIndex(mc, full=full)
+            metadata = MetadataCache(str(tmp_path / "cache"),
+                                     urls={"version_manifest": standin.url("/mc/game/version_manifest.json")})
+            Installer(mc, metadata, Downloader(4), resources_url=standin.url("/resources"), index=index).install("1.0")
+            return index
+
+        yield standin, mc, install
+
+
+def test_warm_install_only_stats(installed, monkeypatch):
+    standin, mc, install = installed
+    index = install()
+    assert len(index.versions["1.0"]) == 20 + 3 + 1
+
+    hashed = []
+    monkeypatch.setattr("mclauncher.fileindex.get_sha1_hash", lambda path: hashed.append(path))
+    install()
+    assert hashed == []
+
+
+def test_changed_file_is_rehashed_and_repaired(installed):
+    standin, mc, install = installed
+    install()
+    jar = os.path.join(mc, "versions", "1.0", "1.0.jar")
+    with open(jar, "r+b") as f:
+        f.write(b"corrupted")
+    hits = standin.hits["/versions/1.0/client.jar"]
+    install()
+    assert standin.hits["/versions/1.0/client.jar"] == hits + 1
+
+
+def test_full_verify_detects_silent_corruption(installed):
+    standin, mc, install = installed
+    install()
+    jar = os.path.join(mc, "versions", "1.0", "1.0.jar")
+    st = os.stat(jar)
+    with open(jar, "r+b") as f:
+        f.write(b"corrupted")
+    # Keep size and mtime, so only a deep check can notice
+    os.utime(jar, ns=(st.st_atime_ns, st.st_mtime_ns))
+    hits = standin.hits["/versions/1.0/client.jar"]
+    install()
+    assert standin.hits["/versions/1.0/client.jar"] == hits
+    install(full=True)
+    assert standin.hits["/versions/1.0/client.jar"] == hits + 1
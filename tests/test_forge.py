@@ -0,0 +1,138 @@
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from mclauncher.download import Downloader
+from mclauncher.forge import ForgeInstaller, forge_version_id
+from mclauncher.install import Installer, InstallError
+from mclauncher.metadata import MetadataCache
+from standin import StandIn, add_version, fake_java_executable, metadata_urls
+
+FORGE_VERSION = "1.0-1.0.0"
+
+
+def jar(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def processor_jar(main_class):
+    return jar({"META-INF/MANIFEST.MF": f"Manifest-Version: 1.0\r\nMain-Class: {main_class}\r\n"})
+
+
+def add_forge(standin, vanilla_version="1.0"):
+    """A forge installer with two independent processors and one that patches their outputs."""
+    client = standin.routes[f"/versions/{vanilla_version}/client.jar"]
+    binpatch = b"binary patches"
+    slim = b"net.example.Slim:" + client
+    extra = b"net.example.Extra:" + client
+    patched = b"net.example.Patcher:" + slim + extra + binpatch
+    version_id = forge_version_id(FORGE_VERSION)
+    profile = {
+        "version": version_id,
+        "minecraft": vanilla_version,
+        "data": {
+            "SLIM": {"client": f"[net.minecraft:client:{vanilla_version}:slim]"},
+            "EXTRA": {"client": f"[net.minecraft:client:{vanilla_version}:extra]"},
+            "PATCHED": {"client": f"[net.minecraftforge:forge:{FORGE_VERSION}:client]"},
+            "PATCHED_SHA": {"client": f"'{hashlib.sha1(patched).hexdigest()}'"},
+            "BINPATCH": {"client": "/data/client.lzma"},
+        },
+        "processors": [
+            {"jar": "net.example:slim:1.0", "args": ["--input", "{MINECRAFT_JAR}", "--output", "{SLIM}"]},
+            {"jar": "net.example:extra:1.0", "args": ["--input", "{MINECRAFT_JAR}", "--output", "{EXTRA}"]},
+            {"sides": ["server"], "jar": "net.example:server:1.0", "args": ["--output", "{ROOT}/server"]},
+            {"jar": "net.example:patcher:1.0",
+             "args": ["--input", "{SLIM}", "--input", "{EXTRA}", "--input", "{BINPATCH}", "--output", "{PATCHED}"],
+             "outputs": {"{PATCHED}": "{PATCHED_SHA}"}},
+        ],
+        "libraries": [{"name": f"net.example:{name}:1.0", "downloads": {"artifact": {
+            "path": f"net/example/{name}/1.0/{name}-1.0.jar", "url": ""}}} for name in ("slim", "extra", "patcher")],
+    }
+    version = {"id": version_id, "inheritsFrom": vanilla_version, "mainClass": "cpw.mods.bootstraplauncher.Launcher",
+               "libraries": [{"name": f"net.minecraftforge:forge:{FORGE_VERSION}", "downloads": {"artifact": {
+                   "path": f"net/minecraftforge/forge/{FORGE_VERSION}/forge-{FORGE_VERSION}.jar", "url": ""}}}]}
+    files = {"install_profile.json": json.dumps(profile), "version.json": json.dumps(version),
+             "data/client.lzma": binpatch,
+             f"maven/net/minecraftforge/forge/{FORGE_VERSION}/forge-{FORGE_VERSION}.jar": jar({"forge": "forge"})}
+    for name in ("slim", "extra", "patcher"):
+        files[f"maven/net/example/{name}/1.0/{name}-1.0.jar"] = processor_jar(f"net.example.{name.capitalize()}")
+    standin.add(f"/forge/{FORGE_VERSION}/forge-{FORGE_VERSION}-installer.jar", jar(files))
+    return patched
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=5, libraries=2)
+        yield standin
+
+
+def make_forge_installer(standin, tmp_path, name):
+    metadata = MetadataCache(str(tmp_path / "metadata"), urls=metadata_urls(standin))
+    installer = Installer(str(tmp_path / name), metadata, Downloader(4), resources_url=standin.url("/resources"))
+    return ForgeInstaller(installer, fake_java_executable(str(tmp_path / "bin")), str(tmp_path / "forge"),
+                          maven_url=standin.url("/forge"))
+
+
+def test_install_and_reuse_across_directories(standin, tmp_path, monkeypatch):
+    patched = add_forge(standin)
+    log = tmp_path / "processors.log"
+    monkeypatch.setenv("FAKE_JAVA_PROCESSOR_LOG", str(log))
+    patched_path = os.path.join("libraries", "net", "minecraftforge", "forge", FORGE_VERSION,
+                                f"forge-{FORGE_VERSION}-client.jar")
+
+    forge = make_forge_installer(standin, tmp_path, "first")
+    assert forge.install(FORGE_VERSION) == "1.0-forge-1.0.0"
+    ran = log.read_text().split()
+    assert sorted(ran[:2]) == ["net.example.Extra", "net.example.Slim"] and ran[2:] == ["net.example.Patcher"]
+    assert (tmp_path / "first" / patched_path).read_bytes() == patched
+    assert (tmp_path / "first" / "versions" / "1.0-forge-1.0.0" / "1.0-forge-1.0.0.json").is_file()
+    assert (tmp_path / "first" / "versions" / "1.0" / "1.0.jar").is_file()
+
+    # Another directory gets the installer and every output from the cache
+    forge = make_forge_installer(standin, tmp_path, "second")
+    forge.install(FORGE_VERSION)
+    assert len(log.read_text().split()) == 3
+    assert (tmp_path / "second" / patched_path).read_bytes() == patched
+    assert standin.hits[f"/forge/{FORGE_VERSION}/forge-{FORGE_VERSION}-installer.jar"] == 1
+
+    # Installing again where it's done doesn't even look at the cache
+    forge = make_forge_installer(standin, tmp_path, "second")
+    root = tmp_path / "root"
+    root.mkdir()
+    with zipfile.ZipFile(forge.installer_jar(FORGE_VERSION)) as zf:
+        profile = json.loads(zf.read("install_profile.json"))
+    counts = forge.run_processors(FORGE_VERSION, forge.processors(profile, forge.installer_jar(FORGE_VERSION),
+                                                                  str(root)))
+    assert counts == {"ran": 0, "cached": 2, "skipped": 1}
+
+
+def test_processor_dependencies(standin, tmp_path):
+    add_forge(standin)
+    forge = make_forge_installer(standin, tmp_path, "minecraft")
+    installer_jar = forge.installer_jar(FORGE_VERSION)
+    with zipfile.ZipFile(installer_jar) as zf:
+        profile = json.loads(zf.read("install_profile.json"))
+        for name in zf.namelist():
+            if name.startswith("maven/net/example"):
+                path = tmp_path / "minecraft" / "libraries" / name[len("maven/"):]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(zf.read(name))
+    processors = forge.processors(profile, installer_jar, str(tmp_path / "root"))
+    # The server side processor is left out
+    assert [(p.index, p.depends_on) for p in processors] == [(0, set()), (1, set()), (3, {0, 1})]
+
+
+def test_failing_processor(standin, tmp_path, monkeypatch):
+    add_forge(standin)
+    monkeypatch.setenv("FAKE_JAVA_EXIT", "3")
+    with pytest.raises(InstallError, match="exit code 3"):
+        make_forge_installer(standin, tmp_path, "minecraft").install(FORGE_VERSION)
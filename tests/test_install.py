@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from mclauncher.download import Downloader, DownloadError, DownloadTask
+from mclauncher.install import Installer
+from mclauncher.metadata import MetadataCache
+from standin import StandIn, add_version, metadata_urls, sha1
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        yield standin
+
+
+def make_installer(standin, tmp_path, workers=4):
+    metadata = MetadataCache(str(tmp_path / "cache"), urls=metadata_urls(standin))
+    return Installer(str(tmp_path / "minecraft"), metadata, Downloader(workers, retries=2),
+                     resources_url=standin.url("/resources"))
+
+
+def test_install(standin, tmp_path):
+    version = add_version(standin, "1.0", assets=50, libraries=5)
+    installer = make_installer(standin, tmp_path)
+    installer.install("1.0")
+    mc = tmp_path / "minecraft"
+    assert (mc / "versions" / "1.0" / "1.0.json").is_file()
+    assert sha1((mc / "versions" / "1.0" / "1.0.jar").read_bytes()) == version["downloads"]["client"]["sha1"]
+    assert len(os.listdir(mc / "assets" / "objects")) > 0
+    for library in version["libraries"]:
+        artifact = library["downloads"]["artifact"]
+        assert sha1((mc / "libraries" / artifact["path"]).read_bytes()) == artifact["sha1"]
+
+    # A second install doesn't download anything
+    hits = sum(standin.hits.values())
+    assert make_installer(standin, tmp_path).downloader.download(installer.version_tasks(version)) == 0
+    installer.install("1.0")
+    assert sum(standin.hits.values()) == hits
+
+
+def test_retries_transient_failures(standin, tmp_path):
+    url = standin.add("/file", b"x" * 1000)
+    standin.failures["/file"] = 2
+    downloader = Downloader(retries=2)
+    downloader.backoff = 0
+    path = str(tmp_path / "file")
+    assert downloader.fetch(DownloadTask(url, path, sha1=sha1(b"x" * 1000)))
+    assert standin.hits["/file"] == 3
+
+    standin.failures["/file"] = 5
+    os.remove(path)
+    with pytest.raises(DownloadError):
+        downloader.fetch(DownloadTask(url, path))
+
+
+def test_resumes_partial_file(standin, tmp_path):
+    data = bytes(range(256)) * 100
+    url = standin.add("/file", data)
+    path = str(tmp_path / "file")
+    with open(path + ".part", "wb") as f:
+        f.write(data[:5000])
+    assert Downloader().fetch(DownloadTask(url, path, sha1=sha1(data), size=len(data)))
+    assert standin.ranges_served == 1
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(path + ".part")
+
+
+def test_bad_checksum_is_rejected(standin, tmp_path):
+    url = standin.add("/file", b"corrupt")
+    downloader = Downloader(retries=1)
+    downloader.backoff = 0
+    with pytest.raises(DownloadError):
+        downloader.fetch(DownloadTask(url, str(tmp_path / "file"), sha1=sha1(b"expected")))
+    assert not os.path.exists(tmp_path / "file")
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from mclauncher import jvm
+
+FAKE_JAVA = os.path.join(os.path.dirname(__file__), "fake_java.py")
+GIB = 1024 ** 3
+
+
+def test_java_version_is_cached(tmp_path, monkeypatch):
+    cache = str(tmp_path / "versions.json")
+    monkeypatch.setenv("FAKE_JAVA_VERSION", "1.8.0_381")
+    assert jvm.java_version(FAKE_JAVA, cache) == 8
+    monkeypatch.setattr("mclauncher.runtime.subprocess.run", lambda *args, **kwargs: pytest.fail("should be cached"))
+    assert jvm.java_version(FAKE_JAVA, cache) == 8
+    assert jvm.java_version(str(tmp_path / "missing"), cache) is None
+
+
+def test_validate_flags():
+    flags, problems = jvm.validate_flags(
+        ["-XX:+UseZGC", "-XX:+UseG1GC", "-XX:+UseParallelGC", "-XX:G1NewSizePercent=30", "-Xmx2G", "-Xms4G"], 11)
+    assert flags == ["-XX:+UseG1GC", "-XX:+UnlockExperimentalVMOptions", "-XX:G1NewSizePercent=30", "-Xmx2G",
+                     "-Xms2048m"]
+    assert len(problems) == 3
+    flags, problems = jvm.validate_flags(["-Xmx64G", "-XX:MaxPermSize=256m"], 17, memory=16 * GIB)
+    assert flags == [] and len(problems) == 2
+    # Version-specific flags are dropped when the version is unknown
+    assert jvm.validate_flags(["-XX:+UseZGC", "-XX:+UseG1GC"], None)[0] == ["-XX:+UseG1GC"]
+
+
+def test_heap_size():
+    assert jvm.heap_size(jvm.PROFILES["low-latency"], 1, 8 * GIB) == 4608
+    assert jvm.heap_size(jvm.PROFILES["many-instances"], 4, 16 * GIB) == 2048
+    assert jvm.heap_size(jvm.PROFILES["many-instances"], 40, 16 * GIB) == 512
+    assert jvm.heap_size(jvm.PROFILES["throughput"], 1, None) > 0
+
+
+@pytest.mark.parametrize("java, expected", [
+    (17, "-XX:+UseG1GC"), (21, "-XX:+ZGenerational"), (23, "-XX:+UseZGC"),
+])
+def test_profile_flags_follow_java_version(java, expected):
+    flags = jvm.jvm_arguments(jvm.PROFILES["low-latency"], java, available=8 * GIB)
+    assert expected in flags
+    assert ("-XX:+ZGenerational" in flags) == (java in (21, 22))
+    assert "-Xmx4608m" in flags and "-Xms4608m" in flags
+
+
+def test_selection_and_user_profiles(tmp_path):
+    selection = jvm.parse_profile_selection(["throughput", "1.20.1=low-latency"])
+    assert jvm.select_profile(selection, "fabric-loader-0.14-1.20.1", "1.20.1") == "low-latency"
+    assert jvm.select_profile(selection, "1.19") == "throughput"
+
+    path = tmp_path / "jvm_profiles.json"
+    path.write_text(json.dumps({"bots": {"flags": ["-XX:+UseSerialGC"], "max_heap": 768}}))
+    profiles = jvm.load_profiles(str(path))
+    assert set(jvm.PROFILES) < set(profiles)
+    assert jvm.jvm_arguments(profiles["bots"], 17, available=64 * GIB)[:2] == ["-XX:+UseSerialGC", "-Xmx768m"]
+    path.write_text(json.dumps({"bad": {"gc": "zgc"}}))
+    with pytest.raises(ValueError):
+        jvm.load_profiles(str(path))
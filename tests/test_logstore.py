@@ -0,0 +1,146 @@
+import logging
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from mclauncher.commands import run_command
+from mclauncher.logstore import LogStore, LogWriter, parse_time
+from mclauncher.pipe import LogPipe
+
+
+def make_records(start, count, level=logging.INFO):
+    records = []
+    for i in range(start, start + count):
+        record = logging.LogRecord("minecraft", level, "", 0, f"main - line {i}", None, None)
+        record.created = 1000.0 + i
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_rotates_compresses_and_reads_back(tmp_path, monkeypatch, compression):
+    monkeypatch.setattr(LogWriter, "segment_size", 4096)
+    monkeypatch.setattr(LogWriter, "block_size", 1024)
+    store = LogStore(str(tmp_path))
+    writer = store.open("client", compression)
+    for start in range(0, 1000, 10):
+        writer.write(make_records(start, 10, logging.ERROR if start == 500 else logging.INFO))
+    writer.close()
+
+    names = os.listdir(writer.directory)
+    assert len([name for name in names if name.endswith(".idx")]) > 3
+    assert any(name.endswith(".log") for name in names) == (compression == "none")
+
+    launch, = store.launches("client")
+    entries = list(store.read(launch))
+    assert [entry.message for entry in entries] == [f"main - line {i}" for i in range(1000)]
+    assert [entry.message for entry in store.read(launch, level=logging.ERROR)] == \
+        [f"main - line {i}" for i in range(500, 510)]
+    assert [entry.created for entry in store.read(launch, since=1100, until=1102)] == [1100, 1101, 1102]
+    assert [entry.message for entry in store.tail(launch, 2, pattern=re.compile(r"line 9\d$"))] == \
+        ["main - line 98", "main - line 99"]
+
+
+def test_skips_blocks_by_index(tmp_path, monkeypatch):
+    store = LogStore(str(tmp_path))
+    writer = store.open("client", "gzip")
+    writer.block_size = 1
+    for start in range(0, 100, 10):
+        writer.write(make_records(start, 10))
+    writer.close()
+    launch, = store.launches("client")
+
+    decompressed = []
+    monkeypatch.setattr("mclauncher.logstore.gzip.decompress",
+                        lambda data, original=__import__("gzip").decompress: decompressed.append(1) or original(data))
+    assert len(list(store.read(launch, since=1095))) == 5
+    assert len(decompressed) == 1
+    assert list(store.read(launch, level=logging.WARNING)) == []
+    assert len(decompressed) == 1
+
+
+def test_messages_with_line_breaks(tmp_path):
+    store = LogStore(str(tmp_path))
+    writer = store.open("client", "none")
+    records = make_records(0, 3)
+    records[0].msg = "Loading 10%\r20%\x0c\u2028done"
+    records[1].msg = "Traceback:\n  at a\n\n  at b"
+    writer.write(records)
+    writer.close()
+    launch, = store.launches("client")
+    assert [entry.message for entry in store.read(launch)] == [
+        "Loading 10%\r20%\x0c\u2028done", "Traceback:\n  at a\n\n  at b", "main - line 2"]
+
+
+def take(follower, count, timeout=5):
+    # follow() waits for new lines forever, so read on a thread that can be abandoned
+    messages = []
+
+    def read():
+        for _ in range(count):
+            messages.append(next(follower).message)
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return messages
+
+
+def test_follow_across_compression(tmp_path):
+    store = LogStore(str(tmp_path))
+    writer = store.open("client", "gzip")
+    # The first batch stays below the segment size, the second rotates it and both end up in one compressed block
+    writer.segment_size = 500
+    writer.write(make_records(0, 10))
+    launch, = store.launches("client")
+    follower = store.follow(launch, interval=0.01, start=("00000", 0))
+    assert take(follower, 10) == [f"main - line {i}" for i in range(10)]
+    # The follower lags behind: the segment is compressed before it gets to the second batch
+    writer.write(make_records(10, 10))
+    assert not os.path.exists(os.path.join(launch, "00000.log"))
+    assert take(follower, 10) == [f"main - line {i}" for i in range(10, 20)]
+    writer.write(make_records(20, 1))
+    assert take(follower, 1) == ["main - line 20"]
+    writer.close()
+
+
+def test_pipe_stores_lines_the_logger_ignores(tmp_path):
+    logger = logging.getLogger("test_logstore")
+    logger.setLevel(logging.ERROR)
+    store = LogStore(str(tmp_path))
+    pipe = LogPipe(logger, store=store.open("client"))
+    os.write(pipe.fileno(), b"[12:00:00] [main/DEBUG]: quiet\n[12:00:00] [main/ERROR]: loud\nunprefixed")
+    pipe.close()
+    pipe.join()
+    launch, = store.launches("client")
+    assert [(entry.level, entry.message) for entry in store.read(launch)] == \
+        [(logging.DEBUG, "main - quiet"), (logging.ERROR, "main - loud"), (logging.INFO, "Java - unprefixed")]
+
+
+def test_prune_and_parse_time(tmp_path):
+    store = LogStore(str(tmp_path))
+    store.open("client").close()
+    launch, = store.launches("client")
+    old = time.time() - 40 * 86400
+    for name in os.listdir(launch):
+        os.utime(os.path.join(launch, name), (old, old))
+    store.open("client").close()
+    assert len(store.launches("client")) == 1
+    assert parse_time("2h", now=10000) == 10000 - 7200
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+
+def test_logs_command(tmp_path, capsys):
+    store = LogStore(str(tmp_path))
+    writer = store.open("client")
+    writer.write(make_records(0, 20))
+    writer.close()
+    assert run_command(["logs", "client", "--store", str(tmp_path), "-n", "3"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert [line.split("] ", 1)[1] for line in out] == ["main - line 17", "main - line 18", "main - line 19"]
+    assert run_command(["logs", "client", "--store", str(tmp_path), "--grep", "line 1[05]$"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
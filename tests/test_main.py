@@ -1,6 +1,127 @@
-import mclauncher
+import json
+import os
+import time
 
+import pytest
 
-def test_main():
-    # TODO: Add tests
-    assert 1 == 1
+from mclauncher.auth import CredentialStore
+from mclauncher.main import launch
+from standin import StandIn, add_token_endpoint, add_version, launcher_environment
+
+
+def test_launch(tmp_path):
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=20, libraries=3)
+        auth_server = add_token_endpoint(standin)
+        with launcher_environment(standin, tmp_path):
+            # Expired, so the launch refreshes it
+            CredentialStore().save({"username": "Steve", "uuid": "1234", "token": "old", "refresh_token": "old",
+                                    "expires_in": 0})
+            assert launch(args=["--auth-server", auth_server, "--log-store", "--timings", "json",
+                                "--timings-output", str(tmp_path / "timings.json")]) == 0
+            assert CredentialStore().load()["login_data"]["token"] == "token-old"
+        assert standin.hits["/refresh"] == 1
+
+    assert os.path.isfile(tmp_path / ".minecraft" / "versions" / "1.0" / "1.0.jar")
+    with open(tmp_path / "timings.json") as f:
+        phases = {tuple(phase["path"]) for phase in json.load(f)["phases"]}
+    # The login runs in its own thread
+    assert {("launch", "install"), ("auth",), ("launch", "wait_for_login"), ("launch", "command"),
+            ("launch", "game")} <= phases
+    logs = os.listdir(tmp_path / "mclauncher" / "logs" / "default")
+    assert logs
+
+
+def test_login_overlaps_install(tmp_path):
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=20, libraries=3)
+        auth_server = add_token_endpoint(standin)
+        refresh = standin.posts["/refresh"]
+
+        def slow_refresh(form):
+            time.sleep(0.5)
+            return refresh(form)
+        standin.posts["/refresh"] = slow_refresh
+        with launcher_environment(standin, tmp_path):
+            CredentialStore().save({"username": "Steve", "uuid": "1234", "token": "old", "refresh_token": "old",
+                                    "expires_in": 0})
+            assert launch(args=["--auth-server", auth_server, "--timings", "json",
+                                "--timings-output", str(tmp_path / "timings.json")]) == 0
+
+    with open(tmp_path / "timings.json") as f:
+        spans = {span["name"]: span for span in json.load(f)["spans"]}
+    install, auth = spans["install"], spans["auth"]
+    assert auth["start"] < install["start"] + install["duration"]
+    assert install["start"] < auth["start"] + auth["duration"]
+
+
+def test_launch_launcher_profile(tmp_path):
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=5, libraries=2)
+        auth_server = add_token_endpoint(standin)
+        with launcher_environment(standin, tmp_path):
+            CredentialStore().save({"username": "Steve", "uuid": "1234", "token": "old", "refresh_token": "old",
+                                    "expires_in": 3600})
+            minecraft = tmp_path / ".minecraft"
+            minecraft.mkdir()
+            (minecraft / "launcher_profiles.json").write_text(json.dumps({"profiles": {"abc": {
+                "name": "Tuned", "lastVersionId": "1.0", "gameDir": str(tmp_path / "game"),
+                "javaArgs": "-Xmx1G -Dmclauncher.test=1", "resolution": {"width": 1280, "height": 720}}}}))
+            assert launch(args=["--auth-server", auth_server, "--launcher-profile", "tuned"]) == 0
+            # Matched by version only: just the game directory
+            assert launch(args=["--auth-server", auth_server, "1.0"]) == 0
+
+    plans = []
+    for name in os.listdir(tmp_path / "mclauncher" / "cache" / "commands"):
+        with open(tmp_path / "mclauncher" / "cache" / "commands" / name) as f:
+            plans.append(json.load(f)["arguments"])
+    assert len(plans) == 2
+    by_profile, by_version = sorted(plans, key=lambda arguments: "-Xmx1G" not in arguments)
+    assert by_profile[:2] == ["-Xmx1G", "-Dmclauncher.test=1"]
+    assert by_profile[by_profile.index("--gameDir") + 1] == str(tmp_path / "game")
+    assert by_profile[by_profile.index("--width") + 1] == "1280"
+    assert "-Xmx1G" not in by_version and "--width" not in by_version
+    assert by_version[by_version.index("--gameDir") + 1] == str(tmp_path / "game")
+
+
+def test_offline_without_cached_metadata(tmp_path, capsys):
+    with StandIn() as standin:
+        with launcher_environment(standin, tmp_path):
+            with pytest.raises(SystemExit) as exit_info:
+                launch(args=["--offline"])
+            assert exit_info.value.code == 2
+            assert "Can't resolve the version" in capsys.readouterr().err
+            # Installed, so the version resolves, but the fabric metadata isn't cached
+            os.makedirs(tmp_path / ".minecraft" / "versions" / "1.0")
+            with pytest.raises(SystemExit) as exit_info:
+                launch(args=["1.0", "--offline", "--fabric"])
+            assert exit_info.value.code == 2
+    err = capsys.readouterr().err
+    assert "Can't look up fabric for 1.0" in err
+    assert "Traceback" not in err
+
+
+def test_failed_launch_stops_the_browser_login(tmp_path, monkeypatch):
+    import threading
+    import webbrowser
+
+    from mclauncher.install import Installer
+
+    browser_opened = threading.Event()
+
+    def fail(self, version):
+        # Fail while the login is waiting for the browser
+        assert browser_opened.wait(5)
+        raise RuntimeError("install failed")
+
+    monkeypatch.setattr(webbrowser, "open_new", lambda url: browser_opened.set())
+    monkeypatch.setattr(Installer, "install", fail)
+    with StandIn() as standin:
+        add_version(standin, "1.0")
+        with launcher_environment(standin, tmp_path):
+            with pytest.raises(RuntimeError, match="install failed"):
+                launch(args=["1.0", "--auth-server", add_token_endpoint(standin)])
+    deadline = time.time() + 5
+    while any(thread.name in ("mclauncher-login", "mclauncher-auth-callback") for thread in threading.enumerate()):
+        assert time.time() < deadline, "the login is still waiting for the browser"
+        time.sleep(0.05)
@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pytest
+
+from mclauncher.metadata import MetadataCache, OfflineError
+from standin import StandIn
+
+MANIFEST = {
+    "latest": {"release": "1.18.1", "snapshot": "22w03a"},
+    "versions": [
+        {"id": "22w03a", "type": "snapshot", "url": "https://example.invalid/22w03a.json"},
+        {"id": "1.18.1", "type": "release", "url": "https://example.invalid/1.18.1.json"},
+    ],
+}
+FORGE_METADATA = """<metadata><versioning><release>1.18.1-39.0.5</release><versions>
+<version>1.18.1-39.0.5</version><version>1.18.1-39.0.0</version><version>1.17.1-37.1.1</version>
+</versions></versioning></metadata>"""
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        standin.add("/version_manifest.json", MANIFEST)
+        standin.add("/forge/maven-metadata.xml", FORGE_METADATA)
+        standin.add("/fabric/game", [{"version": "1.18.1", "stable": True}])
+        standin.add("/fabric/loader", [{"version": "0.12.12", "stable": True}])
+        yield standin
+
+
+def make_cache(standin, directory, **kwargs):
+    return MetadataCache(str(directory), urls={
+        "version_manifest": standin.url("/version_manifest.json"),
+        "forge_maven_metadata": standin.url("/forge/maven-metadata.xml"),
+        "fabric_game_versions": standin.url("/fabric/game"),
+        "fabric_loader_versions": standin.url("/fabric/loader"),
+    }, **kwargs)
+
+
+def test_lookups(standin, tmp_path):
+    cache = make_cache(standin, tmp_path)
+    assert cache.get_latest_version()["release"] == "1.18.1"
+    assert cache.is_version_valid("1.18.1", str(tmp_path))
+    assert not cache.is_version_valid("1.99", str(tmp_path))
+    assert cache.find_forge_version("1.18.1") == "1.18.1-39.0.5"
+    assert cache.find_forge_version("1.18.1") == "1.18.1-39.0.5"
+    assert cache.find_forge_version("1.12.2") is None
+    assert cache.is_fabric_version_supported("1.18.1")
+    assert cache.get_latest_fabric_loader_version() == "0.12.12"
+    # Each resource is fetched once, no matter how many lookups use it
+    assert all(count == 1 for count in standin.hits.values())
+
+
+def test_ttl_and_revalidation(standin, tmp_path):
+    make_cache(standin, tmp_path).get_latest_version()
+    make_cache(standin, tmp_path).get_latest_version()
+    assert standin.hits["/version_manifest.json"] == 1
+
+    # Expired entries are revalidated with a conditional request
+    expired = make_cache(standin, tmp_path, ttls={"version_manifest": 0})
+    assert expired.get_latest_version()["release"] == "1.18.1"
+    assert standin.hits["/version_manifest.json"] == 2
+
+    # Changed resources are downloaded again
+    standin.add("/version_manifest.json", {**MANIFEST, "latest": {"release": "1.18.2", "snapshot": "22w03a"}})
+    assert make_cache(standin, tmp_path, ttls={"version_manifest": 0}).get_latest_version()["release"] == "1.18.2"
+    assert make_cache(standin, tmp_path).get_latest_version()["release"] == "1.18.2"
+
+
+def test_offline(standin, tmp_path):
+    make_cache(standin, tmp_path).get_latest_version()
+    offline = make_cache(standin, tmp_path, offline=True, ttls={"version_manifest": 0})
+    assert offline.get_latest_version()["release"] == "1.18.1"
+    assert standin.hits["/version_manifest.json"] == 1
+    with pytest.raises(OfflineError):
+        offline.find_forge_version("1.18.1")
+
+
+def test_stale_copy_used_when_server_is_gone(tmp_path):
+    with StandIn() as standin:
+        standin.add("/version_manifest.json", MANIFEST)
+        make_cache(standin, tmp_path).get_latest_version()
+    assert make_cache(standin, tmp_path, ttls={"version_manifest": 0}).get_latest_version()["release"] == "1.18.1"
+
+
+def test_concurrent_stores(tmp_path):
+    cache = MetadataCache(str(tmp_path))
+    path = str(tmp_path / "version_manifest.json")
+    errors = []
+
+    def store(i):
+        try:
+            for _ in range(50):
+                cache._store(path, str(i).encode() * 1000)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,60 @@
+import json
+import logging
+import subprocess
+import sys
+
+from mclauncher.milestones import MilestoneTracker
+from mclauncher.pipe import LogParser, LogPipe
+from test_multi import FAKE_JAVA
+
+SERVER_OUTPUT = b"""[12:00:00] [main/INFO]: Starting minecraft server version 1.20.1
+[12:00:01] [Server thread/INFO]: Preparing level "world"
+[12:00:04] [Server thread/INFO]: Done (3.512s)! For help, type "help"
+[12:00:09] [Server thread/INFO]: Steve joined the game
+[12:00:10] [Server thread/INFO]: Done (1.000s)! For help, type "help"
+"""
+
+
+def test_tracks_first_occurrence(tmp_path):
+    parser = LogParser(logging.getLogger("test_milestones"), logging.INFO)
+    tracker = MilestoneTracker(started=0, report_file=str(tmp_path / "timings.jsonl"), context={"version": "1.20.1"})
+    records = parser.feed(SERVER_OUTPUT)
+    for i, record in enumerate(records):
+        record.created = float(i)
+    tracker.write(records[:3])
+    tracker.write(records[3:])
+    tracker.close()
+    report = tracker.report()
+    assert report["milestones"] == {"server_done": 2.0, "world_join": 3.0}
+    assert report["server_reported_seconds"] == 3.512
+    assert report["version"] == "1.20.1"
+    with open(tmp_path / "timings.jsonl") as f:
+        assert json.loads(f.read())["milestones"] == report["milestones"]
+
+
+def test_client_milestones():
+    parser = LogParser(logging.getLogger("test_milestones"), logging.INFO)
+    tracker = MilestoneTracker(started=0)
+    records = parser.feed(b"""[12:00:00] [Render thread/INFO]: Backend library: LWJGL version 3.3.1 SNAPSHOT
+[12:00:01] [Render thread/INFO]: Reloading ResourceManager: vanilla
+[12:00:02] [Render thread/INFO]: Sound engine started
+[12:00:03] [Render thread/INFO]: Created: 1024x512x4 minecraft:textures/atlas/blocks.png-atlas
+""")
+    for i, record in enumerate(records):
+        record.created = float(i)
+    tracker.write(records)
+    assert tracker.milestones == {"window": 0.0, "resource_reload_start": 1.0, "sound_engine": 2.0,
+                                  "texture_atlas": 3.0}
+
+
+def test_pipe_finds_milestones_the_logger_ignores(capsys):
+    logger = logging.getLogger("test_milestones")
+    logger.setLevel(logging.WARNING)
+    tracker = MilestoneTracker(echo=True)
+    pipe = LogPipe(logger, milestones=tracker)
+    subprocess.run(FAKE_JAVA, stdout=pipe, stderr=pipe)
+    pipe.close()
+    pipe.join()
+    assert list(tracker.milestones) == ["window", "sound_engine"]
+    out = capsys.readouterr().out
+    assert "sound_engine" in out and out.startswith("Launch timings")
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+from mclauncher.commands import run_command
+from mclauncher.logstore import LogStore
+from mclauncher.multi import Instance, InstanceSpec, launch_many, offline_login_data
+from test_command import write_version
+
+FAKE_JAVA = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_java.py")]
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = {}
+        self.max_threads = 0
+
+    def emit(self, record):
+        self.messages.setdefault(record.name, []).append(record.getMessage())
+        self.max_threads = max(self.max_threads, threading.active_count())
+
+
+@pytest.fixture
+def collector():
+    collector = Collector()
+    minecraft = logging.getLogger("minecraft")
+    minecraft.addHandler(collector)
+    minecraft.setLevel(logging.INFO)
+    yield collector
+    minecraft.removeHandler(collector)
+
+
+def test_many_instances_one_reader(tmp_path, collector):
+    threads = threading.active_count()
+    instances = [Instance(f"bot{i}", FAKE_JAVA + ["--username", f"bot{i}"], cwd=str(tmp_path / f"bot{i}"))
+                 for i in range(60)]
+    results = launch_many(instances, max_running=20)
+    assert [instance.returncode for instance in results] == [0] * 60
+    for i in range(60):
+        messages = collector.messages[f"minecraft.bot{i}"]
+        assert messages[0] == f"main - Setting user: bot{i}"
+        assert "Java - Unformatted output from a mod" in messages
+        assert len(messages) == 26
+    # The sink and the reader, no thread per instance
+    assert collector.max_threads <= threads + 2
+
+
+def test_exit_codes_and_failures(tmp_path, collector):
+    env = dict(os.environ, FAKE_JAVA_EXIT="3")
+    results = launch_many([Instance("crash", FAKE_JAVA, env=env), Instance("missing", [str(tmp_path / "nope")])],
+                          log_store=LogStore(str(tmp_path / "logs")))
+    assert results[0].returncode == 3
+    assert results[1].returncode is None and results[1].error is not None
+    launch, = LogStore(str(tmp_path / "logs")).launches("crash")
+    assert len(list(LogStore(str(tmp_path / "logs")).read(launch))) == 26
+
+
+def test_spec():
+    spec = InstanceSpec.from_dict({"name": "a", "version": "1.0", "jvm_arguments": ["-Xmx1G"]})
+    assert spec.options("/mc") == {"gameDirectory": os.path.join("/mc", "instances", "a"), "jvmArguments": ["-Xmx1G"]}
+    with pytest.raises(ValueError):
+        InstanceSpec.from_dict({"name": "a", "version": "1.0", "color": "red"})
+    # The UUID offline-mode servers give this name
+    assert offline_login_data("Notch")["uuid"] == "b50ad385829d3141a2167e7d7539ba7f"
+
+
+def test_multi_command(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("MCLAUNCHER_HOME", str(tmp_path / "home"))
+    mc = str(tmp_path / "minecraft")
+    write_version(mc, "1.0")
+    spec = tmp_path / "instances.json"
+    spec.write_text(json.dumps({"instances": [
+        {"name": f"bot{i}", "version": "1.0", "username": f"bot{i}", "java": " ".join(FAKE_JAVA)} for i in range(5)
+    ]}))
+    assert run_command(["multi", str(spec), "--minecraft-directory", mc, "--no-install", "--max-running", "2"]) == 0
+    out = capsys.readouterr().out
+    assert out.count("exit code 0") == 5
+    assert os.path.isdir(os.path.join(mc, "instances", "bot4"))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake java is a shell script")
+def test_multi_installs_once(tmp_path, capsys):
+    from standin import StandIn, add_version, launcher_environment
+
+    mc = str(tmp_path / "minecraft")
+    spec = tmp_path / "instances.json"
+    spec.write_text(json.dumps([{"name": "bot", "version": "1.0", "username": "bot"}]))
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=2, libraries=1)
+        with launcher_environment(standin, tmp_path):
+            assert run_command(["multi", str(spec), "--minecraft-directory", mc]) == 0
+            assert "Installing 1.0" in capsys.readouterr().out
+            # Already installed, so the second run launches straight away
+            assert run_command(["multi", str(spec), "--minecraft-directory", mc]) == 0
+            out = capsys.readouterr().out
+    assert "Installing 1.0" not in out
+    assert "exit code 0" in out
+
+
+def test_failed_instance_sets_the_exit_code(tmp_path):
+    import subprocess
+
+    mc = str(tmp_path / "minecraft")
+    write_version(mc, "1.0")
+    spec = tmp_path / "instances.json"
+    spec.write_text(json.dumps([{"name": "crash", "version": "1.0", "username": "bot", "java": " ".join(FAKE_JAVA)}]))
+    env = dict(os.environ, MCLAUNCHER_HOME=str(tmp_path / "home"), FAKE_JAVA_EXIT="3",
+               PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                           os.environ.get("PYTHONPATH", "")]))
+    result = subprocess.run([sys.executable, "-m", "mclauncher", "multi", str(spec), "--minecraft-directory", mc,
+                             "--no-install"], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert result.returncode == 1, result.stderr.decode()
+    assert b"exit code 3" in result.stdout
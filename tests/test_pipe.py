@@ -0,0 +1,43 @@
+import logging
+import os
+
+import pytest
+
+from mclauncher.pipe import LogParser, LogPipe
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("test_pipe")
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_parses_log4j_lines(logger):
+    logger.setLevel(1)
+    parser = LogParser(logger)
+    records = parser.feed(b"[12:00:00] [Render thread/WARN]: hello: [1/2]\nplain output\n[12:00:01] [main/")
+    assert [(r.levelno, r.getMessage()) for r in records] == [
+        (logging.WARNING, "Render thread - hello: [1/2]"),
+        (logging.INFO, "Java - plain output"),
+    ]
+    records = parser.feed(b"TRACE]: x\r\n[12:00:02] [main/FATAL]: \xff")
+    assert [(r.levelno, r.getMessage()) for r in records] == [(5, "main - x")]
+    assert [(r.levelno, r.getMessage()) for r in parser.flush()] == [(logging.CRITICAL, "main - �")]
+
+
+def test_disabled_levels_are_skipped(logger):
+    logger.setLevel(logging.WARNING)
+    records = LogParser(logger).feed(b"[12:00:00] [main/INFO]: a\n[12:00:00] [main/ERROR]: b\n")
+    assert [r.getMessage() for r in records] == ["main - b"]
+    assert records[0].name == "test_pipe"
+
+
+def test_pipe_logs_everything_written(logger, caplog):
+    pipe = LogPipe(logger)
+    for i in range(1000):
+        os.write(pipe.fileno(), f"[12:00:00] [main/INFO]: line {i}\n".encode())
+    pipe.close()
+    pipe.join()
+    messages = [r.getMessage() for r in caplog.records if r.name == "test_pipe"]
+    assert messages == [f"main - line {i}" for i in range(1000)]
@@ -0,0 +1,52 @@
+import json
+import os
+
+from mclauncher.profiles import ProfileIndex
+
+PROFILES = {
+    "abc": {"name": "Modded", "type": "custom", "lastVersionId": "fabric-loader-0.14.22-1.20.1",
+            "gameDir": "/games/modded", "javaDir": "/opt/jdk-17/bin/java", "javaArgs": "-Xmx4G -Dtitle='a b'",
+            "resolution": {"width": 1280, "height": 720}, "lastUsed": "2023-08-01T10:00:00.000Z",
+            "icon": "data:image/png;base64," + "A" * 10000},
+    "def": {"name": "Old modded", "type": "custom", "lastVersionId": "fabric-loader-0.14.22-1.20.1",
+            "lastUsed": "2023-01-01T10:00:00.000Z"},
+    "latest": {"type": "latest-release", "lastVersionId": "latest-release", "lastUsed": "2023-07-01T10:00:00.000Z"},
+}
+
+
+def write_profiles(tmp_path, profiles, mtime=None):
+    path = tmp_path / "launcher_profiles.json"
+    path.write_text(json.dumps({"profiles": profiles, "version": 3}))
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_lookup(tmp_path):
+    write_profiles(tmp_path, PROFILES)
+    index = ProfileIndex(str(tmp_path))
+    assert index.get("modded").id == "abc" and index.get("abc").id == "abc"
+    assert index.get("missing") is None
+    # The most recently used one wins
+    assert index.for_version("fabric-loader-0.14.22-1.20.1").name == "Modded"
+    assert index.get("latest").version({"release": "1.20.1", "snapshot": "23w31a"}) == "1.20.1"
+    assert index.get("modded").launch_options() == {
+        "gameDirectory": "/games/modded", "executablePath": "/opt/jdk-17/bin/java",
+        "jvmArguments": ["-Xmx4G", "-Dtitle=a b"], "customResolution": True, "resolutionWidth": "1280",
+        "resolutionHeight": "720"}
+    assert index.get("Old modded").launch_options() == {}
+
+
+def test_index_is_cached_until_the_file_changes(tmp_path):
+    write_profiles(tmp_path, PROFILES, mtime=10 ** 18)
+    ProfileIndex(str(tmp_path))
+    # Same size and mtime: the index isn't rebuilt, and the icons aren't kept in it
+    assert os.path.getsize(tmp_path / ProfileIndex.filename) < 1000
+    write_profiles(tmp_path, {**PROFILES, "abc": {**PROFILES["abc"], "name": "Mudded"}}, mtime=10 ** 18)
+    index = ProfileIndex(str(tmp_path))
+    assert index.get("modded") is not None
+    os.utime(tmp_path / "launcher_profiles.json", ns=(2 * 10 ** 18, 2 * 10 ** 18))
+    index.refresh()
+    assert index.get("modded") is None and index.get("mudded").id == "abc"
+    os.remove(tmp_path / "launcher_profiles.json")
+    index.refresh()
+    assert index.profiles == {}
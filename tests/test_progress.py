@@ -0,0 +1,45 @@
+import io
+
+from mclauncher.progress import Progress
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_lines_when_not_a_terminal():
+    stream = io.StringIO()
+    progress = Progress(stream)
+    install = progress.task("install", "Installing 1.0")
+    login = progress.task("login", "Logging in")
+    install.set_max(100)
+    for i in range(1, 101):
+        install.set_progress(i)
+    login.finish("Logged in as Steve")
+    install.finish("Installed 1.0")
+    progress.close()
+    assert stream.getvalue().splitlines() == [
+        "install: Installing 1.0", "login: Logging in",
+        "install: Installing 1.0 25/100 (25%)", "install: Installing 1.0 50/100 (50%)",
+        "install: Installing 1.0 75/100 (75%)", "install: Installing 1.0 100/100 (100%)",
+        "login: Logged in as Steve", "install: Installed 1.0"]
+
+
+def test_one_status_line_on_a_terminal():
+    stream = Terminal()
+    progress = Progress(stream, interval=0)
+    install = progress.task("install", "Installing 1.0")
+    login = progress.task("login", "Waiting for the login in the browser")
+    install.set_max(4)
+    install.set_progress(2)
+    assert stream.getvalue().rsplit("\r", 1)[1] == ("install: Installing 1.0 2/4 (50%) | "
+                                                    "login: Waiting for the login in the browser")
+    login.finish("Logged in as Steve")
+    assert "login: Logged in as Steve\n" in stream.getvalue()
+    assert stream.getvalue().rsplit("\r", 1)[1].strip() == "install: Installing 1.0 2/4 (50%)"
+    with progress.paused():
+        install.set_progress(3)
+        paused = stream.getvalue()
+    assert paused.endswith("\r")
+    progress.close()
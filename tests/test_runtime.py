@@ -0,0 +1,106 @@
+import json
+import os
+import shlex
+import sys
+
+import pytest
+
+from mclauncher.download import Downloader
+from mclauncher.install import InstallError
+from mclauncher.metadata import MetadataCache
+from mclauncher.runtime import RuntimeManager, java_requirement, probe_java, runtime_platform
+from standin import FAKE_JAVA, StandIn, add_java_runtime, metadata_urls
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the fake java runtimes are shell scripts")
+
+
+def system_java(directory, version, arch="amd64"):
+    path = os.path.join(directory, "bin", "java")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\nFAKE_JAVA_VERSION={version} FAKE_JAVA_ARCH={arch} "
+                f'exec {shlex.quote(sys.executable)} {shlex.quote(FAKE_JAVA)} "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        add_java_runtime(standin, "java-runtime-gamma", "17.0.8")
+        add_java_runtime(standin, "jre-legacy", "1.8.0_381", files=5)
+        yield standin
+
+
+@pytest.fixture
+def manager(standin, tmp_path, monkeypatch):
+    monkeypatch.delenv("JAVA_HOME", raising=False)
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    metadata = MetadataCache(str(tmp_path / "metadata"), urls=metadata_urls(standin))
+    return RuntimeManager(str(tmp_path / "minecraft"), metadata, Downloader(4), str(tmp_path / "runtimes.json"),
+                          search_patterns=[str(tmp_path / "jvm" / "*" / "bin" / "java")])
+
+
+def test_probe_is_cached_until_java_changes(tmp_path, monkeypatch):
+    java = system_java(str(tmp_path / "jdk"), "21.0.1", "aarch64")
+    cache = str(tmp_path / "runtimes.json")
+    runtime = probe_java(java, cache, "system")
+    assert (runtime.major, runtime.version, runtime.arch, runtime.source) == (21, "21.0.1", "aarch64", "system")
+
+    def fail(*args, **kwargs):
+        pytest.fail("should be cached")
+
+    monkeypatch.setattr("mclauncher.runtime.subprocess.run", fail)
+    assert probe_java(java, cache) == runtime._replace(source="")
+    monkeypatch.undo()
+    system_java(str(tmp_path / "jdk"), "11.0.20")
+    assert probe_java(java, cache).major == 11
+    assert probe_java(str(tmp_path / "missing"), cache) is None
+
+
+def test_install(manager, standin, tmp_path):
+    runtime = manager.install("java-runtime-gamma")
+    assert (runtime.major, runtime.component, runtime.source) == (17, "java-runtime-gamma", "mojang")
+    base = tmp_path / "minecraft" / "runtime" / "java-runtime-gamma" / runtime_platform()
+    assert (base / ".version").read_text() == "17.0.8"
+    assert len(os.listdir(base / "java-runtime-gamma" / "lib")) == 20
+    assert os.access(base / "java-runtime-gamma" / "bin" / "java", os.X_OK)
+    assert os.readlink(base / "java-runtime-gamma" / "legal") == "lib"
+    with pytest.raises(InstallError):
+        manager.install("java-runtime-delta")
+    # Already installed, nothing is downloaded again
+    hits = sum(standin.hits.values())
+    assert manager.ensure({"component": "java-runtime-gamma", "majorVersion": 17}) == runtime
+    assert sum(standin.hits.values()) == hits
+
+
+def test_discover_and_select(manager, tmp_path, monkeypatch):
+    manager.install("java-runtime-gamma")
+    manager.install("jre-legacy")
+    system_java(str(tmp_path / "jvm" / "temurin-21"), "21.0.1")
+    system_java(str(tmp_path / "jvm" / "zulu-21-arm"), "21.0.2", "no-such-arch")
+    monkeypatch.setenv("JAVA_HOME", str(tmp_path / "jvm" / "temurin-21"))
+    runtimes = manager.discover(refresh=True)
+    # Mojang's first, each installation once
+    assert [r.component or r.source for r in runtimes] == ["java-runtime-gamma", "jre-legacy", "JAVA_HOME", "system"]
+
+    assert manager.select({"component": "java-runtime-gamma", "majorVersion": 17}).component == "java-runtime-gamma"
+    assert manager.select(None).component == "jre-legacy"
+    # No such component: the same major on this machine's architecture, then a newer one from 17 on
+    assert manager.select({"component": "java-runtime-delta", "majorVersion": 21}).version == "21.0.1"
+    assert manager.select({"component": "java-runtime-beta", "majorVersion": 18}).major == 21
+    assert manager.select({"component": "java-runtime-alpha", "majorVersion": 16}) is None
+
+
+def test_java_requirement(tmp_path):
+    def write(version, data):
+        path = tmp_path / "versions" / version / f"{version}.json"
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps(data))
+
+    write("1.20.1", {"javaVersion": {"component": "java-runtime-gamma", "majorVersion": 17}})
+    write("fabric-loader-0.14.22-1.20.1", {"inheritsFrom": "1.20.1"})
+    write("1.12.2", {})
+    assert java_requirement(str(tmp_path), "fabric-loader-0.14.22-1.20.1")["majorVersion"] == 17
+    assert java_requirement(str(tmp_path), "1.12.2") is None
+    assert java_requirement(str(tmp_path), "missing") is None
@@ -0,0 +1,86 @@
+import io
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from mclauncher.commands import run_command
+from mclauncher.server import ServerMetrics
+from standin import StandIn, add_loaders, add_version, launcher_environment
+
+
+def record(message, created):
+    record = logging.LogRecord("minecraft", logging.INFO, "", 0, message, (), None)
+    record.created = created
+    return record
+
+
+def test_metrics(tmp_path):
+    path = str(tmp_path / "metrics" / "server.jsonl")
+    metrics = ServerMetrics(path, "1.20.1", started=100)
+    metrics.write([record("Starting minecraft server version 1.20.1", 101),
+                   record('Done (12.345s)! For help, type "help"', 113)])
+    assert metrics.tps(113) == 20
+    metrics.write([record("Can't keep up! Is the server overloaded? Running 2503ms or 50 ticks behind", 163),
+                   record("Can't keep up! Is the server overloaded? Running 5000ms or 100 ticks behind", 213)])
+    assert metrics.report(213) == {"startup_seconds": 12.345, "uptime": 100, "lag_events": 2, "ticks_behind": 150,
+                                   "ms_behind": 7503, "worst_ms": 5000, "tps": 18.5}
+    metrics.close()
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert [event["event"] for event in events] == ["started", "lag", "lag", "summary"]
+    assert events[0]["wall_seconds"] == 13 and events[1]["behind_ms"] == 2503 and events[1]["tps"] == 19.0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake java is a shell script")
+@pytest.mark.parametrize("loader, main_class", [
+    ([], "1.0-server.jar"), (["--fabric", "0.14.22"], "net.fabricmc.loader.impl.launch.knot.KnotServer"),
+])
+def test_server(tmp_path, monkeypatch, caplog, loader, main_class):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setenv("FAKE_SERVER_LAG", "2")
+    directory = str(tmp_path / "server")
+    metrics_file = str(tmp_path / "metrics.jsonl")
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=5, libraries=2)
+        add_loaders(standin, ["1.0"], fabric_loaders=("0.14.22",))
+        with launcher_environment(standin, tmp_path):
+            # Without the EULA the server stops right away
+            monkeypatch.setattr(sys, "stdin", io.StringIO(""))
+            assert run_command(["server", "1.0", "--directory", directory] + loader) == 0
+            assert "Done (" not in caplog.text
+            monkeypatch.setattr(sys, "stdin", io.StringIO("say hello\nstop\n"))
+            assert run_command(["server", "1.0", "--directory", directory, "--accept-eula",
+                                "--metrics-file", metrics_file] + loader) == 0
+
+    assert os.path.isfile(tmp_path / ".minecraft" / "versions" / "1.0" / "1.0-server.jar")
+    messages = [r.getMessage() for r in caplog.records if r.name == "minecraft"]
+    assert any("Launching " in message and message.endswith(main_class) for message in messages)
+    assert any(message.endswith("[Server] hello") for message in messages)
+    with open(metrics_file) as f:
+        events = [json.loads(line) for line in f]
+    assert [event["event"] for event in events if event["event"] != "sample"] == [
+        "start", "started", "lag", "lag", "summary", "exit"]
+    summary = next(event for event in events if event["event"] == "summary")
+    assert summary["startup_seconds"] == 1.234 and summary["ticks_behind"] == 100
+
+
+def test_offline_needs_the_java_runtime(tmp_path, monkeypatch):
+    from mclauncher.install import Installer, InstallError
+    from mclauncher.metadata import MetadataCache
+    from mclauncher.server import ServerInstaller
+
+    monkeypatch.setenv("MCLAUNCHER_HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("PATH", "")
+    monkeypatch.delenv("JAVA_HOME", raising=False)
+    version = tmp_path / "minecraft" / "versions" / "1.0"
+    version.mkdir(parents=True)
+    (version / "1.0.json").write_text(json.dumps({
+        "id": "1.0", "downloads": {"server": {"url": "http://127.0.0.1:9/server.jar"}},
+        "javaVersion": {"component": "java-runtime-omega", "majorVersion": 99}}))
+    (version / "1.0-server.jar").write_bytes(b"jar")
+    installer = ServerInstaller(Installer(str(tmp_path / "minecraft"), MetadataCache(offline=True)))
+    with pytest.raises(InstallError, match="Java 99"):
+        installer.install("1.0")
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time of the mclauncher package allowed for `python -m mclauncher --version`, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get("MCLAUNCHER_IMPORT_BUDGET_MS", 150))
+
+# Modules only some code paths need, which must not be imported at startup
+HEAVY_MODULES = ("minecraft_launcher_lib", "requests", "urllib3", "flask", "click", "kivy", "multiprocessing",
+                 "http.server", "webbrowser")
+
+
+def import_times(*args):
+    """Run mclauncher with -X importtime and return {module: cumulative microseconds}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "mclauncher", *args], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_version_does_not_import_heavy_modules():
+    times = import_times("--version")
+    assert "mclauncher" in times
+    imported = [name for name in times if name.split(".")[0] in HEAVY_MODULES or name in HEAVY_MODULES]
+    assert imported == []
+
+
+def test_version_import_budget():
+    # Take the best of a few runs, the first one may have to write bytecode
+    best = min(import_times("--version")["mclauncher"] for _ in range(3)) / 1000
+    assert best < IMPORT_BUDGET_MS, f"importing mclauncher took {best:.1f}ms, budget is {IMPORT_BUDGET_MS}ms"
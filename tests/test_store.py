@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import pytest
+
+from mclauncher.download import Downloader
+from mclauncher.fileindex import FileIndex
+from mclauncher.install import Installer
+from mclauncher.metadata import MetadataCache
+from mclauncher.store import SharedStore
+from standin import StandIn, add_version
+
+
+@pytest.fixture
+def standin():
+    with StandIn() as standin:
+        add_version(standin, "1.0", assets=20, libraries=3)
+        yield standin
+
+
+def install(standin, tmp_path, name, store):
+    mc = str(tmp_path / name)
+    store.register(mc)
+    metadata = MetadataCache(str(tmp_path / "cache"),
+                             urls={"version_manifest": standin.url("/mc/game/version_manifest.json")})
+    Installer(mc, metadata, Downloader(4, store=store), resources_url=standin.url("/resources"),
+              index=FileIndex(mc)).install("1.0")
+    return mc
+
+
+def test_files_are_downloaded_once(standin, tmp_path):
+    store = SharedStore(str(tmp_path / "store"))
+    first = install(standin, tmp_path, "first", store)
+    hits = sum(standin.hits.values())
+    second = install(standin, tmp_path, "second", store)
+    # Only the version JSON, which has no known checksum, is downloaded again
+    assert sum(standin.hits.values()) == hits + 1
+
+    jar = os.path.join("versions", "1.0", "1.0.jar")
+    assert os.path.samefile(os.path.join(first, jar), os.path.join(second, jar))
+
+
+def test_gc_keeps_referenced_objects(standin, tmp_path):
+    store = SharedStore(str(tmp_path / "store"))
+    mc = install(standin, tmp_path, "first", store)
+    in_use = store.gc()["objects"]
+    assert in_use == 20 + 3 + 2  # assets, libraries, client jar and asset index
+    assert store.gc()["removed"] == 0
+
+    # Copies (e.g. across filesystems) are kept alive by the file index alone
+    jar = os.path.join(mc, "versions", "1.0", "1.0.jar")
+    with open(jar, "rb") as f:
+        data = f.read()
+    os.remove(jar)
+    with open(jar, "wb") as f:
+        f.write(data)
+    assert store.gc()["removed"] == 0
+
+    # Once the directory is gone, everything can be collected
+    shutil.rmtree(mc)
+    assert store.gc(dry_run=True)["removed"] == in_use
+    assert store.gc()["removed"] == in_use
+    assert store.roots() == []
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mclauncher.supervisor import Supervisor, read_process
+from test_multi import FAKE_JAVA
+
+needs_proc = pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="needs /proc")
+
+
+def starter(tmp_path, crashes=0, **env):
+    starts = []
+
+    def start():
+        starts.append(1)
+        environment = dict(os.environ, **env)
+        if len(starts) <= crashes:
+            environment["FAKE_JAVA_CRASH"] = "1"
+        return subprocess.Popen(FAKE_JAVA + ["--gameDir", str(tmp_path)], env=environment,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return start, starts
+
+
+def events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@needs_proc
+def test_read_process():
+    usage = read_process(os.getpid())
+    assert usage["rss"] > 0 and usage["peak_rss"] >= usage["rss"]
+    assert usage["threads"] >= 1 and usage["fds"] >= 3
+    assert read_process(2 ** 22 + 1) is None
+
+
+@needs_proc
+def test_samples_are_logged_and_recorded(tmp_path):
+    start, _ = starter(tmp_path, FAKE_JAVA_LINES="6", FAKE_JAVA_DELAY="0.05")
+    metrics = str(tmp_path / "metrics.jsonl")
+    assert Supervisor(start, str(tmp_path), interval=0.02, metrics_file=metrics).run() == 0
+    recorded = events(metrics)
+    samples = [event for event in recorded if event["event"] == "sample"]
+    assert samples and all(sample["rss"] > 0 for sample in samples)
+    assert [event["event"] for event in recorded if event["event"] != "sample"] == ["start", "exit"]
+    assert recorded[-1]["peak_rss"] > 0
+
+
+def test_restarts_after_crash_with_backoff(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("mclauncher.supervisor.time.sleep", sleeps.append)
+    start, starts = starter(tmp_path, crashes=2)
+    metrics = str(tmp_path / "metrics.jsonl")
+    assert Supervisor(start, str(tmp_path), metrics_file=metrics, restarts=3).run() == 0
+    assert len(starts) == 3
+    assert sleeps == [Supervisor.backoff, Supervisor.backoff * 2]
+    exits = [event for event in events(metrics) if event["event"] == "exit"]
+    assert [event["returncode"] for event in exits] == [255, 255, 0]
+    assert len(exits[0]["crash_reports"]) == 1 and exits[2]["crash_reports"] == []
+
+
+def test_gives_up_after_restarts(tmp_path, monkeypatch):
+    monkeypatch.setattr("mclauncher.supervisor.time.sleep", lambda delay: None)
+    start, starts = starter(tmp_path, crashes=5)
+    assert Supervisor(start, str(tmp_path), restarts=1).run() == 255
+    assert len(starts) == 2
@@ -0,0 +1,69 @@
+import json
+import threading
+
+from mclauncher.timings import Timings, _NULL_SPAN, collect, span, timings
+
+
+def test_disabled_span_does_nothing():
+    assert not timings.enabled
+    spans = len(timings.spans)
+    assert span("launch") is _NULL_SPAN
+    with span("launch"):
+        pass
+    assert len(timings.spans) == spans
+
+
+def test_nested_spans():
+    t = Timings()
+    t.enable()
+    with t.span("launch"):
+        with t.span("install", version="1.20.1"):
+            with t.span("download"):
+                pass
+            with t.span("download"):
+                pass
+        with t.span("auth"):
+            pass
+    paths = [(path, count) for path, count, _ in t.phases()]
+    assert paths == [(("launch",), 1), (("launch", "install"), 1), (("launch", "install", "download"), 2),
+                     (("launch", "auth"), 1)]
+    text = t.report("text")
+    assert "    download" in text
+    assert text.splitlines()[-1].startswith("total")
+
+
+def test_threads_keep_their_own_stack():
+    t = Timings()
+    t.enable()
+    with t.span("launch"):
+        thread = threading.Thread(target=lambda: t.span("fetch").begin().stop())
+        thread.start()
+        thread.join()
+    assert {span.path for span in t.spans} == {("launch",), ("fetch",)}
+
+
+def test_json_and_chrome_reports():
+    t = Timings()
+    t.enable()
+    with t.span("launch"):
+        with t.span("install", version="1.20.1"):
+            pass
+    report = json.loads(t.report("json"))
+    assert [span["path"] for span in report["spans"]] == [["launch"], ["launch", "install"]]
+    assert report["spans"][1]["args"] == {"version": "1.20.1"}
+    trace = json.loads(t.report("chrome"))
+    complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert {event["name"] for event in complete} == {"launch", "install"}
+    assert all(event["dur"] >= 0 for event in complete)
+
+
+def test_collect_sends_spans_to_its_timings():
+    t = Timings()
+    t.enable()
+    with collect(t):
+        with span("launch"):
+            pass
+    with span("install"):
+        pass
+    assert [span.name for span in t.spans] == ["launch"]
+    assert not timings.spans
@@ -0,0 +1,35 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from mclauncher.webserver import CallbackServer, run_server
+
+
+def test_run_server_returns_code():
+    server_port = []
+
+    def when_ready():
+        # The socket is listening before when_ready is called, no polling needed
+        urllib.request.urlopen(f"http://127.0.0.1:{server_port[0]}/?code=abc").read()
+
+    with CallbackServer(0) as probe:
+        server_port.append(probe.port)
+    assert run_server(when_ready=when_ready, port=server_port[0]) == "abc"
+
+
+def test_missing_code_is_rejected():
+    with CallbackServer(0) as server:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/")
+        assert e.value.code == 400
+        assert not server.code.done()
+
+
+def test_stop_without_code():
+    server = CallbackServer(0).start()
+    thread = server._thread
+    server.stop()
+    assert not thread.is_alive()
+    assert not any(t.name == "mclauncher-auth-callback" for t in threading.enumerate())